@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import re
+from typing import Sequence
+
+import numpy as np
+
+from ads_monitoring.columns import NUMERIC_FIELDS, NumericSnapshot
+from ads_monitoring.compare import Alert
+
+_OPERATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+_RULE_RE = re.compile(
+    r"^(?P<field>\w+)(?:\s+(?P<delta>delta))?\s*(?P<op><=|>=|<|>)\s*"
+    r"(?P<value>[-+]?\d+(?:\.\d+)?)$"
+)
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    field: str
+    op: str
+    value: float
+    delta: bool = False
+
+    @property
+    def label(self) -> str:
+        delta = " delta" if self.delta else ""
+        return f"{self.field}{delta} {self.op} {self.value:g}"
+
+
+def parse_rule(text: str) -> AlertRule:
+    match = _RULE_RE.match(text.strip())
+    if match is None:
+        raise ValueError(f"Invalid alert rule: {text!r}")
+    field = match["field"]
+    if field not in NUMERIC_FIELDS:
+        raise ValueError(
+            f"Alert rule field must be one of {', '.join(NUMERIC_FIELDS)}, got {field}"
+        )
+    return AlertRule(field, match["op"], float(match["value"]), bool(match["delta"]))
+
+
+def parse_rules(text: str) -> tuple[AlertRule, ...]:
+    return tuple(parse_rule(part) for part in text.split(",") if part.strip())
+
+
+def rule_fields(rules: Sequence[AlertRule]) -> list[str]:
+    return list(dict.fromkeys(rule.field for rule in rules))
+
+
+def evaluate_rules(
+    rules: Sequence[AlertRule],
+    current: NumericSnapshot,
+    previous: NumericSnapshot,
+) -> tuple[Alert, ...]:
+    _, current_index, previous_index = np.intersect1d(
+        current.keys, previous.keys, assume_unique=True, return_indices=True
+    )
+    previous_of = np.full(len(current), -1, dtype=np.intp)
+    previous_of[current_index] = previous_index
+
+    alerts: list[Alert] = []
+    for rule in rules:
+        compare = _OPERATORS[rule.op]
+        now = current.columns[rule.field]
+        before = previous.columns[rule.field]
+        if rule.delta:
+            delta = now[current_index] - before[previous_index]
+            hits = current_index[compare(delta, rule.value)]
+        else:
+            matched_before = np.zeros(len(current), dtype=bool)
+            matched_before[current_index] = compare(before[previous_index], rule.value)
+            hits = np.flatnonzero(compare(now, rule.value) & ~matched_before)
+        hits = hits[np.argsort(current.keys[hits], kind="stable")]
+        for index in hits.tolist():
+            prior = previous_of[index]
+            alerts.append(
+                Alert(
+                    rule=rule.label,
+                    offer_key=str(current.keys[index]),
+                    domain=current.domains[index],
+                    sale=current.sales[index],
+                    previous=float(before[prior]) if prior >= 0 else None,
+                    current=float(now[index]),
+                )
+            )
+    return tuple(alerts)
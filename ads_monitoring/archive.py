@@ -0,0 +1,405 @@
+from __future__ import annotations
+
+import argparse
+from collections import Counter
+import csv
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import json
+import os
+from pathlib import Path
+import sqlite3
+import sys
+import threading
+from typing import Iterable
+import zlib
+
+from ads_monitoring.compare import OfferKeyer, row_fingerprint
+from ads_monitoring.offers import SHEET_FIELDS
+
+DEFAULT_KEYFRAME_INTERVAL = 24
+_DOMAIN = SHEET_FIELDS.index("domain")
+_COMPRESSION_LEVEL = 9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive_snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    offer_count INTEGER NOT NULL,
+    delta BLOB NOT NULL,
+    keyframe BLOB
+);
+CREATE INDEX IF NOT EXISTS archive_snapshots_created_at
+    ON archive_snapshots (created_at);
+CREATE TABLE IF NOT EXISTS archive_domains (
+    domain TEXT NOT NULL,
+    snapshot_id INTEGER NOT NULL REFERENCES archive_snapshots(id),
+    PRIMARY KEY (domain, snapshot_id)
+) WITHOUT ROWID;
+"""
+
+KeyedRows = dict[str, list[str]]
+
+
+@dataclass(frozen=True)
+class ArchivedSnapshot:
+    id: int
+    created_at: str
+    offer_count: int
+
+
+@dataclass(frozen=True)
+class TimelineEvent:
+    snapshot_id: int
+    created_at: str
+    kind: str
+    row: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class SnapshotDelta:
+    added: KeyedRows
+    changed: KeyedRows
+    removed: KeyedRows
+    order: list[str] | None = None
+
+    def apply(self, rows: KeyedRows) -> KeyedRows:
+        for key in self.removed:
+            rows.pop(key, None)
+        rows.update(self.changed)
+        rows.update(self.added)
+        if self.order is not None:
+            rows = {key: rows[key] for key in self.order}
+        return rows
+
+    def events(self) -> Iterable[tuple[str, list[str]]]:
+        for kind, rows in (
+            ("added", self.added),
+            ("changed", self.changed),
+            ("removed", self.removed),
+        ):
+            for row in rows.values():
+                yield kind, row
+
+
+def key_rows(rows: Iterable[Iterable[str]]) -> KeyedRows:
+    keyer = OfferKeyer()
+    anonymous: Counter[str] = Counter()
+    keyed: KeyedRows = {}
+    for row in map(_pad, rows):
+        key = keyer(row)
+        if not key:
+            fingerprint = row_fingerprint(row)
+            anonymous[fingerprint] += 1
+            key = f"~{fingerprint}#{anonymous[fingerprint]}"
+        keyed[key] = row
+    return keyed
+
+
+def diff_snapshots(previous: KeyedRows, current: KeyedRows) -> SnapshotDelta:
+    added: KeyedRows = {}
+    changed: KeyedRows = {}
+    removed = {key: row for key, row in previous.items() if key not in current}
+    for key, row in current.items():
+        old = previous.get(key)
+        if old is None:
+            added[key] = row
+        elif old[_DOMAIN] != row[_DOMAIN]:
+            removed[key] = old
+            added[key] = row
+        elif old != row:
+            changed[key] = row
+    delta = SnapshotDelta(added, changed, removed)
+    replayed = delta.apply(dict.fromkeys(previous))
+    if list(replayed) != list(current):
+        delta = SnapshotDelta(added, changed, removed, order=list(current))
+    return delta
+
+
+class SnapshotArchive:
+    def __init__(
+        self,
+        path: str | Path,
+        keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+        keep_days: int = 0,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.keyframe_interval = keyframe_interval
+        self.keep_days = keep_days
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._head: tuple[int, KeyedRows] | None = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> SnapshotArchive:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def append(self, rows: Iterable[Iterable[str]], created_at: str | None = None) -> int:
+        created_at = created_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        current = key_rows(rows)
+        latest = self.latest()
+        if latest is None:
+            previous_id, previous = None, {}
+        elif self._head is not None and self._head[0] == latest.id:
+            previous_id, previous = self._head
+        else:
+            previous_id, previous = latest.id, self.rebuild(latest.id)
+        delta = diff_snapshots(previous, current)
+        domains = {row[_DOMAIN] for _, row in delta.events()}
+
+        with self._lock, self._conn:
+            since_keyframe = self._conn.execute(
+                "SELECT COUNT(*) FROM archive_snapshots WHERE id > COALESCE("
+                "(SELECT MAX(id) FROM archive_snapshots WHERE keyframe IS NOT NULL), 0)"
+            ).fetchone()[0]
+            keyframe = (
+                _encode_rows(current)
+                if previous_id is None or since_keyframe + 1 >= self.keyframe_interval
+                else None
+            )
+            cursor = self._conn.execute(
+                "INSERT INTO archive_snapshots (created_at, offer_count, delta, keyframe) "
+                "VALUES (?, ?, ?, ?)",
+                (created_at, len(current), _encode_delta(delta), keyframe),
+            )
+            snapshot_id = int(cursor.lastrowid)
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO archive_domains (domain, snapshot_id) VALUES (?, ?)",
+                ((domain, snapshot_id) for domain in domains),
+            )
+        self._head = (snapshot_id, current)
+        if self.keep_days:
+            cutoff = datetime.fromisoformat(created_at) - timedelta(days=self.keep_days)
+            self.prune(cutoff.isoformat(timespec="seconds"))
+        return snapshot_id
+
+    def prune(self, before: str) -> int:
+        with self._lock:
+            boundary = self._conn.execute(
+                "SELECT MAX(id) FROM archive_snapshots WHERE created_at < ? "
+                "AND id < (SELECT MAX(id) FROM archive_snapshots)",
+                (before,),
+            ).fetchone()[0]
+            if boundary is None:
+                return 0
+            first_kept, keyframe = self._conn.execute(
+                "SELECT id, keyframe FROM archive_snapshots WHERE id > ? ORDER BY id LIMIT 1",
+                (boundary,),
+            ).fetchone()
+        if keyframe is None:
+            keyframe = _encode_rows(self.rebuild(first_kept))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE archive_snapshots SET keyframe = ? WHERE id = ?",
+                (keyframe, first_kept),
+            )
+            self._conn.execute(
+                "DELETE FROM archive_domains WHERE snapshot_id <= ?", (boundary,)
+            )
+            cursor = self._conn.execute(
+                "DELETE FROM archive_snapshots WHERE id <= ?", (boundary,)
+            )
+        return cursor.rowcount
+
+    def latest(self) -> ArchivedSnapshot | None:
+        return self._select_snapshot("ORDER BY id DESC LIMIT 1", ())
+
+    def snapshot_at(self, timestamp: str) -> ArchivedSnapshot | None:
+        return self._select_snapshot(
+            "WHERE created_at <= ? ORDER BY created_at DESC, id DESC LIMIT 1",
+            (timestamp,),
+        )
+
+    def snapshots(
+        self,
+        since: str | None = None,
+        until: str | None = None,
+    ) -> list[ArchivedSnapshot]:
+        where, params = _time_range("created_at", since, until)
+        with self._lock:
+            fetched = self._conn.execute(
+                f"SELECT id, created_at, offer_count FROM archive_snapshots {where} ORDER BY id",
+                params,
+            ).fetchall()
+        return [ArchivedSnapshot(*row) for row in fetched]
+
+    def rebuild(self, snapshot_id: int) -> KeyedRows:
+        with self._lock:
+            base = self._conn.execute(
+                "SELECT id, keyframe FROM archive_snapshots "
+                "WHERE id <= ? AND keyframe IS NOT NULL ORDER BY id DESC LIMIT 1",
+                (snapshot_id,),
+            ).fetchone()
+            if base is None:
+                raise KeyError(snapshot_id)
+            deltas = self._conn.execute(
+                "SELECT delta FROM archive_snapshots WHERE id > ? AND id <= ? ORDER BY id",
+                (base[0], snapshot_id),
+            ).fetchall()
+        rows = _decode_rows(base[1])
+        for (blob,) in deltas:
+            rows = _decode_delta(blob).apply(rows)
+        return rows
+
+    def domain_timeline(
+        self,
+        domain: str,
+        since: str | None = None,
+        until: str | None = None,
+    ) -> list[TimelineEvent]:
+        where, params = _time_range("s.created_at", since, until)
+        where = f"{where} AND" if where else "WHERE"
+        with self._lock:
+            fetched = self._conn.execute(
+                "SELECT s.id, s.created_at, s.delta FROM archive_domains d "
+                "JOIN archive_snapshots s ON s.id = d.snapshot_id "
+                f"{where} d.domain = ? ORDER BY s.id",
+                (*params, domain),
+            ).fetchall()
+        events: list[TimelineEvent] = []
+        for snapshot_id, created_at, blob in fetched:
+            for kind, row in _decode_delta(blob).events():
+                if row[_DOMAIN] == domain:
+                    events.append(TimelineEvent(snapshot_id, created_at, kind, tuple(row)))
+        return events
+
+    def _select_snapshot(self, clause: str, params: tuple) -> ArchivedSnapshot | None:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT id, created_at, offer_count FROM archive_snapshots {clause}",
+                params,
+            ).fetchone()
+        return ArchivedSnapshot(*row) if row else None
+
+
+def _pad(row: Iterable[str]) -> list[str]:
+    values = [str(value) for value in row][: len(SHEET_FIELDS)]
+    values.extend([""] * (len(SHEET_FIELDS) - len(values)))
+    return values
+
+
+def _time_range(column: str, since: str | None, until: str | None) -> tuple[str, tuple]:
+    conditions: list[str] = []
+    params: list[str] = []
+    if since:
+        conditions.append(f"{column} >= ?")
+        params.append(since)
+    if until:
+        conditions.append(f"{column} <= ?")
+        params.append(until)
+    return ("WHERE " + " AND ".join(conditions) if conditions else "", tuple(params))
+
+
+def _columns(rows: KeyedRows) -> dict[str, list]:
+    return {"keys": list(rows), "columns": [list(column) for column in zip(*rows.values())]}
+
+
+def _from_columns(payload: dict[str, list]) -> KeyedRows:
+    return dict(zip(payload["keys"], (list(row) for row in zip(*payload["columns"]))))
+
+
+def _compress(payload: dict) -> bytes:
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return zlib.compress(data.encode("utf-8"), _COMPRESSION_LEVEL)
+
+
+def _decompress(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def _encode_rows(rows: KeyedRows) -> bytes:
+    return _compress(_columns(rows))
+
+
+def _decode_rows(blob: bytes) -> KeyedRows:
+    return _from_columns(_decompress(blob))
+
+
+def _encode_delta(delta: SnapshotDelta) -> bytes:
+    return _compress(
+        {
+            "added": _columns(delta.added),
+            "changed": _columns(delta.changed),
+            "removed": _columns(delta.removed),
+            "order": delta.order,
+        }
+    )
+
+
+def _decode_delta(blob: bytes) -> SnapshotDelta:
+    payload = _decompress(blob)
+    return SnapshotDelta(
+        _from_columns(payload["added"]),
+        _from_columns(payload["changed"]),
+        _from_columns(payload["removed"]),
+        payload.get("order"),
+    )
+
+
+def _default_archive_path() -> Path:
+    configured = os.getenv("ARCHIVE_PATH", "").strip()
+    if configured:
+        return Path(configured).expanduser()
+    return Path(os.getenv("STATE_DIR", "state")).expanduser() / "archive.sqlite3"
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Query the offer snapshot archive.")
+    parser.add_argument(
+        "--archive",
+        type=Path,
+        default=_default_archive_path(),
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    listing = commands.add_parser("list", help="List archived snapshots.")
+    listing.add_argument("--since")
+    listing.add_argument("--until")
+
+    snapshot = commands.add_parser("snapshot", help="Print a snapshot as CSV.")
+    snapshot.add_argument("--at", help="ISO timestamp; defaults to the latest snapshot.")
+
+    timeline = commands.add_parser("timeline", help="Print changes for one domain.")
+    timeline.add_argument("domain")
+    timeline.add_argument("--since")
+    timeline.add_argument("--until")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    if not args.archive.is_file():
+        print(f"Archive not found: {args.archive}", file=sys.stderr)
+        return 1
+    with SnapshotArchive(args.archive) as archive:
+        if args.command == "list":
+            for item in archive.snapshots(args.since, args.until):
+                print(f"{item.id}\t{item.created_at}\t{item.offer_count}")
+            return 0
+        writer = csv.writer(sys.stdout)
+        if args.command == "snapshot":
+            found = archive.snapshot_at(args.at) if args.at else archive.latest()
+            if found is None:
+                print("No snapshot at that time", file=sys.stderr)
+                return 1
+            writer.writerow(SHEET_FIELDS)
+            writer.writerows(archive.rebuild(found.id).values())
+            return 0
+        writer.writerow(["created_at", "change", *SHEET_FIELDS])
+        for event in archive.domain_timeline(args.domain, args.since, args.until):
+            writer.writerow([event.created_at, event.kind, *event.row])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
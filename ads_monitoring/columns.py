@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import math
+import re
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from ads_monitoring.compare import OfferKeyer
+from ads_monitoring.fetcher import SHEET_FIELDS
+
+NUMERIC_FIELDS = ("sale", "motivationAmount", "offerDuration", "greenProbability")
+_NUMBER_RE = re.compile(r"[-+]?\d+(?:[.,]\d+)?")
+_DOMAIN_INDEX = SHEET_FIELDS.index("domain")
+_SALE_INDEX = SHEET_FIELDS.index("sale")
+
+
+def parse_number(text: str) -> float:
+    match = _NUMBER_RE.search(text.replace("\xa0", "").replace(" ", ""))
+    return float(match.group().replace(",", ".")) if match else math.nan
+
+
+def numeric_column(values: Sequence[str]) -> np.ndarray:
+    if not values:
+        return np.empty(0, dtype=np.float64)
+    uniques, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    parsed = np.fromiter(map(parse_number, uniques.tolist()), np.float64, len(uniques))
+    return parsed[inverse]
+
+
+@dataclass(frozen=True)
+class NumericSnapshot:
+    keys: np.ndarray
+    domains: np.ndarray
+    sales: np.ndarray
+    columns: dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[Sequence[str]],
+        fields: Iterable[str] = NUMERIC_FIELDS,
+    ) -> NumericSnapshot:
+        positions = {field: SHEET_FIELDS.index(field) for field in fields}
+        keyer = OfferKeyer()
+        keys: list[str] = []
+        domains: list[str] = []
+        sales: list[str] = []
+        texts: dict[str, list[str]] = {field: [] for field in positions}
+        for row in rows:
+            key = keyer(row)
+            if not key:
+                continue
+            keys.append(key)
+            domains.append(row[_DOMAIN_INDEX])
+            sales.append(row[_SALE_INDEX])
+            for field, index in positions.items():
+                texts[field].append(row[index] if index < len(row) else "")
+        return cls(
+            keys=np.asarray(keys, dtype=str),
+            domains=np.asarray(domains, dtype=object),
+            sales=np.asarray(sales, dtype=object),
+            columns={field: numeric_column(values) for field, values in texts.items()},
+        )
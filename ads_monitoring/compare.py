@@ -1,25 +1,178 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+import hashlib
+from typing import Callable, Iterable, Mapping, Sequence
+
+from ads_monitoring.fetcher import SHEET_FIELDS, SOURCE_FIELD
+
+_ID_INDEX = SHEET_FIELDS.index("id")
+_DOMAIN_INDEX = SHEET_FIELDS.index("domain")
+_SALE_INDEX = SHEET_FIELDS.index("sale")
+_CONTENT_WIDTH = SHEET_FIELDS.index(SOURCE_FIELD)
+_METADATA_FIELDS = frozenset({"id", SOURCE_FIELD})
+
+
+@dataclass(frozen=True)
+class OfferChange:
+    offer_key: str
+    domain: str
+    sale: str
+    changes: tuple[tuple[str, str, str], ...]
+
+
+@dataclass(frozen=True)
+class OfferDiff:
+    added: tuple[str, ...] = ()
+    removed: tuple[str, ...] = ()
+    modified: tuple[OfferChange, ...] = ()
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.removed or self.modified)
+
+
+@dataclass(frozen=True)
+class Alert:
+    rule: str
+    offer_key: str
+    domain: str
+    sale: str
+    previous: float | None
+    current: float
+
+
+Pair = tuple[str, str]
 
 
 @dataclass(frozen=True)
 class ComparisonResult:
-    new_pairs: set[tuple[str, str]]
-    removed_pairs: set[tuple[str, str]]
+    new_pairs: set[Pair]
+    removed_pairs: set[Pair]
+    offer_diff: OfferDiff = field(default_factory=OfferDiff)
+    count_changes: dict[Pair, tuple[int, int]] = field(default_factory=dict)
+    alerts: tuple[Alert, ...] = ()
 
     @property
     def has_changes(self) -> bool:
-        return bool(self.new_pairs or self.removed_pairs)
+        return bool(
+            self.new_pairs
+            or self.removed_pairs
+            or self.count_changes
+            or self.offer_diff.has_changes
+            or self.alerts
+        )
+
+
+def _as_counter(pairs: set[Pair] | Mapping[Pair, int]) -> Counter[Pair]:
+    if isinstance(pairs, Mapping):
+        return Counter({pair: count for pair, count in pairs.items() if count > 0})
+    return Counter(dict.fromkeys(pairs, 1))
 
 
 def compare_pairs(
-    current_pairs: set[tuple[str, str]],
-    previous_pairs: set[tuple[str, str]],
+    current_pairs: set[Pair] | Mapping[Pair, int],
+    previous_pairs: set[Pair] | Mapping[Pair, int],
+    offer_diff: OfferDiff | None = None,
+    alerts: Iterable[Alert] = (),
 ) -> ComparisonResult:
+    current = _as_counter(current_pairs)
+    previous = _as_counter(previous_pairs)
+    count_changes = {
+        pair: (previous[pair], current[pair])
+        for pair in current.keys() & previous.keys()
+        if previous[pair] != current[pair]
+    }
     return ComparisonResult(
-        new_pairs=current_pairs - previous_pairs,
-        removed_pairs=previous_pairs - current_pairs,
+        new_pairs=set(current.keys() - previous.keys()),
+        removed_pairs=set(previous.keys() - current.keys()),
+        offer_diff=offer_diff or OfferDiff(),
+        count_changes=count_changes,
+        alerts=tuple(alerts),
+    )
+
+
+def row_fingerprint(row: Sequence[str]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for value in row:
+        digest.update(value.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def content_fingerprint(row: Sequence[str]) -> str:
+    return row_fingerprint(row[:_CONTENT_WIDTH])
+
+
+class OfferKeyer:
+    def __init__(self) -> None:
+        self._seen: dict[str, int] = defaultdict(int)
+
+    def __call__(self, row: Sequence[str]) -> str:
+        offer_id = row[_ID_INDEX] if len(row) > _ID_INDEX else ""
+        if not offer_id:
+            return ""
+        self._seen[offer_id] += 1
+        count = self._seen[offer_id]
+        return offer_id if count == 1 else f"{offer_id}#{count}"
+
+
+def diff_offers(
+    current_rows: Iterable[Sequence[str]],
+    previous_hashes: Mapping[str, str],
+    load_previous: Callable[[list[str]], Mapping[str, Sequence[str]]],
+) -> OfferDiff:
+    added: list[str] = []
+    modified_rows: dict[str, Sequence[str]] = {}
+    seen: set[str] = set()
+    keyer = OfferKeyer()
+    for row in current_rows:
+        key = keyer(row)
+        if not key:
+            continue
+        seen.add(key)
+        previous_hash = previous_hashes.get(key)
+        if previous_hash is None:
+            added.append(key)
+        elif previous_hash != content_fingerprint(row):
+            modified_rows[key] = row
+    removed = [key for key in previous_hashes if key not in seen]
+
+    previous_rows = load_previous(list(modified_rows)) if modified_rows else {}
+    modified = (
+        offer_change(key, previous_rows[key], row)
+        for key, row in modified_rows.items()
+        if key in previous_rows
+    )
+    return build_offer_diff(added, removed, modified)
+
+
+def offer_change(key: str, previous: Sequence[str], row: Sequence[str]) -> OfferChange | None:
+    changes = tuple(
+        (name, old, new)
+        for name, old, new in zip(SHEET_FIELDS, previous, row)
+        if name not in _METADATA_FIELDS and old != new
+    )
+    if not changes:
+        return None
+    return OfferChange(key, row[_DOMAIN_INDEX], row[_SALE_INDEX], changes)
+
+
+def build_offer_diff(
+    added: Iterable[str],
+    removed: Iterable[str],
+    modified: Iterable[OfferChange | None],
+) -> OfferDiff:
+    return OfferDiff(
+        added=tuple(sorted(added)),
+        removed=tuple(sorted(removed)),
+        modified=tuple(
+            sorted(
+                (change for change in modified if change is not None),
+                key=lambda change: change.offer_key,
+            )
+        ),
     )
 
 
@@ -28,7 +181,18 @@ def format_comparison(result: ComparisonResult) -> str:
         return "Изменений нет."
 
     lines: list[str] = []
+    if result.alerts:
+        lines.append("Сработали правила:")
+        for alert in result.alerts:
+            previous = "—" if alert.previous is None else f"{alert.previous:g}"
+            lines.append(
+                f"! {alert.offer_key} | {alert.domain} | {alert.sale}: "
+                f"{alert.rule} ({previous} → {alert.current:g})"
+            )
+
     if result.new_pairs:
+        if lines:
+            lines.append("")
         lines.append("Новые пары (domain + sale):")
         for domain, sale in sorted(result.new_pairs):
             lines.append(f"+ {domain} | {sale}")
@@ -40,4 +204,29 @@ def format_comparison(result: ComparisonResult) -> str:
         for domain, sale in sorted(result.removed_pairs):
             lines.append(f"- {domain} | {sale}")
 
+    if result.count_changes:
+        if lines:
+            lines.append("")
+        lines.append("Изменилось число офферов (domain + sale):")
+        for (domain, sale), (old, new) in sorted(result.count_changes.items()):
+            lines.append(f"# {domain} | {sale}: {old} → {new}")
+
+    offer_diff = result.offer_diff
+    if offer_diff.modified:
+        if lines:
+            lines.append("")
+        lines.append("Измененные офферы:")
+        for change in offer_diff.modified:
+            details = "; ".join(
+                f"{name}: {old or '—'} → {new or '—'}" for name, old, new in change.changes
+            )
+            lines.append(f"~ {change.offer_key} | {change.domain} | {change.sale}: {details}")
+
+    if offer_diff.added or offer_diff.removed:
+        if lines:
+            lines.append("")
+        lines.append(
+            f"Офферы: новых {len(offer_diff.added)}, удаленных {len(offer_diff.removed)}"
+        )
+
     return "\n".join(lines)
@@ -1,8 +1,30 @@
 from __future__ import annotations
 
+import json
 import os
+import re
 from pathlib import Path
 from dataclasses import dataclass
+from typing import Mapping
+
+from ads_monitoring.alerts import AlertRule, parse_rules
+
+SHARED_JOB_KEYS = frozenset(
+    {
+        "REQUEST_TIMEOUT_SECONDS",
+        "PARSER_ENGINE",
+        "FETCH_WORKERS",
+        "MAX_CONNECTIONS_PER_HOST",
+        "HTTP_MAX_RETRIES",
+        "HEDGE_PERCENTILE",
+        "PARSE_WORKERS",
+        "PARSE_SPLIT_BYTES",
+        "PIPELINE_MODE",
+        "SHEETS_READS_PER_MINUTE",
+        "SHEETS_WRITES_PER_MINUTE",
+    }
+)
+_JOB_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
 
 
 @dataclass(frozen=True)
@@ -15,25 +37,59 @@ class Settings:
     telegram_bot_token: str
     telegram_channel_id: str
     request_timeout_seconds: int
+    parser_engine: str = "stream"
+    state_dir: str = "state"
+    flocktory_urls: tuple[str, ...] = ()
+    fetch_workers: int = 8
+    max_connections_per_host: int = 4
+    sheets_write_mode: str = "diff"
+    sheets_mirror_attempts: int = 3
+    poll_min_seconds: int = 300
+    poll_max_seconds: int = 3600
+    parse_workers: int = 1
+    parse_split_bytes: int = 4 * 1024 * 1024
+    http_max_retries: int = 3
+    hedge_percentile: float = 0.0
+    archive_path: str | None = None
+    archive_keep_days: int = 90
+    metrics_jsonl: str | None = None
+    metrics_jsonl_max_lines: int = 10000
+    metrics_textfile: str | None = None
+    profile_output: str | None = None
+    pipeline_mode: str = "batch"
+    sheets_append_batch_rows: int = 5000
+    sheets_metadata_ttl_seconds: int = 300
+    sheets_reads_per_minute: int = 60
+    sheets_writes_per_minute: int = 60
+    alert_rules: tuple[AlertRule, ...] = ()
+
+    @property
+    def source_urls(self) -> tuple[str, ...]:
+        return self.flocktory_urls or (self.flocktory_url,)
 
+    @property
+    def telegram_chat_ids(self) -> tuple[str, ...]:
+        parts = (part.strip() for part in self.telegram_channel_id.split(","))
+        return tuple(dict.fromkeys(part for part in parts if part))
 
-def _get_env(name: str, default: str | None = None) -> str:
-    value = os.getenv(name, default)
+
+def _get_env(env: Mapping[str, str], name: str, default: str | None = None) -> str:
+    value = env.get(name, default)
     if value is None:
         raise RuntimeError(f"Missing required environment variable: {name}")
     return value
 
 
-def _get_path_env(name: str, default: str | None = None) -> str:
-    value = _get_env(name, default)
+def _get_path_env(env: Mapping[str, str], name: str, default: str | None = None) -> str:
+    value = _get_env(env, name, default)
     path = Path(value).expanduser()
     if not path.is_file():
         raise RuntimeError(f"File not found for {name}: {path}")
     return str(path)
 
 
-def _get_positive_int(name: str, default: str) -> int:
-    raw = _get_env(name, default)
+def _get_positive_int(env: Mapping[str, str], name: str, default: str) -> int:
+    raw = _get_env(env, name, default)
     try:
         value = int(raw)
     except ValueError as exc:
@@ -43,14 +99,178 @@ def _get_positive_int(name: str, default: str) -> int:
     return value
 
 
-def load_settings() -> Settings:
+def _get_non_negative_int(env: Mapping[str, str], name: str, default: str) -> int:
+    raw = _get_env(env, name, default)
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise RuntimeError(f"Invalid integer for {name}: {raw}") from exc
+    if value < 0:
+        raise RuntimeError(f"{name} must not be negative, got {value}")
+    return value
+
+
+def _get_percentile(env: Mapping[str, str], name: str, default: str) -> float:
+    raw = _get_env(env, name, default)
+    try:
+        value = float(raw)
+    except ValueError as exc:
+        raise RuntimeError(f"Invalid number for {name}: {raw}") from exc
+    if not 0 <= value < 100:
+        raise RuntimeError(f"{name} must be in [0, 100), got {value}")
+    return value
+
+
+def _get_optional_path(env: Mapping[str, str], name: str, default: str = "") -> str | None:
+    value = env.get(name, default).strip()
+    return str(Path(value).expanduser()) if value else None
+
+
+def _get_choice(
+    env: Mapping[str, str],
+    name: str,
+    default: str,
+    choices: tuple[str, ...],
+) -> str:
+    value = _get_env(env, name, default).strip().lower()
+    if value not in choices:
+        raise RuntimeError(f"{name} must be one of {', '.join(choices)}, got {value}")
+    return value
+
+
+def _get_alert_rules(env: Mapping[str, str], name: str) -> tuple[AlertRule, ...]:
+    try:
+        return parse_rules(env.get(name, ""))
+    except ValueError as exc:
+        raise RuntimeError(f"Invalid {name}: {exc}") from exc
+
+
+def _get_url_list(env: Mapping[str, str], name: str, fallback_name: str) -> tuple[str, ...]:
+    raw = env.get(name)
+    if raw is None:
+        return (_get_env(env, fallback_name),)
+    parts = (part.strip() for part in re.split(r"[,\s]+", raw))
+    urls = tuple(dict.fromkeys(part for part in parts if part))
+    if not urls:
+        raise RuntimeError(f"{name} must contain at least one URL")
+    return urls
+
+
+def load_settings(env: Mapping[str, str] | None = None) -> Settings:
+    env = os.environ if env is None else env
+    source_urls = _get_url_list(env, "FLOCKTORY_URLS", "FLOCKTORY_URL")
+    state_dir = Path(_get_env(env, "STATE_DIR", "state")).expanduser()
+    poll_min_seconds = _get_positive_int(env, "POLL_MIN_SECONDS", "300")
+    poll_max_seconds = _get_positive_int(env, "POLL_MAX_SECONDS", "3600")
+    if poll_max_seconds < poll_min_seconds:
+        raise RuntimeError("POLL_MAX_SECONDS must not be less than POLL_MIN_SECONDS")
     return Settings(
-        flocktory_url=_get_env("FLOCKTORY_URL"),
-        google_sheet_id=_get_env("GOOGLE_SHEET_ID"),
-        google_service_account_file=_get_path_env("GOOGLE_SERVICE_ACCOUNT_FILE"),
-        sheet_current_name=_get_env("SHEET_CURRENT_NAME", "current"),
-        sheet_previous_name=_get_env("SHEET_PREVIOUS_NAME", "previous"),
-        telegram_bot_token=_get_env("TELEGRAM_BOT_TOKEN"),
-        telegram_channel_id=_get_env("TELEGRAM_CHANNEL_ID"),
-        request_timeout_seconds=_get_positive_int("REQUEST_TIMEOUT_SECONDS", "30"),
+        flocktory_url=source_urls[0],
+        google_sheet_id=_get_env(env, "GOOGLE_SHEET_ID"),
+        google_service_account_file=_get_path_env(env, "GOOGLE_SERVICE_ACCOUNT_FILE"),
+        sheet_current_name=_get_env(env, "SHEET_CURRENT_NAME", "current"),
+        sheet_previous_name=_get_env(env, "SHEET_PREVIOUS_NAME", "previous"),
+        telegram_bot_token=_get_env(env, "TELEGRAM_BOT_TOKEN"),
+        telegram_channel_id=_get_env(env, "TELEGRAM_CHANNEL_ID"),
+        request_timeout_seconds=_get_positive_int(env, "REQUEST_TIMEOUT_SECONDS", "30"),
+        parser_engine=_get_choice(env, "PARSER_ENGINE", "stream", ("stream", "soup")),
+        state_dir=str(state_dir),
+        flocktory_urls=source_urls,
+        fetch_workers=_get_positive_int(env, "FETCH_WORKERS", "8"),
+        max_connections_per_host=_get_positive_int(env, "MAX_CONNECTIONS_PER_HOST", "4"),
+        sheets_write_mode=_get_choice(
+            env, "SHEETS_WRITE_MODE", "diff", ("diff", "overwrite", "append")
+        ),
+        sheets_mirror_attempts=_get_positive_int(env, "SHEETS_MIRROR_ATTEMPTS", "3"),
+        poll_min_seconds=poll_min_seconds,
+        poll_max_seconds=poll_max_seconds,
+        parse_workers=_get_positive_int(env, "PARSE_WORKERS", "1"),
+        parse_split_bytes=_get_positive_int(env, "PARSE_SPLIT_BYTES", str(4 * 1024 * 1024)),
+        http_max_retries=_get_non_negative_int(env, "HTTP_MAX_RETRIES", "3"),
+        hedge_percentile=_get_percentile(env, "HEDGE_PERCENTILE", "0"),
+        archive_path=_get_optional_path(
+            env, "ARCHIVE_PATH", str(state_dir / "archive.sqlite3")
+        ),
+        archive_keep_days=_get_non_negative_int(env, "ARCHIVE_KEEP_DAYS", "90"),
+        metrics_jsonl=_get_optional_path(
+            env, "METRICS_JSONL", str(state_dir / "metrics.jsonl")
+        ),
+        metrics_jsonl_max_lines=_get_non_negative_int(env, "METRICS_JSONL_MAX_LINES", "10000"),
+        metrics_textfile=_get_optional_path(
+            env, "METRICS_TEXTFILE", str(state_dir / "ads_monitoring.prom")
+        ),
+        profile_output=_get_optional_path(env, "PROFILE_OUTPUT"),
+        pipeline_mode=_get_choice(env, "PIPELINE_MODE", "batch", ("batch", "stream")),
+        sheets_append_batch_rows=_get_positive_int(env, "SHEETS_APPEND_BATCH_ROWS", "5000"),
+        sheets_metadata_ttl_seconds=_get_non_negative_int(
+            env, "SHEETS_METADATA_TTL_SECONDS", "300"
+        ),
+        sheets_reads_per_minute=_get_non_negative_int(env, "SHEETS_READS_PER_MINUTE", "60"),
+        sheets_writes_per_minute=_get_non_negative_int(env, "SHEETS_WRITES_PER_MINUTE", "60"),
+        alert_rules=_get_alert_rules(env, "ALERT_RULES"),
+    )
+
+
+@dataclass(frozen=True)
+class JobsConfig:
+    jobs: dict[str, Settings]
+    state_dir: str = "state"
+    workers: int = 4
+
+
+def _env_values(section: object, label: str) -> dict[str, str]:
+    if not isinstance(section, dict):
+        raise RuntimeError(f"{label} must be an object of environment variables")
+    values: dict[str, str] = {}
+    for name, value in section.items():
+        if isinstance(value, list):
+            value = ",".join(str(item) for item in value)
+        elif isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise RuntimeError(f"Invalid value for {name} in {label}: {value!r}")
+        values[str(name)] = str(value)
+    return values
+
+
+def load_jobs(
+    path: str | Path,
+    env: Mapping[str, str] | None = None,
+) -> JobsConfig:
+    env = os.environ if env is None else env
+    try:
+        with Path(path).expanduser().open(encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except (OSError, ValueError) as exc:
+        raise RuntimeError(f"Unable to read jobs file {path}: {exc}") from exc
+    if not isinstance(payload, dict) or not payload.get("jobs"):
+        raise RuntimeError(f"Jobs file {path} must define a non-empty \"jobs\" object")
+
+    defaults = {**env, **_env_values(payload.get("defaults", {}), "defaults")}
+    if defaults.get("PIPELINE_MODE", "batch").strip().lower() != "batch":
+        raise RuntimeError("Jobs run in PIPELINE_MODE=batch only")
+    if not isinstance(payload["jobs"], dict):
+        raise RuntimeError("\"jobs\" must map job names to their settings")
+    base_state_dir = Path(defaults.get("STATE_DIR", "state")).expanduser()
+    jobs: dict[str, Settings] = {}
+    for name, section in payload["jobs"].items():
+        if not _JOB_NAME_RE.match(name):
+            raise RuntimeError(f"Invalid job name: {name!r}")
+        overrides = _env_values(section, f"job {name}")
+        shared = sorted(SHARED_JOB_KEYS & overrides.keys())
+        if shared:
+            raise RuntimeError(
+                f"Job {name} cannot override {', '.join(shared)}; set it in defaults"
+            )
+        job_env = {**defaults, **overrides}
+        if "STATE_DIR" not in overrides:
+            job_env["STATE_DIR"] = str(base_state_dir / "jobs" / name)
+        if "FLOCKTORY_URL" in overrides and "FLOCKTORY_URLS" not in overrides:
+            job_env.pop("FLOCKTORY_URLS", None)
+        try:
+            jobs[name] = load_settings(job_env)
+        except RuntimeError as exc:
+            raise RuntimeError(f"Job {name}: {exc}") from exc
+    return JobsConfig(
+        jobs=jobs,
+        state_dir=str(base_state_dir),
+        workers=_get_positive_int(defaults, "JOB_WORKERS", "4"),
     )
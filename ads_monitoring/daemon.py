@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+import json
+import logging
+import os
+from pathlib import Path
+import random
+import signal
+import threading
+import time
+
+from ads_monitoring.config import Settings, load_settings
+from ads_monitoring.main import Monitor
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptivePoller:
+    def __init__(
+        self,
+        min_interval: float,
+        max_interval: float,
+        backoff_factor: float = 1.5,
+        speedup_factor: float = 0.5,
+        jitter: float = 0.1,
+        rng: random.Random | None = None,
+    ) -> None:
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Poll intervals must satisfy 0 < min_interval <= max_interval")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.speedup_factor = speedup_factor
+        self.jitter = jitter
+        self.interval = min_interval
+        self._rng = rng or random.Random()
+
+    def next_delay(self, changed: bool) -> float:
+        factor = self.speedup_factor if changed else self.backoff_factor
+        self.interval = min(max(self.interval * factor, self.min_interval), self.max_interval)
+        spread = self.interval * self.jitter
+        delay = self.interval + self._rng.uniform(-spread, spread)
+        return min(max(delay, self.min_interval), self.max_interval)
+
+
+class Daemon:
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.poller = AdaptivePoller(settings.poll_min_seconds, settings.poll_max_seconds)
+        self.status_path = Path(settings.state_dir) / "daemon_status.json"
+        self.last_cycle_duration: float | None = None
+        self.last_cycle_changed: bool | None = None
+        self._stop = threading.Event()
+
+    def stop(self, *_args) -> None:
+        logger.info("Stopping ads monitoring daemon")
+        self._stop.set()
+
+    def serve(self, max_cycles: int | None = None) -> None:
+        cycles = 0
+        with Monitor(self.settings) as monitor:
+            while not self._stop.is_set():
+                started_at = datetime.now(timezone.utc)
+                start = time.monotonic()
+                try:
+                    changed = monitor.run_cycle()
+                except Exception:
+                    logger.exception("Ads monitoring cycle failed")
+                    changed = False
+                self.last_cycle_duration = time.monotonic() - start
+                self.last_cycle_changed = changed
+                delay = self.poller.next_delay(changed)
+                logger.info(
+                    "Cycle finished in %.2fs (changed=%s); next poll in %.0fs",
+                    self.last_cycle_duration,
+                    changed,
+                    delay,
+                )
+                self._write_status(started_at, delay)
+                cycles += 1
+                if max_cycles is not None and cycles >= max_cycles:
+                    break
+                self._stop.wait(delay)
+
+    def _write_status(self, started_at: datetime, delay: float) -> None:
+        status = {
+            "last_cycle_started_at": started_at.isoformat(timespec="seconds"),
+            "last_cycle_duration_seconds": round(self.last_cycle_duration or 0.0, 3),
+            "last_cycle_changed": self.last_cycle_changed,
+            "poll_interval_seconds": round(self.poller.interval, 1),
+            "next_poll_in_seconds": round(delay, 1),
+        }
+        try:
+            self.status_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.status_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(status), encoding="utf-8")
+            os.replace(tmp_path, self.status_path)
+        except OSError:
+            logger.warning("Unable to write daemon status to %s", self.status_path)
+
+
+def main() -> None:
+    daemon = Daemon(load_settings())
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    daemon.serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,30 @@
 from __future__ import annotations
 
-from collections import defaultdict
+from collections import Counter
+import codecs
+from dataclasses import dataclass
+import hashlib
+from html.parser import HTMLParser
 import logging
 import re
-from typing import Iterable
+import time
+from typing import Callable, Iterable, Iterator
 
 import requests
 from bs4 import BeautifulSoup
 
-FIELDS = [
-    "id",
-    "site",
-    "domain",
-    "category",
-    "sale",
-    "conditions",
-    "motivationAmount",
-    "offerDuration",
-    "legalName",
-    "greenProbability",
-]
+from ads_monitoring.headers import HeaderMatcher
+from ads_monitoring.offers import (
+    FIELDS,
+    SHEET_FIELDS,
+    SOURCE_FIELD,
+    Offer,
+    OfferRows,
+    Pair,
+    iter_pairs,
+)
+from ads_monitoring.page_cache import CachedPage, PageCache
+from ads_monitoring.transport import Transport
 
 HEADER_ALIASES = {
     "id": {"id", "offer id"},
@@ -46,46 +51,153 @@ HEADER_ALIASES = {
 }
 
 
+PARSER_ENGINES = ("stream", "soup")
+DEFAULT_ENGINE = "stream"
+CHUNK_SIZE = 64 * 1024
+_SNIFF_BYTES = 1024
+_CHARSET_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+_META_CHARSET_RE = re.compile(rb"<meta[^>]+charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+PageParser = Callable[[bytes, str | None], list[Offer]]
+
+
 class OfferParseError(RuntimeError):
     pass
 
 
-def fetch_html(url: str, timeout_seconds: int) -> str:
-    response = requests.get(url, timeout=timeout_seconds)
-    response.raise_for_status()
-    return response.text
+@dataclass(frozen=True)
+class FetchResult:
+    offers: list[Offer]
+    unchanged: bool = False
+    bytes_downloaded: int = 0
+    parse_seconds: float = 0.0
+    unchanged_sources: tuple[str, ...] = ()
+
+
+class _MeteredChunks:
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self.bytes_read = 0
+        self.wait_seconds = 0.0
+        self.digest = hashlib.sha256()
+
+    def __iter__(self) -> _MeteredChunks:
+        return self
+
+    def __next__(self) -> bytes:
+        start = time.perf_counter()
+        try:
+            chunk = next(self._chunks)
+        finally:
+            self.wait_seconds += time.perf_counter() - start
+        self.bytes_read += len(chunk)
+        self.digest.update(chunk)
+        return chunk
+
+
+def declared_encoding(content_type: str | None) -> str | None:
+    if not content_type:
+        return None
+    match = _CHARSET_RE.search(content_type)
+    if not match:
+        return None
+    return _known_codec(match.group(1))
+
+
+def sniff_encoding(head: bytes) -> str:
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    match = _META_CHARSET_RE.search(head[:_SNIFF_BYTES])
+    if match:
+        encoding = _known_codec(match.group(1).decode("ascii", "ignore"))
+        if encoding:
+            return encoding
+    return "utf-8"
+
+
+def _known_codec(name: str) -> str | None:
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
 
 
 logger = logging.getLogger(__name__)
 
 
-def _normalize_header(text: str) -> str:
-    cleaned = re.sub(r"[^\w]+", " ", text.lower())
-    return " ".join(cleaned.strip().split())
+_HEADER_MATCHER = HeaderMatcher(HEADER_ALIASES)
+_HEADER_CACHE_SIZE = 256
+_header_mappings: dict[tuple[str, ...], dict[int, str]] = {}
 
 
 def _match_headers(headers: Iterable[str]) -> dict[int, str]:
+    row = tuple(headers)
+    cached = _header_mappings.get(row)
+    if cached is not None:
+        return dict(cached)
     mapping: dict[int, str] = {}
-    normalized = [_normalize_header(header) for header in headers]
-    for idx, header in enumerate(normalized):
-        for field, aliases in HEADER_ALIASES.items():
-            normalized_aliases = {_normalize_header(alias) for alias in aliases}
-            if header in normalized_aliases or any(
-                alias and alias in header for alias in normalized_aliases
-            ):
-                mapping[idx] = field
-                break
-        if idx not in mapping:
-            logger.debug("Unmatched header: %s", headers[idx])
+    for idx, header in enumerate(row):
+        field = _HEADER_MATCHER.match(header)
+        if field is None:
+            logger.debug("Unmatched header: %s", header)
+        else:
+            mapping[idx] = field
     return mapping
 
 
+def _remember_headers(headers: Iterable[str], mapping: dict[int, str]) -> None:
+    row = tuple(headers)
+    if row in _header_mappings:
+        return
+    if len(_header_mappings) >= _HEADER_CACHE_SIZE:
+        del _header_mappings[next(iter(_header_mappings))]
+    _header_mappings[row] = dict(mapping)
+
+
+def _is_complete_mapping(mapping: dict[int, str]) -> bool:
+    return len(set(mapping.values())) == len(FIELDS)
+
+
 def _text(cell) -> str:
     return " ".join(cell.get_text(" ", strip=True).split())
 
 
-def parse_offers(html: str) -> list[dict[str, str]]:
-    soup = BeautifulSoup(html, "html.parser")
+_FIELD_POSITIONS = {field: idx for idx, field in enumerate(FIELDS)}
+
+
+def _row_to_offer(cells: list[str], mapping: dict[int, str]) -> Offer | None:
+    values = [""] * len(FIELDS)
+    for idx, value in enumerate(cells):
+        field = mapping.get(idx)
+        if field is not None:
+            values[_FIELD_POSITIONS[field]] = value
+    return Offer(*values) if any(values) else None
+
+
+def parse_offers(
+    html: str | bytes,
+    engine: str = DEFAULT_ENGINE,
+    encoding: str | None = None,
+) -> list[Offer]:
+    if engine == "stream":
+        return parse_offers_stream([html], encoding)
+    if engine == "soup":
+        return _parse_offers_soup(html, encoding)
+    raise ValueError(f"Unknown parser engine: {engine}")
+
+
+def _parse_offers_soup(html: str | bytes, encoding: str | None = None) -> list[Offer]:
+    if isinstance(html, bytes):
+        soup = BeautifulSoup(html, "html.parser", from_encoding=encoding)
+    else:
+        soup = BeautifulSoup(html, "html.parser")
     tables = soup.find_all("table")
     if not tables:
         raise OfferParseError("No tables found on the page; page structure may have changed.")
@@ -93,20 +205,36 @@ def parse_offers(html: str) -> list[dict[str, str]]:
     best_table = None
     best_mapping: dict[int, str] = {}
     best_header_row_index: int | None = None
+    complete = False
     for table in tables:
         rows = table.find_all("tr")
         if not rows:
             continue
+        has_header = False
         for idx, row in enumerate(rows):
             cells = row.find_all(["th", "td"])
             if not cells:
                 continue
+            header_like = (
+                all(cell.name == "th" for cell in cells)
+                or row.find_parent("thead") is not None
+            )
+            if has_header and not header_like:
+                continue
             headers = [_text(cell) for cell in cells]
             mapping = _match_headers(headers)
+            if mapping and header_like:
+                has_header = True
             if len(mapping) > len(best_mapping):
+                _remember_headers(headers, mapping)
                 best_mapping = mapping
                 best_table = table
                 best_header_row_index = idx
+                complete = _is_complete_mapping(mapping)
+                if complete:
+                    break
+        if complete:
+            break
 
     if not best_table or not best_mapping:
         raise OfferParseError(
@@ -116,18 +244,14 @@ def parse_offers(html: str) -> list[dict[str, str]]:
 
     rows = best_table.find_all("tr")
     start_index = (best_header_row_index or 0) + 1
-    offers: list[dict[str, str]] = []
+    offers: list[Offer] = []
     for row in rows[start_index:]:
         cells = row.find_all(["td", "th"])
         if not cells:
             continue
-        offer_data: dict[str, str] = {field: "" for field in FIELDS}
-        for idx, cell in enumerate(cells):
-            if idx not in best_mapping:
-                continue
-            offer_data[best_mapping[idx]] = _text(cell)
-        if any(offer_data.values()):
-            offers.append(offer_data)
+        offer = _row_to_offer([_text(cell) for cell in cells], best_mapping)
+        if offer:
+            offers.append(offer)
 
     if not offers:
         raise OfferParseError("Parsed table but found no offer rows.")
@@ -135,22 +259,276 @@ def parse_offers(html: str) -> list[dict[str, str]]:
     return offers
 
 
-def collect_offers(url: str, timeout_seconds: int) -> list[dict[str, str]]:
-    html = fetch_html(url, timeout_seconds)
-    return parse_offers(html)
+class _TableState:
+    __slots__ = ("row", "cell", "in_thead", "header_like", "has_header")
+
+    def __init__(self) -> None:
+        self.row: list[str] | None = None
+        self.cell: list[str] | None = None
+        self.in_thead = False
+        self.header_like = True
+        self.has_header = False
+
+    def start_row(self) -> None:
+        self.row = []
+        self.header_like = True
+
+
+class _OfferTableParser(HTMLParser):
+    _SKIP_TAGS = {"script", "style", "template"}
+
+    def __init__(self, mapping: dict[int, str] | None = None) -> None:
+        super().__init__(convert_charrefs=True)
+        self.tables_seen = 0
+        self.best_mapping: dict[int, str] = dict(mapping or {})
+        self.offers: list[Offer] = []
+        self._tables: list[_TableState] = []
+        self._best_table: _TableState | None = None
+        self._fixed = mapping is not None
+        self.locked = self._fixed
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag in self._SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if tag == "table":
+            self.tables_seen += 1
+            self._tables.append(_TableState())
+            if self._fixed and self._best_table is None:
+                self._best_table = self._tables[-1]
+            return
+        if not self._tables:
+            return
+        table = self._tables[-1]
+        if table.cell is not None:
+            table.cell.append(" ")
+        if tag == "tr":
+            self._finish_row(table)
+            table.start_row()
+        elif tag in ("td", "th"):
+            self._finish_cell(table)
+            if table.row is None:
+                table.start_row()
+            if tag == "td" and not table.in_thead:
+                table.header_like = False
+            table.cell = []
+        elif tag in ("thead", "tbody", "tfoot"):
+            self._finish_row(table)
+            table.in_thead = tag == "thead"
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self._SKIP_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+            return
+        if not self._tables:
+            return
+        table = self._tables[-1]
+        if table.cell is not None:
+            table.cell.append(" ")
+        if tag in ("td", "th"):
+            self._finish_cell(table)
+        elif tag == "tr":
+            self._finish_row(table)
+        elif tag == "thead":
+            self._finish_row(table)
+            table.in_thead = False
+        elif tag == "table":
+            self._finish_row(table)
+            self._tables.pop()
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_depth or not self._tables:
+            return
+        cell = self._tables[-1].cell
+        if cell is not None:
+            cell.append(data)
+
+    def close(self) -> None:
+        super().close()
+        while self._tables:
+            self._finish_row(self._tables.pop())
+
+    def _finish_cell(self, table: _TableState) -> None:
+        if table.cell is None:
+            return
+        if table.row is not None:
+            table.row.append(" ".join("".join(table.cell).split()))
+        table.cell = None
+
+    def _finish_row(self, table: _TableState) -> None:
+        self._finish_cell(table)
+        cells, table.row = table.row, None
+        if not cells:
+            return
+        if not self.locked and not (table.has_header and not table.header_like):
+            mapping = _match_headers(cells)
+            if mapping and table.header_like:
+                table.has_header = True
+            if len(mapping) > len(self.best_mapping):
+                _remember_headers(cells, mapping)
+                self.best_mapping = mapping
+                self._best_table = table
+                self.locked = _is_complete_mapping(mapping)
+                self.offers = []
+                return
+        if table is self._best_table:
+            offer = _row_to_offer(cells, self.best_mapping)
+            if offer:
+                self.offers.append(offer)
+
+
+def parse_table_segment(
+    data: bytes,
+    encoding: str,
+    mapping: dict[int, str] | None = None,
+) -> tuple[list[Offer], dict[int, str], bool]:
+    parser = _OfferTableParser(mapping)
+    parser.feed(data.decode(encoding, errors="replace"))
+    parser.close()
+    return parser.offers, parser.best_mapping, parser.locked
+
+
+def _decode_chunks(chunks: Iterable[str | bytes], encoding: str | None) -> Iterator[str]:
+    decoder = None
+    head = b""
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            yield chunk
+            continue
+        if decoder is None:
+            head += chunk
+            if encoding is None and len(head) < _SNIFF_BYTES:
+                continue
+            decoder = codecs.getincrementaldecoder(encoding or sniff_encoding(head))(
+                errors="replace"
+            )
+            chunk, head = head, b""
+        yield decoder.decode(chunk)
+    if decoder is None and head:
+        yield head.decode(encoding or sniff_encoding(head), errors="replace")
+    elif decoder is not None:
+        yield decoder.decode(b"", final=True)
+
+
+def iter_offers_stream(
+    chunks: Iterable[str | bytes],
+    encoding: str | None = None,
+) -> Iterator[Offer]:
+    parser = _OfferTableParser()
+    emitted = 0
+    for text in _decode_chunks(chunks, encoding):
+        parser.feed(text)
+        if parser.locked and parser.offers:
+            emitted += len(parser.offers)
+            yield from parser.offers
+            parser.offers = []
+    parser.close()
+
+    if not parser.tables_seen:
+        raise OfferParseError("No tables found on the page; page structure may have changed.")
+    if not parser.best_mapping:
+        raise OfferParseError(
+            "Unable to map table headers to expected fields; "
+            "update HEADER_ALIASES or parsing logic."
+        )
+    if not emitted and not parser.offers:
+        raise OfferParseError("Parsed table but found no offer rows.")
+    yield from parser.offers
+
+
+def parse_offers_stream(
+    chunks: Iterable[str | bytes],
+    encoding: str | None = None,
+) -> list[Offer]:
+    return list(iter_offers_stream(chunks, encoding))
+
+
+def collect_offers(
+    url: str,
+    timeout_seconds: int,
+    engine: str = DEFAULT_ENGINE,
+    cache: PageCache | None = None,
+    session: requests.Session | Transport | None = None,
+    parser: PageParser | None = None,
+) -> FetchResult:
+    if cache is not None:
+        return _collect_offers_conditional(
+            url, timeout_seconds, engine, cache, session, parser
+        )
+    http = session if session is not None else requests
+    with http.get(url, timeout=timeout_seconds, stream=True) as response:
+        response.raise_for_status()
+        encoding = declared_encoding(response.headers.get("content-type"))
+        if parser is not None or engine == "soup":
+            content = response.content
+            start = time.perf_counter()
+            if parser is not None:
+                offers = parser(content, encoding)
+            else:
+                offers = parse_offers(content, engine="soup", encoding=encoding)
+            return FetchResult(
+                offers,
+                bytes_downloaded=len(content),
+                parse_seconds=time.perf_counter() - start,
+            )
+        chunks = _MeteredChunks(response.iter_content(CHUNK_SIZE))
+        start = time.perf_counter()
+        offers = parse_offers_stream(chunks, encoding)
+        return FetchResult(
+            offers,
+            bytes_downloaded=chunks.bytes_read,
+            parse_seconds=time.perf_counter() - start - chunks.wait_seconds,
+        )
+
+
+def _collect_offers_conditional(
+    url: str,
+    timeout_seconds: int,
+    engine: str,
+    cache: PageCache,
+    session: requests.Session | Transport | None,
+    parser: PageParser | None = None,
+) -> FetchResult:
+    cached = cache.get(url)
+    headers = cached.conditional_headers() if cached else {}
+    http = session if session is not None else requests
+    with http.get(url, timeout=timeout_seconds, headers=headers, stream=True) as response:
+        if cached and response.status_code == 304:
+            logger.info("Page not modified (HTTP 304): %s", url)
+            return FetchResult([], unchanged=True, unchanged_sources=(url,))
+        response.raise_for_status()
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        encoding = declared_encoding(response.headers.get("content-type"))
+        metered = _MeteredChunks(response.iter_content(CHUNK_SIZE))
+        chunks = list(metered)
+
+    content_hash = metered.digest.hexdigest()
+    cache.put(url, CachedPage(content_hash, etag, last_modified))
+    if cached and cached.content_hash == content_hash:
+        logger.info("Page content unchanged (sha256 %s): %s", content_hash[:12], url)
+        return FetchResult(
+            [],
+            unchanged=True,
+            bytes_downloaded=metered.bytes_read,
+            unchanged_sources=(url,),
+        )
+
+    start = time.perf_counter()
+    if parser is not None:
+        offers = parser(b"".join(chunks), encoding)
+    elif engine == "soup":
+        offers = parse_offers(b"".join(chunks), engine=engine, encoding=encoding)
+    else:
+        offers = parse_offers_stream(chunks, encoding)
+    parse_seconds = time.perf_counter() - start
+    return FetchResult(offers, bytes_downloaded=metered.bytes_read, parse_seconds=parse_seconds)
 
 
-def offers_to_rows(offers: Iterable[dict[str, str]]) -> list[list[str]]:
-    rows: list[list[str]] = []
-    for offer in offers:
-        rows.append([offer.get(field, "") for field in FIELDS])
-    return rows
+def offers_to_rows(offers: list[Offer], fields: list[str] = FIELDS) -> OfferRows:
+    return OfferRows(offers, fields)
 
 
-def count_pairs(offers: Iterable[dict[str, str]]) -> dict[tuple[str, str], int]:
-    counts: dict[tuple[str, str], int] = defaultdict(int)
-    for offer in offers:
-        key = (offer.get("domain", ""), offer.get("sale", ""))
-        if any(key):
-            counts[key] += 1
-    return counts
+def count_pairs(offers: Iterable[Offer]) -> Counter[Pair]:
+    return Counter(iter_pairs(offers))
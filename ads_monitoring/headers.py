@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from collections import deque
+import re
+from typing import Iterable, Mapping
+
+_NON_WORD_RE = re.compile(r"[^\w]+")
+
+
+def normalize_header(text: str) -> str:
+    cleaned = _NON_WORD_RE.sub(" ", text.lower())
+    return " ".join(cleaned.strip().split())
+
+
+class _AliasAutomaton:
+    __slots__ = ("_goto", "_fail", "_out")
+
+    def __init__(self, patterns: Mapping[str, int]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[int | None] = [None]
+        for pattern, rank in patterns.items():
+            self._add(pattern, rank)
+        self._build()
+
+    def _add(self, pattern: str, rank: int) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(None)
+            state = next_state
+        current = self._out[state]
+        self._out[state] = rank if current is None else min(current, rank)
+
+    def _build(self) -> None:
+        queue: deque[int] = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                inherited = self._out[self._fail[next_state]]
+                own = self._out[next_state]
+                if inherited is not None and (own is None or inherited < own):
+                    self._out[next_state] = inherited
+
+    def best_rank(self, text: str) -> int | None:
+        best: int | None = None
+        state = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            rank = out[state]
+            if rank is not None and (best is None or rank < best):
+                best = rank
+                if best == 0:
+                    break
+        return best
+
+
+class HeaderMatcher:
+    def __init__(self, aliases: Mapping[str, Iterable[str]]) -> None:
+        self.fields = list(aliases)
+        patterns: dict[str, int] = {}
+        for rank, field in enumerate(self.fields):
+            for alias in aliases[field]:
+                normalized = normalize_header(alias)
+                if normalized and normalized not in patterns:
+                    patterns[normalized] = rank
+        self._automaton = _AliasAutomaton(patterns)
+        self._exact = {
+            alias: self.fields[self._automaton.best_rank(alias)]  # type: ignore[index]
+            for alias in patterns
+        }
+
+    def match(self, header: str) -> str | None:
+        normalized = normalize_header(header)
+        field = self._exact.get(normalized)
+        if field is not None:
+            return field
+        rank = self._automaton.best_rank(normalized)
+        return None if rank is None else self.fields[rank]
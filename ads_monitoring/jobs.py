@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+from pathlib import Path
+import sys
+from typing import Mapping, Sequence
+
+import requests
+
+from ads_monitoring.config import Settings, load_jobs
+from ads_monitoring.fetcher import FetchResult
+from ads_monitoring.main import Monitor, create_scheduler
+from ads_monitoring.page_cache import PageCache
+from ads_monitoring.parse_pool import ParsePool
+from ads_monitoring.sources import fetch_each, merge_results
+from ads_monitoring.transport import LatencyTracker, Transport, create_session
+
+logger = logging.getLogger(__name__)
+
+
+class JobRunner:
+    def __init__(
+        self,
+        jobs: Mapping[str, Settings],
+        state_dir: str | Path = "state",
+        max_workers: int = 4,
+        sheets_session: requests.Session | None = None,
+    ) -> None:
+        if not jobs:
+            raise ValueError("At least one job is required")
+        self.jobs = dict(jobs)
+        self.max_workers = max_workers
+        self.settings = next(iter(self.jobs.values()))
+        settings = self.settings
+        state_dir = Path(state_dir)
+        self.page_cache = PageCache(state_dir / "page_cache.json")
+        self.session = create_session(settings.max_connections_per_host)
+        self.transport = Transport(
+            self.session,
+            max_retries=settings.http_max_retries,
+            latency=LatencyTracker(state_dir / "latency.json"),
+            hedge_percentile=settings.hedge_percentile,
+        )
+        self.parse_pool = (
+            ParsePool(settings.parse_workers, settings.parser_engine, settings.parse_split_bytes)
+            if settings.parse_workers > 1
+            else None
+        )
+        self.sheets_scheduler = create_scheduler(settings)
+        self.monitors = {
+            name: Monitor(
+                job,
+                sheets_session=sheets_session,
+                sources=self._sources,
+                sheets_scheduler=self.sheets_scheduler,
+                transport=self.transport,
+            )
+            for name, job in self.jobs.items()
+        }
+        self.failed: list[str] = []
+        self._results: dict[str, FetchResult | Exception] = {}
+
+    def close(self) -> None:
+        for monitor in self.monitors.values():
+            monitor.close()
+        self.transport.close()
+        self.session.close()
+        if self.parse_pool is not None:
+            self.parse_pool.close()
+
+    def __enter__(self) -> JobRunner:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def run_cycle(self) -> dict[str, bool]:
+        settings = self.settings
+        urls = list(dict.fromkeys(url for job in self.jobs.values() for url in job.source_urls))
+        logger.info("Fetching %s distinct source(s) for %s job(s)", len(urls), len(self.jobs))
+        self._results = fetch_each(
+            urls,
+            settings.request_timeout_seconds,
+            self.transport,
+            engine=settings.parser_engine,
+            cache=self.page_cache,
+            max_workers=settings.fetch_workers,
+            per_host=settings.max_connections_per_host,
+            parser=self.parse_pool,
+        )
+        workers = max(1, min(self.max_workers, len(self.monitors)))
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job") as pool:
+                futures = {
+                    name: pool.submit(monitor.run_cycle)
+                    for name, monitor in self.monitors.items()
+                }
+        finally:
+            self._results = {}
+
+        outcomes: dict[str, bool] = {}
+        self.failed = []
+        for name, future in futures.items():
+            try:
+                outcomes[name] = future.result()
+            except Exception:
+                logger.exception("Job %s failed", name)
+                self.failed.append(name)
+        if self.failed:
+            self.page_cache.discard(
+                url for name in self.failed for url in self.jobs[name].source_urls
+            )
+        self.page_cache.save()
+        self.transport.latency.save()
+        return outcomes
+
+    def _sources(self, urls: Sequence[str]) -> FetchResult:
+        return merge_results(self._results[url] for url in dict.fromkeys(urls))
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run every monitoring job from a jobs file.")
+    parser.add_argument("config", nargs="?", default=os.getenv("JOBS_FILE", "jobs.json"))
+    parser.add_argument("--workers", type=int, help="Jobs processed in parallel.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    config = load_jobs(args.config)
+    with JobRunner(config.jobs, config.state_dir, args.workers or config.workers) as runner:
+        outcomes = runner.run_cycle()
+    for name, changed in outcomes.items():
+        logger.info("Job %s finished (changed=%s)", name, changed)
+    return 1 if runner.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
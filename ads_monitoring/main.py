@@ -1,12 +1,50 @@
 from __future__ import annotations
 
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+import cProfile
+from dataclasses import dataclass, replace
 import logging
+from pathlib import Path
+import pstats
+import sys
+import threading
+from typing import Callable, Iterable, Iterator, Sequence
 
-from ads_monitoring.compare import compare_pairs, format_comparison
-from ads_monitoring.config import load_settings
-from ads_monitoring.fetcher import collect_offers, count_pairs, offers_to_rows
+import requests
+
+from ads_monitoring.alerts import evaluate_rules, rule_fields
+from ads_monitoring.archive import SnapshotArchive
+from ads_monitoring.columns import NumericSnapshot
+from ads_monitoring.compare import (
+    Alert,
+    ComparisonResult,
+    compare_pairs,
+    diff_offers,
+    format_comparison,
+)
+from ads_monitoring.config import Settings, load_settings
+from ads_monitoring.fetcher import (
+    SHEET_FIELDS,
+    SOURCE_FIELD,
+    FetchResult,
+    collect_offers,
+    count_pairs,
+    offers_to_rows,
+)
+from ads_monitoring.metrics import RunMetrics
+from ads_monitoring.offers import Offer
+from ads_monitoring.mirror import SheetsMirror
+from ads_monitoring.page_cache import PageCache
+from ads_monitoring.parse_pool import ParsePool
+from ads_monitoring.pipeline import SKIP, Stage, run_stages
 from ads_monitoring.sheets import SheetsClient
-from ads_monitoring.telegram import send_message
+from ads_monitoring.sheets_cache import MetadataCache, TokenCache
+from ads_monitoring.sheets_quota import SheetsScheduler
+from ads_monitoring.snapshot_store import SnapshotStore
+from ads_monitoring.sources import SourceStream, collect_sources
+from ads_monitoring.telegram import TelegramSender
+from ads_monitoring.transport import LatencyTracker, Transport, create_session
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,38 +53,431 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def run() -> None:
-    settings = load_settings()
+def create_scheduler(settings: Settings) -> SheetsScheduler:
+    return SheetsScheduler(settings.sheets_reads_per_minute, settings.sheets_writes_per_minute)
 
-    logger.info("Fetching offers from %s", settings.flocktory_url)
-    offers = collect_offers(settings.flocktory_url, settings.request_timeout_seconds)
-    logger.info("Fetched %s offers", len(offers))
 
-    sheets = SheetsClient(
-        sheet_id=settings.google_sheet_id,
-        service_account_file=settings.google_service_account_file,
+def _create_mirror(
+    settings: Settings,
+    sheets_session: requests.Session | None = None,
+    scheduler: SheetsScheduler | None = None,
+) -> SheetsMirror:
+    write_mode = settings.sheets_write_mode
+    if settings.pipeline_mode == "stream":
+        write_mode = "append"
+    state_dir = Path(settings.state_dir)
+    token_cache = TokenCache(state_dir / "sheets_token.json")
+    metadata_cache = MetadataCache(
+        state_dir / "sheets_metadata.json", settings.sheets_metadata_ttl_seconds
     )
-
-    logger.info(
-        "Rotating sheets: %s -> %s",
+    return SheetsMirror(
+        lambda: SheetsClient(
+            sheet_id=settings.google_sheet_id,
+            service_account_file=settings.google_service_account_file,
+            session=sheets_session,
+            token_cache=token_cache,
+            metadata_cache=metadata_cache,
+            scheduler=scheduler,
+        ),
         settings.sheet_current_name,
         settings.sheet_previous_name,
+        write_mode=write_mode,
+        attempts=settings.sheets_mirror_attempts,
+        append_batch_rows=settings.sheets_append_batch_rows,
     )
-    previous_rows = sheets.rotate_current_to_previous(
-        settings.sheet_current_name,
-        settings.sheet_previous_name,
-    )
-    logger.info("Writing current offers to %s", settings.sheet_current_name)
-    sheets.write_current(settings.sheet_current_name, offers_to_rows(offers))
 
-    current_pairs = set(count_pairs(offers).keys())
-    previous_pairs = set(
-        (row[2], row[4]) for row in previous_rows if len(row) >= 5
-    )
-    comparison = compare_pairs(current_pairs, previous_pairs)
-    message = format_comparison(comparison)
-    logger.info("Sending Telegram notification")
-    send_message(settings.telegram_bot_token, settings.telegram_channel_id, message)
+
+@dataclass(frozen=True)
+class _Snapshot:
+    id: int
+    baseline_id: int
+    pairs: Counter[tuple[str, str]]
+    rows: Sequence[Sequence[str]] | None = None
+    existing: list[tuple[str, str]] | None = None
+
+
+class Monitor:
+    def __init__(
+        self,
+        settings: Settings,
+        sheets_session: requests.Session | None = None,
+        sources: Callable[[Sequence[str]], FetchResult] | None = None,
+        sheets_scheduler: SheetsScheduler | None = None,
+        transport: Transport | None = None,
+    ) -> None:
+        self.settings = settings
+        self.sources = sources
+        state_dir = Path(settings.state_dir)
+        self.page_cache = PageCache(state_dir / "page_cache.json") if sources is None else None
+        self._owns_transport = transport is None
+        if transport is None:
+            transport = Transport(
+                create_session(settings.max_connections_per_host),
+                max_retries=settings.http_max_retries,
+                latency=LatencyTracker(state_dir / "latency.json"),
+                hedge_percentile=settings.hedge_percentile,
+            )
+        self.transport = transport
+        self.session = transport.session
+        self.parse_pool = (
+            ParsePool(settings.parse_workers, settings.parser_engine, settings.parse_split_bytes)
+            if settings.parse_workers > 1 and sources is None
+            else None
+        )
+        self.store = SnapshotStore(state_dir / "snapshots.sqlite3")
+        self.streaming = settings.pipeline_mode == "stream"
+        self.archive = (
+            SnapshotArchive(settings.archive_path, keep_days=settings.archive_keep_days)
+            if settings.archive_path and not self.streaming
+            else None
+        )
+        self.sheets_scheduler = sheets_scheduler or create_scheduler(settings)
+        self.mirror = _create_mirror(settings, sheets_session, self.sheets_scheduler)
+        self._sheets_lock = threading.Lock()
+        self.telegram = TelegramSender(
+            settings.telegram_bot_token,
+            session=self.session,
+            timeout_seconds=settings.request_timeout_seconds,
+        )
+        self.target = f"{settings.google_sheet_id}:{settings.sheet_current_name}"
+        self.last_metrics: RunMetrics | None = None
+
+    def close(self) -> None:
+        if self._owns_transport:
+            self.transport.close()
+            self.session.close()
+        if self.parse_pool is not None:
+            self.parse_pool.close()
+        self.store.close()
+        if self.archive is not None:
+            self.archive.close()
+
+    def __enter__(self) -> Monitor:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def run_cycle(self) -> bool:
+        metrics = RunMetrics()
+        self.last_metrics = metrics
+        sheets_before = self.mirror.stats()
+        try:
+            changed = self._run_cycle(metrics)
+        except Exception:
+            metrics.status = "error"
+            if self.page_cache is not None:
+                self.page_cache.reload()
+            raise
+        else:
+            if self.page_cache is not None:
+                self.page_cache.save()
+            if self._owns_transport:
+                self.transport.latency.save()
+        finally:
+            for name, value in self.mirror.stats().items():
+                metrics.incr(name, value - sheets_before[name])
+            metrics.export(
+                self.settings.metrics_jsonl,
+                self.settings.metrics_textfile,
+                self.settings.metrics_jsonl_max_lines,
+            )
+        return changed
+
+    def _run_cycle(self, metrics: RunMetrics) -> bool:
+        if self.streaming:
+            ingest = [
+                Stage(
+                    "store",
+                    lambda baseline_id: self._stream_store(metrics, baseline_id),
+                    after=("baseline",),
+                ),
+                Stage("sheets_auth", lambda _: self._prepare_sheets(metrics), after=("store",)),
+            ]
+        else:
+            ingest = [
+                Stage("fetch", lambda: self._fetch(metrics)),
+                Stage(
+                    "store",
+                    lambda result, baseline_id: self._store(metrics, result, baseline_id),
+                    after=("fetch", "baseline"),
+                ),
+                Stage(
+                    "sheets_auth",
+                    lambda result: SKIP if result.unchanged else self._prepare_sheets(metrics),
+                    after=("fetch",),
+                ),
+            ]
+        try:
+            results = run_stages(
+                [
+                    Stage("baseline", self._load_baseline),
+                    *ingest,
+                    Stage(
+                        "sheets",
+                        lambda snapshot, _: self._mirror_snapshot(metrics, snapshot),
+                        after=("store", "sheets_auth"),
+                    ),
+                    Stage(
+                        "compare",
+                        lambda snapshot: self._compare(metrics, snapshot),
+                        after=("store",),
+                    ),
+                    Stage(
+                        "telegram",
+                        lambda snapshot, comparison: self._notify(
+                            metrics, comparison, snapshot.id
+                        ),
+                        after=("store", "compare"),
+                    ),
+                ]
+            )
+        finally:
+            self.store.prune()
+        if "store" not in results:
+            logger.info("Pages unchanged since last run; skipping Sheets and Telegram")
+            self._mirror_pending(metrics)
+            return False
+        return True
+
+    def _fetch(self, metrics: RunMetrics) -> FetchResult:
+        settings = self.settings
+        logger.info("Fetching offers from %s source(s)", len(settings.source_urls))
+        with metrics.span("fetch"):
+            if self.sources is not None:
+                result = self.sources(settings.source_urls)
+            else:
+                result = collect_sources(
+                    settings.source_urls,
+                    settings.request_timeout_seconds,
+                    self.transport,
+                    engine=settings.parser_engine,
+                    cache=self.page_cache,
+                    max_workers=settings.fetch_workers,
+                    per_host=settings.max_connections_per_host,
+                    parser=self.parse_pool,
+                )
+            if result.unchanged_sources and not result.unchanged:
+                result = self._restore_unchanged(result)
+        metrics.add_timing("parse", result.parse_seconds)
+        metrics.incr("bytes_downloaded", result.bytes_downloaded)
+        metrics.incr("rows_parsed", len(result.offers))
+        return result
+
+    def _restore_unchanged(self, result: FetchResult) -> FetchResult:
+        settings = self.settings
+        sources = list(result.unchanged_sources)
+        latest = self.store.latest()
+        stored = self.store.rows_by_source(latest.id, sources) if latest is not None else {}
+        by_source: dict[str, list[Offer]] = defaultdict(list)
+        for offer in result.offers:
+            by_source[offer[SOURCE_FIELD]].append(offer)
+        for url in sources:
+            if url in stored:
+                by_source[url] = [Offer(*row) for row in stored[url]]
+                continue
+            logger.info("No stored offers for unchanged page %s; fetching it again", url)
+            refetched = collect_offers(
+                url,
+                settings.request_timeout_seconds,
+                engine=settings.parser_engine,
+                session=self.transport,
+                parser=self.parse_pool,
+            )
+            for offer in refetched.offers:
+                offer[SOURCE_FIELD] = url
+            by_source[url] = refetched.offers
+        offers = [
+            offer for url in dict.fromkeys(settings.source_urls) for offer in by_source[url]
+        ]
+        return replace(result, offers=offers)
+
+    def _store(self, metrics: RunMetrics, result: FetchResult, baseline_id: int) -> object:
+        if result.unchanged:
+            return SKIP
+        offers = result.offers
+        logger.info("Fetched %s offers", len(offers))
+        store = self.store
+        with metrics.span("store"):
+            rows = offers_to_rows(offers, SHEET_FIELDS)
+            existing = store.mirrored_layout(self.target)
+            snapshot_id = store.save(rows)
+            self._archive(rows)
+        return _Snapshot(snapshot_id, baseline_id, count_pairs(offers), rows, existing)
+
+    def _stream_store(self, metrics: RunMetrics, baseline_id: int) -> object:
+        settings = self.settings
+        store = self.store
+        logger.info("Streaming offers from %s source(s)", len(settings.source_urls))
+        source = SourceStream(
+            settings.source_urls,
+            settings.request_timeout_seconds,
+            self.transport,
+            cache=self.page_cache,
+        )
+        with metrics.span("fetch"):
+            snapshot_id = store.save(source)
+        metrics.incr("bytes_downloaded", source.bytes_downloaded)
+        metrics.incr("rows_parsed", source.rows)
+        if source.unchanged:
+            store.discard(snapshot_id)
+            return SKIP
+        logger.info("Stored %s offers", source.rows)
+        return _Snapshot(snapshot_id, baseline_id, store.pair_counts(snapshot_id))
+
+    def _prepare_sheets(self, metrics: RunMetrics) -> None:
+        try:
+            with self._sheets_lock, metrics.span("sheets_auth"):
+                self.mirror.prepare()
+        except Exception:
+            logger.exception("Unable to prepare Google Sheets; the mirror will retry")
+
+    def _mirror_snapshot(self, metrics: RunMetrics, snapshot: _Snapshot) -> None:
+        self.store.set_mirrored(self.target, None)
+        if snapshot.rows is None:
+            self.mirror.start(self._snapshot_rows(snapshot.id))
+        else:
+            self.mirror.start(snapshot.rows, snapshot.existing)
+        self._finish_mirror(metrics, snapshot.id)
+
+    def _compare(self, metrics: RunMetrics, snapshot: _Snapshot) -> ComparisonResult:
+        store = self.store
+        baseline_id = snapshot.baseline_id
+        with metrics.span("compare"):
+            if snapshot.rows is None:
+                offer_diff = store.diff(baseline_id, snapshot.id)
+                alert_rows = store.stream_rows(snapshot.id)
+            else:
+                offer_diff = diff_offers(
+                    snapshot.rows,
+                    store.row_hashes(baseline_id),
+                    lambda keys: store.rows_by_key(baseline_id, keys),
+                )
+                alert_rows = snapshot.rows
+            return compare_pairs(
+                snapshot.pairs,
+                store.pair_counts(baseline_id),
+                offer_diff,
+                self._alerts(alert_rows, baseline_id),
+            )
+
+    def _notify(self, metrics: RunMetrics, comparison: ComparisonResult, snapshot_id: int) -> None:
+        message = format_comparison(comparison)
+        _record_diff_size(metrics, comparison)
+        logger.info("Sending Telegram notification")
+        with metrics.span("telegram"):
+            self.telegram.send_many(self.settings.telegram_chat_ids, message)
+        self.store.mark_notified(snapshot_id)
+
+    def _alerts(self, rows: Iterable[Sequence[str]], baseline_id: int) -> tuple[Alert, ...]:
+        rules = self.settings.alert_rules
+        if not rules:
+            return ()
+        fields = rule_fields(rules)
+        return evaluate_rules(
+            rules,
+            NumericSnapshot.from_rows(rows, fields),
+            NumericSnapshot.from_rows(self.store.stream_rows(baseline_id), fields),
+        )
+
+    def _snapshot_rows(
+        self,
+        snapshot_id: int,
+    ) -> list[list[str]] | Callable[[], Iterable[list[str]]]:
+        if self.streaming:
+            return lambda: self.store.stream_rows(snapshot_id)
+        return self.store.rows(snapshot_id)
+
+    def _archive(self, rows: Iterable[Iterable[str]]) -> None:
+        if self.archive is None:
+            return
+        try:
+            self.archive.append(rows)
+        except Exception:
+            logger.exception("Unable to append snapshot to archive %s", self.archive.path)
+
+    def _finish_mirror(self, metrics: RunMetrics, snapshot_id: int) -> None:
+        with metrics.span("sheets_wait"):
+            succeeded = self.mirror.wait()
+        for name, seconds in self.mirror.timings.items():
+            metrics.add_timing(name, seconds)
+        if succeeded:
+            self.store.set_mirrored(self.target, snapshot_id, self.mirror.layout)
+        else:
+            logger.error("Sheets mirror is behind; it will be retried on the next run")
+
+    def _load_baseline(self) -> int:
+        baseline = self.store.latest(notified_only=True)
+        if baseline is not None:
+            return baseline.id
+
+        logger.info("Snapshot store is empty; bootstrapping from the current sheet")
+        with self._sheets_lock:
+            client = self.mirror.client
+            sheet = client.ensure_sheet(self.mirror.current_sheet_name)
+            rows, layout = client.read_baseline(sheet)
+        baseline_id = self.store.save(rows, notified=True)
+        self.store.set_mirrored(self.target, baseline_id, layout)
+        return baseline_id
+
+    def _mirror_pending(self, metrics: RunMetrics) -> None:
+        latest = self.store.latest()
+        if latest is None or self.store.mirrored_snapshot_id(self.target) == latest.id:
+            return
+        logger.info("Retrying Sheets mirror for snapshot %s", latest.id)
+        self.mirror.start(self._snapshot_rows(latest.id))
+        self._finish_mirror(metrics, latest.id)
+
+
+def _record_diff_size(metrics: RunMetrics, comparison: ComparisonResult) -> None:
+    offer_diff = comparison.offer_diff
+    metrics.incr("diff_new_pairs", len(comparison.new_pairs))
+    metrics.incr("diff_removed_pairs", len(comparison.removed_pairs))
+    metrics.incr("diff_count_changes", len(comparison.count_changes))
+    metrics.incr("diff_added_offers", len(offer_diff.added))
+    metrics.incr("diff_removed_offers", len(offer_diff.removed))
+    metrics.incr("diff_modified_offers", len(offer_diff.modified))
+    metrics.incr("diff_alerts", len(comparison.alerts))
+
+
+@contextmanager
+def _profile_all_threads(output: str) -> Iterator[None]:
+    profilers = [cProfile.Profile()]
+    lock = threading.Lock()
+    # Before 3.12 cProfile only sees the thread that enabled it.
+    per_thread = sys.version_info < (3, 12)
+
+    def start_thread_profiler(*_) -> None:
+        profiler = cProfile.Profile()
+        with lock:
+            profilers.append(profiler)
+        profiler.enable()
+
+    if per_thread:
+        threading.setprofile(start_thread_profiler)
+    profilers[0].enable()
+    try:
+        yield
+    finally:
+        profilers[0].disable()
+        if per_thread:
+            threading.setprofile(None)
+        stats = pstats.Stats(profilers[0])
+        with lock:
+            for profiler in profilers[1:]:
+                profiler.create_stats()
+                if profiler.stats:
+                    stats.add(profiler)
+        stats.dump_stats(output)
+        logger.info("Profile written to %s (%s thread(s))", output, len(profilers))
+
+
+def run() -> None:
+    settings = load_settings()
+    output = settings.profile_output
+    profiling = _profile_all_threads(output) if output else nullcontext()
+    with profiling, Monitor(settings) as monitor:
+        monitor.run_cycle()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_PREFIX = "ads_monitoring"
+
+
+class RunMetrics:
+    def __init__(self) -> None:
+        self.started_at = datetime.now(timezone.utc)
+        self.timings: dict[str, float] = {}
+        self.counters: dict[str, float] = {}
+        self.status = "ok"
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_timing(name, time.perf_counter() - start)
+
+    def add_timing(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "started_at": self.started_at.isoformat(timespec="seconds"),
+                "status": self.status,
+                "duration_seconds": round(time.perf_counter() - self._start, 6),
+                "timings": {name: round(value, 6) for name, value in self.timings.items()},
+                "counters": dict(self.counters),
+            }
+
+    def write_jsonl(self, path: str | Path, max_lines: int = 0) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(self.to_dict(), ensure_ascii=False) + "\n")
+        if max_lines:
+            _truncate_jsonl(path, max_lines)
+
+    def write_prometheus(self, path: str | Path) -> None:
+        data = self.to_dict()
+        lines = [
+            f"# HELP {PROMETHEUS_PREFIX}_stage_seconds Duration of each run stage.",
+            f"# TYPE {PROMETHEUS_PREFIX}_stage_seconds gauge",
+        ]
+        for name, value in sorted(data["timings"].items()):
+            lines.append(f'{PROMETHEUS_PREFIX}_stage_seconds{{stage="{name}"}} {value}')
+        for name, value in sorted(data["counters"].items()):
+            metric = f"{PROMETHEUS_PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_run_duration_seconds gauge")
+        lines.append(f"{PROMETHEUS_PREFIX}_run_duration_seconds {data['duration_seconds']}")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_run_success gauge")
+        lines.append(f"{PROMETHEUS_PREFIX}_run_success {int(self.status == 'ok')}")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_last_run_timestamp_seconds gauge")
+        lines.append(
+            f"{PROMETHEUS_PREFIX}_last_run_timestamp_seconds {self.started_at.timestamp():.0f}"
+        )
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def export(
+        self,
+        jsonl_path: str | None,
+        textfile_path: str | None,
+        jsonl_max_lines: int = 0,
+    ) -> None:
+        try:
+            if jsonl_path:
+                self.write_jsonl(jsonl_path, jsonl_max_lines)
+            if textfile_path:
+                self.write_prometheus(textfile_path)
+        except OSError:
+            logger.exception("Unable to export run metrics")
+
+
+def _truncate_jsonl(path: Path, max_lines: int) -> None:
+    with path.open("rb") as handle:
+        lines = handle.readlines()
+    if len(lines) <= max_lines:
+        return
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_bytes(b"".join(lines[-max_lines:]))
+    os.replace(tmp_path, path)
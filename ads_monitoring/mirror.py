@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Iterable, Sequence
+
+from ads_monitoring.sheets import APPEND_BATCH_ROWS, SheetsClient
+
+logger = logging.getLogger(__name__)
+
+
+class SheetsMirror:
+    def __init__(
+        self,
+        client_factory: Callable[[], SheetsClient],
+        current_sheet_name: str,
+        previous_sheet_name: str,
+        write_mode: str = "diff",
+        attempts: int = 3,
+        backoff_seconds: float = 5.0,
+        append_batch_rows: int = APPEND_BATCH_ROWS,
+    ) -> None:
+        self._client_factory = client_factory
+        self._client: SheetsClient | None = None
+        self._client_lock = threading.Lock()
+        self.current_sheet_name = current_sheet_name
+        self.previous_sheet_name = previous_sheet_name
+        self.write_mode = write_mode
+        self.attempts = attempts
+        self.backoff_seconds = backoff_seconds
+        self.append_batch_rows = append_batch_rows
+        self._thread: threading.Thread | None = None
+        self._succeeded = False
+        self.layout: list[tuple[str, str]] | None = None
+        self.timings: dict[str, float] = {}
+
+    @property
+    def client(self) -> SheetsClient:
+        with self._client_lock:
+            if self._client is None:
+                self._client = self._client_factory()
+            return self._client
+
+    def prepare(self) -> None:
+        client = self.client
+        client.ensure_sheet(self.current_sheet_name)
+        client.ensure_sheet(self.previous_sheet_name)
+
+    def stats(self) -> dict[str, int]:
+        if self._client is None:
+            return {"sheets_api_calls": 0, "cells_written": 0}
+        return {
+            "sheets_api_calls": self._client.api_calls,
+            "cells_written": self._client.cells_written,
+        }
+
+    def start(
+        self,
+        rows: Sequence[Sequence[str]] | Callable[[], Iterable[Sequence[str]]],
+        existing: list[tuple[str, str]] | None = None,
+    ) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            raise RuntimeError("Sheets mirror is already running")
+        self._succeeded = False
+        self.layout = None
+        self.timings = {}
+        self._thread = threading.Thread(
+            target=self._mirror,
+            args=(rows, existing),
+            name="sheets-mirror",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        if self._thread is None:
+            return False
+        self._thread.join(timeout)
+        return not self._thread.is_alive() and self._succeeded
+
+    def _mirror(
+        self,
+        rows: Sequence[Sequence[str]] | Callable[[], Iterable[Sequence[str]]],
+        existing: list[tuple[str, str]] | None,
+    ) -> None:
+        rotated = False
+        for attempt in range(1, self.attempts + 1):
+            try:
+                if self._client is None:
+                    start = time.perf_counter()
+                    self.client
+                    self.timings["sheets_auth"] = time.perf_counter() - start
+                if not rotated:
+                    start = time.perf_counter()
+                    logger.info(
+                        "Rotating sheets: %s -> %s",
+                        self.current_sheet_name,
+                        self.previous_sheet_name,
+                    )
+                    self.client.rotate_current_to_previous(
+                        self.current_sheet_name,
+                        self.previous_sheet_name,
+                    )
+                    rotated = True
+                    self.timings["sheets_rotate"] = time.perf_counter() - start
+                start = time.perf_counter()
+                logger.info("Writing current offers to %s", self.current_sheet_name)
+                self.layout = self.client.write_current(
+                    self.current_sheet_name,
+                    rows() if callable(rows) else rows,
+                    existing=existing if attempt == 1 else None,
+                    mode=self.write_mode,
+                    batch_rows=self.append_batch_rows,
+                )
+                self.timings["sheets_write"] = time.perf_counter() - start
+            except Exception:
+                logger.exception(
+                    "Sheets mirror attempt %s/%s failed", attempt, self.attempts
+                )
+                if self._client is not None:
+                    self._client.invalidate()
+                if attempt < self.attempts:
+                    time.sleep(self.backoff_seconds * 2 ** (attempt - 1))
+            else:
+                self._succeeded = True
+                return
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+import sys
+from typing import Iterable, Iterator, Mapping, overload
+
+FIELDS = [
+    "id",
+    "site",
+    "domain",
+    "category",
+    "sale",
+    "conditions",
+    "motivationAmount",
+    "offerDuration",
+    "legalName",
+    "greenProbability",
+]
+SOURCE_FIELD = "source"
+SHEET_FIELDS = [*FIELDS, SOURCE_FIELD]
+
+INTERNED_FIELDS = frozenset(
+    {
+        "site",
+        "domain",
+        "category",
+        "sale",
+        "offerDuration",
+        "legalName",
+        "greenProbability",
+        SOURCE_FIELD,
+    }
+)
+_FIELD_SET = frozenset(SHEET_FIELDS)
+_INTERNED_POSITIONS = tuple(
+    idx for idx, field in enumerate(SHEET_FIELDS) if field in INTERNED_FIELDS
+)
+
+Pair = tuple[str, str]
+
+
+class Offer:
+    __slots__ = tuple(SHEET_FIELDS)
+
+    def __init__(self, *values: str) -> None:
+        if len(values) > len(SHEET_FIELDS):
+            raise TypeError(f"Offer takes at most {len(SHEET_FIELDS)} values")
+        padded = list(values) + [""] * (len(SHEET_FIELDS) - len(values))
+        for idx in _INTERNED_POSITIONS:
+            padded[idx] = sys.intern(padded[idx])
+        for field, value in zip(SHEET_FIELDS, padded):
+            setattr(self, field, value)
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, str]) -> Offer:
+        return cls(*(data.get(field, "") for field in SHEET_FIELDS))
+
+    @property
+    def pair(self) -> Pair:
+        return (self.domain, self.sale)
+
+    def row(self, fields: Sequence[str] = FIELDS) -> list[str]:
+        return [getattr(self, field) for field in fields]
+
+    def get(self, field: str, default: str = "") -> str:
+        if field in _FIELD_SET:
+            return getattr(self, field)
+        return default
+
+    def __getitem__(self, field: str) -> str:
+        if field not in _FIELD_SET:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __setitem__(self, field: str, value: str) -> None:
+        if field not in _FIELD_SET:
+            raise KeyError(field)
+        if field in INTERNED_FIELDS:
+            value = sys.intern(value)
+        setattr(self, field, value)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Offer):
+            return NotImplemented
+        return self.row(SHEET_FIELDS) == other.row(SHEET_FIELDS)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Offer(id={self.id!r}, domain={self.domain!r}, sale={self.sale!r})"
+
+
+class OfferRows(Sequence):
+    __slots__ = ("_offers", "_fields")
+
+    def __init__(self, offers: Sequence[Offer], fields: Sequence[str] = FIELDS) -> None:
+        self._offers = offers
+        self._fields = tuple(fields)
+
+    def __len__(self) -> int:
+        return len(self._offers)
+
+    @overload
+    def __getitem__(self, index: int) -> list[str]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[list[str]]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [offer.row(self._fields) for offer in self._offers[index]]
+        return self._offers[index].row(self._fields)
+
+    def __iter__(self) -> Iterator[list[str]]:
+        fields = self._fields
+        for offer in self._offers:
+            yield offer.row(fields)
+
+
+def iter_pairs(offers: Iterable[Offer]) -> Iterator[Pair]:
+    for offer in offers:
+        pair = offer.pair
+        if any(pair):
+            yield pair
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    content_hash: str
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_json(self) -> dict:
+        return {
+            "content_hash": self.content_hash,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> CachedPage:
+        return cls(data["content_hash"], data.get("etag"), data.get("last_modified"))
+
+
+class PageCache:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._pages: dict[str, CachedPage] = {}
+        self._saved: dict[str, CachedPage] = {}
+        self._load()
+
+    def get(self, url: str) -> CachedPage | None:
+        return self._pages.get(url)
+
+    def put(self, url: str, page: CachedPage) -> None:
+        self._pages[url] = page
+
+    def reload(self) -> None:
+        self._pages = {}
+        self._saved = {}
+        self._load()
+
+    def discard(self, urls: Iterable[str]) -> None:
+        for url in urls:
+            if url in self._saved:
+                self._pages[url] = self._saved[url]
+            else:
+                self._pages.pop(url, None)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        payload = {url: page.to_json() for url, page in self._pages.items()}
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump(payload, handle, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._saved = dict(self._pages)
+
+    def _load(self) -> None:
+        if not self.path.is_file():
+            return
+        try:
+            with self.path.open(encoding="utf-8") as handle:
+                payload = json.load(handle)
+            self._pages = {url: CachedPage.from_json(page) for url, page in payload.items()}
+        except (OSError, ValueError, TypeError, KeyError) as exc:
+            logger.warning("Ignoring unreadable page cache %s: %s", self.path, exc)
+            self._pages = {}
+        self._saved = dict(self._pages)
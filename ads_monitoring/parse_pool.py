@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+import re
+import threading
+
+from ads_monitoring.fetcher import (
+    DEFAULT_ENGINE,
+    FIELDS,
+    OfferParseError,
+    parse_offers,
+    parse_table_segment,
+    sniff_encoding,
+)
+from ads_monitoring.offers import Offer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPLIT_BYTES = 4 * 1024 * 1024
+HEAD_ROWS = 64
+_ROW_START_RE = re.compile(rb"<tr[\s>]", re.IGNORECASE)
+_TABLE_START_RE = re.compile(rb"<table[\s>]", re.IGNORECASE)
+_TABLE_TAG_RE = re.compile(rb"<(/?)table[\s>]", re.IGNORECASE)
+
+Row = tuple[str, ...]
+
+
+def _compact(offers: list[Offer]) -> list[Row]:
+    return [tuple(offer.row(FIELDS)) for offer in offers]
+
+
+def _expand(rows: list[Row]) -> list[Offer]:
+    return [Offer(*row) for row in rows]
+
+
+def _parse_page(content: bytes, encoding: str | None, engine: str) -> list[Row]:
+    return _compact(parse_offers(content, engine=engine, encoding=encoding))
+
+
+def _parse_rows(segment: bytes, encoding: str, mapping: dict[int, str]) -> list[Row]:
+    offers, _, _ = parse_table_segment(b"<table>" + segment, encoding, mapping)
+    return _compact(offers)
+
+
+def row_ranges(content: bytes, parts: int, head_rows: int = HEAD_ROWS) -> list[tuple[int, int]]:
+    starts = [match.start() for match in _ROW_START_RE.finditer(content)]
+    if parts < 2 or len(starts) <= head_rows + parts:
+        return [(0, len(content))]
+    body = starts[head_rows:]
+    step = -(-len(body) // parts)
+    bounds = [0, *(body[idx] for idx in range(0, len(body), step)), len(content)]
+    return list(zip(bounds, bounds[1:]))
+
+
+def table_spans(content: bytes) -> list[tuple[int, int]]:
+    spans: list[tuple[int, int]] = []
+    depth = 0
+    start = 0
+    for match in _TABLE_TAG_RE.finditer(content):
+        if not match.group(1):
+            if not depth:
+                start = match.start()
+            depth += 1
+        elif depth:
+            depth -= 1
+            if not depth:
+                spans.append((start, match.end()))
+    if depth:
+        spans.append((start, len(content)))
+    return spans
+
+
+def _locate_offer_table(
+    content: bytes,
+    encoding: str,
+    parts: int,
+) -> tuple[bytes, list[tuple[int, int]], list[Offer], dict[int, str]] | None:
+    best = None
+    best_mapping: dict[int, str] = {}
+    for start, end in table_spans(content):
+        table = content[start:end]
+        ranges = row_ranges(table, parts)
+        offers, mapping, locked = parse_table_segment(table[: ranges[0][1]], encoding)
+        if len(mapping) > len(best_mapping):
+            best, best_mapping = (table, ranges, offers, mapping), mapping
+            if locked:
+                break
+    if best is None or len(_TABLE_START_RE.findall(best[0])) > 1:
+        return None
+    return best
+
+
+def _splittable_encoding(content: bytes, encoding: str | None) -> str | None:
+    encoding = encoding or sniff_encoding(content[:1024])
+    try:
+        ascii_compatible = "<tr>".encode(encoding) == b"<tr>"
+    except LookupError:
+        return None
+    return encoding if ascii_compatible else None
+
+
+def _start_pool(workers: int) -> Executor | None:
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    try:
+        return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    except (OSError, NotImplementedError, ValueError) as exc:
+        logger.warning("Process pool unavailable (%s); parsing serially", exc)
+        return None
+
+
+class ParsePool:
+    def __init__(
+        self,
+        workers: int,
+        engine: str = DEFAULT_ENGINE,
+        split_bytes: int = DEFAULT_SPLIT_BYTES,
+    ) -> None:
+        self.workers = workers
+        self.engine = engine
+        self.split_bytes = split_bytes
+        self._executor = _start_pool(workers) if workers > 1 else None
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> ParsePool:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __call__(self, content: bytes, encoding: str | None = None) -> list[Offer]:
+        executor = self._executor
+        if executor is None:
+            return parse_offers(content, engine=self.engine, encoding=encoding)
+        try:
+            return self._parse_parallel(executor, content, encoding)
+        except BrokenProcessPool:
+            logger.exception("Parse worker pool crashed; parsing serially from now on")
+            with self._lock:
+                self._executor = None
+            return parse_offers(content, engine=self.engine, encoding=encoding)
+
+    def _parse_parallel(
+        self,
+        executor: Executor,
+        content: bytes,
+        encoding: str | None,
+    ) -> list[Offer]:
+        parts = min(self.workers, len(content) // max(self.split_bytes, 1))
+        segment_encoding = _splittable_encoding(content, encoding) if parts > 1 else None
+        located = segment_encoding and _locate_offer_table(content, segment_encoding, parts)
+        if located and len(located[1]) > 1:
+            table, ranges, offers, mapping = located
+            futures = [
+                executor.submit(_parse_rows, table[start:end], segment_encoding, mapping)
+                for start, end in ranges[1:]
+            ]
+            for future in futures:
+                offers.extend(_expand(future.result()))
+            if not offers:
+                raise OfferParseError("Parsed table but found no offer rows.")
+            return offers
+        return _expand(executor.submit(_parse_page, content, encoding, self.engine).result())
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+import logging
+from typing import Any, Callable, Sequence
+
+logger = logging.getLogger(__name__)
+
+SKIP = object()
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    run: Callable[..., Any]
+    after: tuple[str, ...] = ()
+
+
+def stage_order(stages: Sequence[Stage]) -> list[str]:
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError("Stage names must be unique")
+    remaining = {stage.name: set(stage.after) for stage in stages}
+    for name, after in remaining.items():
+        unknown = after - remaining.keys()
+        if unknown:
+            missing = ", ".join(sorted(unknown))
+            raise ValueError(f"Stage {name} depends on unknown stage(s): {missing}")
+    order: list[str] = []
+    while remaining:
+        ready = [name for name, after in remaining.items() if after <= set(order)]
+        if not ready:
+            raise ValueError(f"Stages form a cycle: {', '.join(sorted(remaining))}")
+        order.extend(ready)
+        for name in ready:
+            del remaining[name]
+    return order
+
+
+def run_stages(stages: Sequence[Stage]) -> dict[str, Any]:
+    stage_order(stages)
+    by_name = {stage.name: stage for stage in stages}
+    results: dict[str, Any] = {}
+    skipped: set[str] = set()
+    errors: list[BaseException] = []
+    running: dict[Future, str] = {}
+
+    with ThreadPoolExecutor(max_workers=len(stages), thread_name_prefix="stage") as pool:
+        while True:
+            for name, stage in by_name.items():
+                if name in results or name in skipped or name in running.values():
+                    continue
+                if any(dep in skipped for dep in stage.after):
+                    skipped.add(name)
+                    logger.debug("Skipping stage %s", name)
+                    continue
+                if all(dep in results for dep in stage.after):
+                    args = [results[dep] for dep in stage.after]
+                    running[pool.submit(stage.run, *args)] = name
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    logger.error("Stage %s failed: %s", name, exc)
+                    errors.append(exc)
+                    skipped.add(name)
+                else:
+                    if result is SKIP:
+                        skipped.add(name)
+                    else:
+                        results[name] = result
+    if errors:
+        raise errors[0]
+    return results
@@ -0,0 +1,661 @@
+from __future__ import annotations
+
+import argparse
+from dataclasses import asdict, dataclass, field, replace
+import hashlib
+from http import HTTPStatus
+import io
+import json
+import logging
+from pathlib import Path
+import re
+import sys
+import tempfile
+import threading
+import time
+from typing import Mapping
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3 import HTTPResponse
+
+from ads_monitoring.config import Settings, load_settings
+from ads_monitoring.fetcher import SHEET_FIELDS
+from ads_monitoring.main import Monitor
+from ads_monitoring.telegram import API_BASE
+
+logger = logging.getLogger(__name__)
+
+SHEETS_API_BASE = "https://sheets.googleapis.com/v4/spreadsheets/"
+_CELL_RE = re.compile(r"^([A-Za-z]*)(\d*)$")
+
+
+@dataclass
+class Recording:
+    pages: dict[str, str] = field(default_factory=dict)
+    sheets: dict[str, list[list[str]]] = field(default_factory=dict)
+    messages: list[dict[str, str]] = field(default_factory=list)
+
+    def save(self, path: str | Path) -> None:
+        with Path(path).open("w", encoding="utf-8") as handle:
+            json.dump(asdict(self), handle, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str | Path) -> Recording:
+        with Path(path).open(encoding="utf-8") as handle:
+            return cls(**json.load(handle))
+
+
+class FakeService(BaseAdapter):
+    def __init__(
+        self,
+        latency_seconds: float = 0.0,
+        quota_every: int = 0,
+        retry_after: float = 1.0,
+    ) -> None:
+        super().__init__()
+        self.latency_seconds = latency_seconds
+        self.quota_every = quota_every
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.quota_errors = 0
+        self._lock = threading.Lock()
+        self._builder = HTTPAdapter()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        with self._lock:
+            self.request_count += 1
+            throttled = self.quota_every and self.request_count % self.quota_every == 0
+            if throttled:
+                self.quota_errors += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        if throttled:
+            status, headers, body = self.quota_error()
+        else:
+            with self._lock:
+                status, headers, body = self.handle(request)
+        raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers=headers,
+            status=status,
+            reason=HTTPStatus(status).phrase,
+            preload_content=False,
+        )
+        return self._builder.build_response(request, raw)
+
+    def close(self) -> None:
+        pass
+
+    def handle(self, request: requests.PreparedRequest) -> tuple[int, dict[str, str], bytes]:
+        raise NotImplementedError
+
+    def quota_error(self) -> tuple[int, dict[str, str], bytes]:
+        return _json_reply({"error": "Too Many Requests"}, 429, self.retry_after)
+
+
+class FakePages(FakeService):
+    def __init__(self, pages: Mapping[str, str | bytes], **options) -> None:
+        super().__init__(**options)
+        self.set_pages(pages)
+
+    def set_pages(self, pages: Mapping[str, str | bytes]) -> None:
+        with self._lock:
+            self.pages = {
+                url: body.encode("utf-8") if isinstance(body, str) else body
+                for url, body in pages.items()
+            }
+
+    def handle(self, request):
+        body = self.pages.get(request.url)
+        if request.method != "GET" or body is None:
+            return 404, {"Content-Type": "text/plain"}, b"not found"
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        if request.headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"Content-Type": "text/html; charset=utf-8", "ETag": etag}, body
+
+
+class FakeTelegram(FakeService):
+    def __init__(self, **options) -> None:
+        super().__init__(**options)
+        self.messages: list[dict[str, str]] = []
+
+    def handle(self, request):
+        if request.method != "POST" or not urlsplit(request.url).path.endswith("/sendMessage"):
+            return _json_reply({"ok": False, "error_code": 404}, 404)
+        payload = json.loads(request.body)
+        self.messages.append({"chat_id": str(payload["chat_id"]), "text": payload["text"]})
+        return _json_reply({"ok": True, "result": {"message_id": len(self.messages)}})
+
+    def quota_error(self):
+        return _json_reply(
+            {
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after:g}",
+                "parameters": {"retry_after": self.retry_after},
+            },
+            429,
+        )
+
+
+class _FakeWorksheet:
+    def __init__(self, sheet_id: int, title: str, rows: int, cols: int) -> None:
+        self.sheet_id = sheet_id
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self.grid: list[list[str]] = [[] for _ in range(rows)]
+        self.hidden_columns: set[int] = set()
+
+    def properties(self, index: int) -> dict:
+        return {
+            "sheetId": self.sheet_id,
+            "title": self.title,
+            "index": index,
+            "sheetType": "GRID",
+            "gridProperties": {"rowCount": self.row_count, "columnCount": self.col_count},
+        }
+
+    def resize(self, rows: int | None = None, cols: int | None = None) -> None:
+        if rows is not None:
+            self.grid = self.grid[:rows] + [[] for _ in range(rows - len(self.grid))]
+            self.row_count = rows
+        if cols is not None:
+            self.grid = [row[:cols] for row in self.grid]
+            self.col_count = cols
+
+    def write(self, row: int, col: int, values: list[list]) -> None:
+        width = max((len(line) for line in values), default=0)
+        if row + len(values) - 1 > self.row_count or col + width - 1 > self.col_count:
+            raise _SheetsError(400, f"Range exceeds grid limits of {self.title}")
+        for offset, line in enumerate(values):
+            target = self.grid[row - 1 + offset]
+            if len(target) < col - 1 + len(line):
+                target.extend([""] * (col - 1 + len(line) - len(target)))
+            target[col - 1 : col - 1 + len(line)] = ["" if v is None else str(v) for v in line]
+
+    def read(self, r1: int, c1: int, r2: int, c2: int) -> list[list[str]]:
+        values = [row[c1 - 1 : c2] for row in self.grid[r1 - 1 : r2]]
+        for row in values:
+            while row and row[-1] == "":
+                row.pop()
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def read_columns(self, r1: int, c1: int, r2: int, c2: int) -> list[list[str]]:
+        rows = self.grid[r1 - 1 : r2]
+        columns = [
+            [row[col - 1] if col - 1 < len(row) else "" for row in rows]
+            for col in range(c1, c2 + 1)
+        ]
+        for column in columns:
+            while column and column[-1] == "":
+                column.pop()
+        while columns and not columns[-1]:
+            columns.pop()
+        return columns
+
+    def clear(self, r1: int, c1: int, r2: int, c2: int) -> None:
+        for row in self.grid[r1 - 1 : r2]:
+            for idx in range(c1 - 1, min(c2, len(row))):
+                row[idx] = ""
+
+    def last_row(self) -> int:
+        for idx in range(len(self.grid), 0, -1):
+            if any(self.grid[idx - 1]):
+                return idx
+        return 0
+
+
+class _SheetsError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class FakeSheets(FakeService):
+    def __init__(
+        self,
+        spreadsheet_id: str = "replay",
+        sheets: Mapping[str, list[list[str]]] | None = None,
+        **options,
+    ) -> None:
+        super().__init__(**options)
+        self.spreadsheet_id = spreadsheet_id
+        self.worksheets: list[_FakeWorksheet] = []
+        self.cells_read = 0
+        self.cells_written = 0
+        for title, values in (sheets or {}).items():
+            width = max([len(SHEET_FIELDS), *(len(row) for row in values)])
+            self._add(title, max(len(values), 1), width).write(1, 1, values)
+
+    def session(self) -> requests.Session:
+        session = requests.Session()
+        session.mount(SHEETS_API_BASE, self)
+        return session
+
+    def values(self, title: str) -> list[list[str]]:
+        sheet = self._by_title(title)
+        return sheet.read(1, 1, sheet.row_count, sheet.col_count)
+
+    def quota_error(self):
+        return _json_reply(
+            {
+                "error": {
+                    "code": 429,
+                    "message": "Quota exceeded for quota metric 'Write requests'",
+                    "status": "RESOURCE_EXHAUSTED",
+                }
+            },
+            429,
+        )
+
+    def handle(self, request):
+        path = unquote(urlsplit(request.url).path)
+        prefix = f"/v4/spreadsheets/{self.spreadsheet_id}"
+        if not path.startswith(prefix):
+            return self._error(404, "Requested entity was not found.")
+        action = path[len(prefix) :]
+        body = json.loads(request.body) if request.body else {}
+        try:
+            if action == "" and request.method == "GET":
+                return _json_reply(self._metadata())
+            if action == ":batchUpdate":
+                return _json_reply(self._batch_update(body))
+            if action == "/values:batchUpdate":
+                for item in body.get("data", []):
+                    self._write_range(item["range"], item["values"])
+                return _json_reply({"spreadsheetId": self.spreadsheet_id})
+            query = parse_qs(urlsplit(request.url).query)
+            major = query.get("majorDimension", ["ROWS"])[0]
+            if action == "/values:batchGet":
+                return _json_reply(
+                    {
+                        "spreadsheetId": self.spreadsheet_id,
+                        "valueRanges": [
+                            self._get_range(name, major) for name in query.get("ranges", [])
+                        ],
+                    }
+                )
+            if action.startswith("/values/"):
+                return _json_reply(self._values(request.method, action[8:], body, major))
+        except _SheetsError as exc:
+            return self._error(exc.status, str(exc))
+        return self._error(400, f"Unsupported request {request.method} {action}")
+
+    def _values(self, method: str, target: str, body: dict, major: str = "ROWS") -> dict:
+        if target.endswith(":clear"):
+            sheet, (r1, c1, r2, c2) = self._resolve(target[: -len(":clear")])
+            sheet.clear(r1, c1, r2, c2)
+            return {"spreadsheetId": self.spreadsheet_id}
+        if target.endswith(":append"):
+            sheet, _ = self._resolve(target[: -len(":append")])
+            values = body.get("values", [])
+            start = sheet.last_row() + 1
+            if start + len(values) - 1 > sheet.row_count:
+                sheet.resize(rows=start + len(values) - 1)
+            sheet.write(start, 1, values)
+            self.cells_written += sum(len(line) for line in values)
+            return {"spreadsheetId": self.spreadsheet_id, "updates": {"updatedRows": len(values)}}
+        if method == "PUT":
+            self._write_range(target, body.get("values", []))
+            return {"spreadsheetId": self.spreadsheet_id}
+        return self._get_range(target, major)
+
+    def _get_range(self, name: str, major: str = "ROWS") -> dict:
+        sheet, (r1, c1, r2, c2) = self._resolve(name)
+        reply = {"range": name, "majorDimension": major}
+        values = sheet.read(r1, c1, r2, c2)
+        if major == "COLUMNS":
+            values = sheet.read_columns(r1, c1, r2, c2)
+        self.cells_read += sum(len(line) for line in values)
+        if values:
+            reply["values"] = values
+        return reply
+
+    def _write_range(self, name: str, values: list[list]) -> None:
+        sheet, (row, col, _, _) = self._resolve(name)
+        sheet.write(row, col, values)
+        self.cells_written += sum(len(line) for line in values)
+
+    def _batch_update(self, body: dict) -> dict:
+        replies: list[dict] = []
+        for item in body.get("requests", []):
+            (kind, payload), = item.items()
+            if kind == "addSheet":
+                properties = payload.get("properties", {})
+                grid = properties.get("gridProperties", {})
+                sheet = self._add(
+                    properties["title"],
+                    grid.get("rowCount", 1000),
+                    grid.get("columnCount", 26),
+                )
+                index = len(self.worksheets) - 1
+                replies.append({"addSheet": {"properties": sheet.properties(index)}})
+                continue
+            if kind == "updateSheetProperties":
+                properties = payload["properties"]
+                sheet = self._by_id(properties["sheetId"])
+                grid = properties.get("gridProperties", {})
+                sheet.resize(grid.get("rowCount"), grid.get("columnCount"))
+                if "title" in properties:
+                    sheet.title = properties["title"]
+            elif kind == "updateDimensionProperties":
+                grid_range = payload["range"]
+                sheet = self._by_id(grid_range["sheetId"])
+                if grid_range["dimension"] == "COLUMNS":
+                    columns = range(grid_range["startIndex"], grid_range["endIndex"])
+                    if payload["properties"].get("hiddenByUser"):
+                        sheet.hidden_columns.update(columns)
+                    else:
+                        sheet.hidden_columns.difference_update(columns)
+            elif kind == "copyPaste":
+                source = self._by_id(payload["source"]["sheetId"])
+                target = self._by_id(payload["destination"]["sheetId"])
+                values = source.read(1, 1, source.row_count, source.col_count)
+                target.clear(1, 1, target.row_count, target.col_count)
+                target.write(1, 1, values)
+            else:
+                raise _SheetsError(400, f"Unsupported batchUpdate request {kind}")
+            replies.append({})
+        return {"spreadsheetId": self.spreadsheet_id, "replies": replies}
+
+    def _metadata(self) -> dict:
+        return {
+            "spreadsheetId": self.spreadsheet_id,
+            "properties": {"title": "replay", "locale": "ru_RU", "timeZone": "Europe/Moscow"},
+            "sheets": [
+                {"properties": sheet.properties(index)}
+                for index, sheet in enumerate(self.worksheets)
+            ],
+        }
+
+    def _add(self, title: str, rows: int, cols: int) -> _FakeWorksheet:
+        if any(sheet.title == title for sheet in self.worksheets):
+            raise _SheetsError(400, f'A sheet with the name "{title}" already exists.')
+        sheet_id = max((sheet.sheet_id for sheet in self.worksheets), default=0) + 1
+        sheet = _FakeWorksheet(sheet_id, title, rows, cols)
+        self.worksheets.append(sheet)
+        return sheet
+
+    def _by_id(self, sheet_id: int) -> _FakeWorksheet:
+        for sheet in self.worksheets:
+            if sheet.sheet_id == sheet_id:
+                return sheet
+        raise _SheetsError(400, f"No grid with id: {sheet_id}")
+
+    def _by_title(self, title: str) -> _FakeWorksheet:
+        for sheet in self.worksheets:
+            if sheet.title == title:
+                return sheet
+        raise _SheetsError(400, f"Unable to parse range: {title}")
+
+    def _resolve(self, name: str) -> tuple[_FakeWorksheet, tuple[int, int, int, int]]:
+        title, _, cells = name.rpartition("!")
+        if not title:
+            if any(sheet.title == cells.strip("'") for sheet in self.worksheets):
+                title, cells = cells, ""
+            else:
+                title = self.worksheets[0].title if self.worksheets else ""
+        if title.startswith("'") and title.endswith("'"):
+            title = title[1:-1].replace("''", "'")
+        sheet = self._by_title(title)
+        return sheet, _parse_cells(cells, sheet.row_count, sheet.col_count)
+
+    def _error(self, status: int, message: str):
+        return _json_reply(
+            {"error": {"code": status, "message": message, "status": HTTPStatus(status).name}},
+            status,
+        )
+
+
+def _parse_cells(cells: str, rows: int, cols: int) -> tuple[int, int, int, int]:
+    if not cells:
+        return 1, 1, rows, cols
+    start, _, end = cells.partition(":")
+    c1, r1 = _parse_cell(start)
+    c2, r2 = _parse_cell(end) if end else (c1, r1)
+    if not end and c1 and r1:
+        return r1, c1, r1, c1
+    return r1 or 1, c1 or 1, r2 or rows, c2 or cols
+
+
+def _parse_cell(cell: str) -> tuple[int, int]:
+    match = _CELL_RE.match(cell.strip())
+    if not match:
+        raise _SheetsError(400, f"Unable to parse range: {cell}")
+    letters, digits = match.groups()
+    col = 0
+    for letter in letters.upper():
+        col = col * 26 + ord(letter) - ord("A") + 1
+    return col, int(digits) if digits else 0
+
+
+def _json_reply(
+    payload: dict,
+    status: int = 200,
+    retry_after: float | None = None,
+) -> tuple[int, dict[str, str], bytes]:
+    headers = {"Content-Type": "application/json; charset=UTF-8"}
+    if retry_after is not None:
+        headers["Retry-After"] = f"{retry_after:g}"
+    return status, headers, json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+class RecordingAdapter(HTTPAdapter):
+    def __init__(self, recording: Recording, page_urls: set[str], **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.recording = recording
+        self.page_urls = page_urls
+
+    def send(self, request, *args, **kwargs):
+        if request.url in self.page_urls:
+            request.headers.pop("If-None-Match", None)
+            request.headers.pop("If-Modified-Since", None)
+        response = super().send(request, *args, **kwargs)
+        if request.url in self.page_urls and response.ok:
+            self.recording.pages[request.url] = response.text
+        elif request.method == "POST" and request.url.endswith("/sendMessage"):
+            payload = json.loads(request.body)
+            self.recording.messages.append(
+                {"chat_id": str(payload["chat_id"]), "text": payload["text"]}
+            )
+        return response
+
+
+def record(settings: Settings, sheets_session: requests.Session | None = None) -> Recording:
+    recording = Recording()
+    with Monitor(settings, sheets_session=sheets_session) as monitor:
+        pool_size = settings.max_connections_per_host
+        adapter = RecordingAdapter(
+            recording,
+            set(settings.source_urls),
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+        )
+        monitor.session.mount("https://", adapter)
+        monitor.session.mount("http://", adapter)
+        client = monitor.mirror.client
+        for title in (settings.sheet_current_name, settings.sheet_previous_name):
+            sheet = client.ensure_sheet(title)
+            recording.sheets[title] = [SHEET_FIELDS, *client.read_rows(sheet)]
+        monitor.run_cycle()
+    return recording
+
+
+@dataclass(frozen=True)
+class ReplayReport:
+    cycles: int
+    seconds: float
+    rows: int
+    messages: int
+    page_requests: int
+    sheets_requests: int
+    telegram_requests: int
+    quota_errors: int
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def replay(
+    page_sets: list[dict[str, str]],
+    sheets: Mapping[str, list[list[str]]] | None = None,
+    chat_ids: tuple[str, ...] = ("replay",),
+    cycles: int = 1,
+    latency_seconds: float = 0.0,
+    quota_every: int = 0,
+    retry_after: float = 1.0,
+    telegram_interval: float | None = None,
+    state_dir: str | Path | None = None,
+    pipeline_mode: str = "batch",
+    fake_sheets: FakeSheets | None = None,
+    fake_telegram: FakeTelegram | None = None,
+) -> ReplayReport:
+    options = {
+        "latency_seconds": latency_seconds,
+        "quota_every": quota_every,
+        "retry_after": retry_after,
+    }
+    pages = FakePages(page_sets[0], **options)
+    if fake_sheets is None:
+        fake_sheets = FakeSheets(sheets=sheets, **options)
+    telegram = fake_telegram if fake_telegram is not None else FakeTelegram(**options)
+    urls = tuple(page_sets[0])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = Settings(
+            flocktory_url=urls[0],
+            flocktory_urls=urls,
+            google_sheet_id=fake_sheets.spreadsheet_id,
+            google_service_account_file="",
+            sheet_current_name="current",
+            sheet_previous_name="previous",
+            telegram_bot_token="replay",
+            telegram_channel_id=",".join(chat_ids),
+            request_timeout_seconds=30,
+            state_dir=str(state_dir or tmp),
+            pipeline_mode=pipeline_mode,
+            sheets_reads_per_minute=0,
+            sheets_writes_per_minute=0,
+        )
+        rows = 0
+        start = time.perf_counter()
+        with Monitor(settings, sheets_session=fake_sheets.session()) as monitor:
+            monitor.session.mount(API_BASE + "/", telegram)
+            monitor.mirror.backoff_seconds = retry_after
+            monitor.sheets_scheduler.backoff_seconds = retry_after
+            if telegram_interval is not None:
+                monitor.telegram.limiter.min_interval = telegram_interval
+            for url in {_origin(url) for url in urls}:
+                monitor.session.mount(url, pages)
+            for cycle in range(cycles):
+                pages.set_pages(page_sets[cycle % len(page_sets)])
+                monitor.run_cycle()
+                rows += int(monitor.last_metrics.counters.get("rows_parsed", 0))
+        seconds = time.perf_counter() - start
+
+    return ReplayReport(
+        cycles=cycles,
+        seconds=seconds,
+        rows=rows,
+        messages=len(telegram.messages),
+        page_requests=pages.request_count,
+        sheets_requests=fake_sheets.request_count,
+        telegram_requests=telegram.request_count,
+        quota_errors=pages.quota_errors + fake_sheets.quota_errors + telegram.quota_errors,
+    )
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+def _synthetic_pages(rows: int, cycles: int) -> list[dict[str, str]]:
+    from benchmarks.generator import generate_page
+
+    url = "https://replay.invalid/offers"
+    return [{url: generate_page(rows, seed=cycle)} for cycle in range(cycles)]
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Record live runs or replay them offline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    recorder = commands.add_parser("record", help="Run one live cycle and save its inputs.")
+    recorder.add_argument("output", type=Path)
+
+    player = commands.add_parser("replay", help="Replay recordings against in-process fakes.")
+    player.add_argument("recordings", nargs="*", type=Path)
+    player.add_argument("--synthetic-rows", type=int, default=0)
+    player.add_argument("--cycles", type=int, default=1)
+    player.add_argument("--latency", type=float, default=0.0, help="Seconds per fake request.")
+    player.add_argument(
+        "--quota-every",
+        type=int,
+        default=0,
+        help="Answer every Nth request with 429.",
+    )
+    player.add_argument("--retry-after", type=float, default=1.0)
+    player.add_argument(
+        "--telegram-interval",
+        type=float,
+        help="Override the per-chat Telegram send interval in seconds.",
+    )
+    player.add_argument("--pipeline-mode", choices=("batch", "stream"), default="batch")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    if args.command == "record":
+        settings = replace(load_settings(), metrics_jsonl=None, metrics_textfile=None)
+        recording = record(settings)
+        recording.save(args.output)
+        logger.info(
+            "Recorded %s page(s), %s sheet(s), %s message(s) to %s",
+            len(recording.pages),
+            len(recording.sheets),
+            len(recording.messages),
+            args.output,
+        )
+        return 0
+
+    recordings = [Recording.load(path) for path in args.recordings]
+    if args.synthetic_rows:
+        page_sets = _synthetic_pages(args.synthetic_rows, args.cycles)
+    elif recordings:
+        page_sets = [recording.pages for recording in recordings]
+    else:
+        print("Pass recordings or --synthetic-rows", file=sys.stderr)
+        return 2
+    chat_ids = tuple(
+        dict.fromkeys(
+            message["chat_id"] for recording in recordings for message in recording.messages
+        )
+    )
+    report = replay(
+        page_sets,
+        sheets=recordings[0].sheets if recordings else None,
+        chat_ids=chat_ids or ("replay",),
+        cycles=args.cycles,
+        latency_seconds=args.latency,
+        quota_every=args.quota_every,
+        retry_after=args.retry_after,
+        telegram_interval=args.telegram_interval,
+        pipeline_mode=args.pipeline_mode,
+    )
+    for name, value in asdict(report).items():
+        print(f"{name:<18} {value}")
+    print(f"{'rows_per_second':<18} {report.rows_per_second:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable
+
+
+@dataclass(frozen=True)
+class RowSyncPlan:
+    row_count: int
+    width: int
+    updates: dict[int, list[str]] = field(default_factory=dict)
+    order: tuple[int, ...] = ()
+
+    @property
+    def changed_rows(self) -> int:
+        return len(self.updates)
+
+    def ranges(self) -> list[tuple[int, list[list[str]]]]:
+        blocks: list[tuple[int, list[list[str]]]] = []
+        for position in sorted(self.updates):
+            if blocks and blocks[-1][0] + len(blocks[-1][1]) == position:
+                blocks[-1][1].append(self.updates[position])
+            else:
+                blocks.append((position, [self.updates[position]]))
+        return blocks
+
+
+def _pad(row: Iterable[str], width: int) -> list[str]:
+    values = [str(value) for value in row][:width]
+    values.extend([""] * (width - len(values)))
+    return values
+
+
+def _occurrences(keys: Iterable[str]) -> list[tuple[str, int]]:
+    seen: dict[str, int] = defaultdict(int)
+    occurrences: list[tuple[str, int]] = []
+    for key in keys:
+        occurrences.append((key, seen[key]))
+        seen[key] += 1
+    return occurrences
+
+
+def plan_signature_sync(
+    existing: Iterable[tuple[str, str]],
+    new_rows: Iterable[Iterable[str]],
+    width: int,
+    key_index: int = 0,
+    signature_index: int = -1,
+) -> RowSyncPlan:
+    existing = list(existing)
+    incoming = [_pad(row, width) for row in new_rows]
+    row_count = len(incoming)
+    existing_positions = {
+        key: position for position, key in enumerate(_occurrences(key for key, _ in existing))
+    }
+    layout: dict[int, int | None] = {}
+    pending: list[int] = []
+    for index, key in enumerate(_occurrences(row[key_index] for row in incoming)):
+        position = existing_positions.get(key)
+        if position is not None and position < row_count:
+            layout[position] = index
+        else:
+            pending.append(index)
+
+    free_positions = (position for position in range(row_count) if position not in layout)
+    for position, index in zip(free_positions, pending):
+        layout[position] = index
+
+    for position in range(row_count, len(existing)):
+        layout[position] = None
+
+    blank = [""] * width
+    updates: dict[int, list[str]] = {}
+    for position, index in layout.items():
+        signature = "" if index is None else incoming[index][signature_index]
+        if position >= len(existing) or existing[position][1] != signature:
+            updates[position] = blank if index is None else incoming[index]
+    return RowSyncPlan(
+        row_count=row_count,
+        width=width,
+        updates=updates,
+        order=tuple(layout[position] for position in range(row_count)),
+    )
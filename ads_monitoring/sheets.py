@@ -1,59 +1,410 @@
 from __future__ import annotations
 
+from itertools import islice
 from typing import Iterable
 
+import logging
+import threading
+import time
+
 import gspread
+from google.auth.transport.requests import AuthorizedSession, Request
 from google.oauth2.service_account import Credentials
+from gspread.http_client import HTTPClient
+from gspread.urls import SPREADSHEET_BATCH_UPDATE_URL, SPREADSHEET_VALUES_BATCH_UPDATE_URL
+from gspread.utils import rowcol_to_a1
+import requests
+
+from ads_monitoring.compare import row_fingerprint
+from ads_monitoring.fetcher import SHEET_FIELDS
+from ads_monitoring.row_sync import plan_signature_sync
+from ads_monitoring.sheets_cache import MetadataCache, TokenCache
+from ads_monitoring.sheets_quota import SheetsScheduler, request_kind
+
+FINGERPRINT_HEADER = "fingerprint"
+SHEET_HEADERS = [*SHEET_FIELDS, FINGERPRINT_HEADER]
+WRITE_MODES = ("diff", "overwrite", "append")
+APPEND_BATCH_ROWS = 5000
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+
+logger = logging.getLogger(__name__)
+
+
+class CountingHTTPClient(HTTPClient):
+    scheduler: SheetsScheduler | None = None
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+
+    def request(self, method: str, endpoint: str, *args, **kwargs):
+        if self.scheduler is None:
+            return self._send(method, endpoint, *args, **kwargs)
+        return self.scheduler.call(
+            request_kind(method),
+            lambda: self._send(method, endpoint, *args, **kwargs),
+        )
+
+    def batch_update(self, id: str, body):
+        return self._coalesced(SPREADSHEET_BATCH_UPDATE_URL % id, body)
+
+    def values_batch_update(self, id: str, body=None):
+        return self._coalesced(SPREADSHEET_VALUES_BATCH_UPDATE_URL % id, body)
+
+    def _coalesced(self, url: str, body):
+        if self.scheduler is None:
+            return self._send("post", url, json=body).json()
+        return self.scheduler.coalesce(
+            url, body, lambda merged: self._send("post", url, json=merged).json()
+        )
+
+    def _send(self, *args, **kwargs):
+        with self._count_lock:
+            self.request_count += 1
+        return super().request(*args, **kwargs)
+
 
-from ads_monitoring.fetcher import FIELDS
+def authorized_session(
+    service_account_file: str | None,
+    token_cache: TokenCache | None = None,
+) -> AuthorizedSession:
+    if not service_account_file:
+        raise ValueError("A service account file is required without a session")
+    credentials = Credentials.from_service_account_file(service_account_file, scopes=SCOPES)
+    if token_cache is not None and not token_cache.apply(credentials):
+        credentials.refresh(Request())
+        token_cache.store(credentials)
+    return AuthorizedSession(credentials)
+
+
+class _CachedSpreadsheet(gspread.Spreadsheet):
+    def __init__(self, http_client: HTTPClient, properties: dict) -> None:
+        self.client = http_client
+        self._properties = properties
 
 
 class SheetsClient:
-    def __init__(self, sheet_id: str, service_account_file: str) -> None:
-        scopes = [
-            "https://www.googleapis.com/auth/spreadsheets",
-            "https://www.googleapis.com/auth/drive",
-        ]
-        credentials = Credentials.from_service_account_file(
-            service_account_file,
-            scopes=scopes,
+    cells_written = 0
+
+    def __init__(
+        self,
+        sheet_id: str,
+        service_account_file: str | None = None,
+        session: requests.Session | None = None,
+        token_cache: TokenCache | None = None,
+        metadata_cache: MetadataCache | None = None,
+        scheduler: SheetsScheduler | None = None,
+    ) -> None:
+        if session is None:
+            session = authorized_session(service_account_file, token_cache)
+        self.client = gspread.authorize(None, http_client=CountingHTTPClient, session=session)
+        self.client.http_client.scheduler = scheduler
+        self.metadata_cache = metadata_cache
+        cached = metadata_cache.get(sheet_id) if metadata_cache is not None else None
+        if cached is not None:
+            self.spreadsheet = _CachedSpreadsheet(self.client.http_client, cached["properties"])
+            self._sheets: dict[str, dict] = cached["sheets"]
+            self._verified: set[str] = set(cached["verified"])
+            self._fetched_at: float | None = cached["fetched_at"]
+        else:
+            self.spreadsheet = self.client.open_by_key(sheet_id)
+            self._sheets = {}
+            self._verified = set()
+            self._fetched_at = None
+
+    @property
+    def api_calls(self) -> int:
+        return getattr(self.client.http_client, "request_count", 0)
+
+    def invalidate(self) -> None:
+        self._sheets = {}
+        self._verified = set()
+        self._fetched_at = None
+        if self.metadata_cache is not None:
+            self.metadata_cache.invalidate(self.spreadsheet.id)
+
+    def worksheet(self, sheet_name: str) -> gspread.Worksheet:
+        if sheet_name not in self._sheets or not self._metadata_fresh():
+            self._refresh_metadata()
+        properties = self._sheets.get(sheet_name)
+        if properties is None:
+            raise gspread.WorksheetNotFound(sheet_name)
+        return gspread.Worksheet(
+            self.spreadsheet, properties, self.spreadsheet.id, self.client.http_client
         )
-        self.client = gspread.authorize(credentials)
-        self.spreadsheet = self.client.open_by_key(sheet_id)
 
-    def ensure_sheet(self, sheet_name: str, headers: list[str]) -> gspread.Worksheet:
+    def _metadata_fresh(self) -> bool:
+        if self.metadata_cache is None:
+            return self._fetched_at is not None
+        return self.metadata_cache.is_fresh(self._fetched_at)
+
+    def _refresh_metadata(self) -> None:
+        metadata = self.spreadsheet.fetch_sheet_metadata()
+        self._sheets = {
+            sheet["properties"]["title"]: sheet["properties"] for sheet in metadata["sheets"]
+        }
+        self._verified &= self._sheets.keys()
+        self._fetched_at = time.time()
+        self._save_metadata()
+
+    def _save_metadata(self) -> None:
+        if self.metadata_cache is None or self._fetched_at is None:
+            return
+        self.metadata_cache.put(
+            self.spreadsheet.id,
+            {
+                "fetched_at": self._fetched_at,
+                "properties": self.spreadsheet._properties,
+                "sheets": self._sheets,
+                "verified": sorted(self._verified),
+            },
+        )
+
+    def ensure_sheet(self, sheet_name: str, rows: int = 100) -> gspread.Worksheet:
+        headers = SHEET_HEADERS
         try:
-            sheet = self.spreadsheet.worksheet(sheet_name)
+            sheet = self.worksheet(sheet_name)
         except gspread.WorksheetNotFound:
-            sheet = self.spreadsheet.add_worksheet(title=sheet_name, rows=100, cols=len(headers))
+            sheet = self.spreadsheet.add_worksheet(
+                title=sheet_name,
+                rows=max(rows, 2),
+                cols=len(headers),
+            )
+            self._sheets[sheet_name] = sheet._properties
             sheet.append_row(headers)
+            self._hide_fingerprint(sheet)
         else:
+            if sheet_name in self._verified:
+                return sheet
             existing_headers = sheet.row_values(1)
             if existing_headers != headers:
                 sheet.resize(rows=max(sheet.row_count, 2), cols=len(headers))
-                sheet.update("1:1", [headers])
+                sheet.update(values=[headers], range_name="1:1")
+                self._hide_fingerprint(sheet)
+        self._verified.add(sheet_name)
+        self._save_metadata()
         return sheet
 
-    def read_rows(self, sheet: gspread.Worksheet) -> list[list[str]]:
-        values = sheet.get_all_values()
-        return values[1:] if len(values) > 1 else []
+    def _hide_fingerprint(self, sheet: gspread.Worksheet) -> None:
+        column = SHEET_HEADERS.index(FINGERPRINT_HEADER)
+        self.spreadsheet.batch_update(
+            {
+                "requests": [
+                    {
+                        "updateDimensionProperties": {
+                            "range": {
+                                "sheetId": sheet.id,
+                                "dimension": "COLUMNS",
+                                "startIndex": column,
+                                "endIndex": column + 1,
+                            },
+                            "properties": {"hiddenByUser": True},
+                            "fields": "hiddenByUser",
+                        }
+                    }
+                ]
+            }
+        )
 
-    def overwrite(self, sheet: gspread.Worksheet, rows: Iterable[Iterable[str]]) -> None:
-        data = [FIELDS, *rows]
+    def read_rows(
+        self,
+        sheet: gspread.Worksheet,
+        width: int = len(SHEET_FIELDS),
+    ) -> list[list[str]]:
+        if sheet.row_count < 2:
+            return []
+        values = list(sheet.get(f"A2:{rowcol_to_a1(sheet.row_count, width)}"))
+        while values and not any(values[-1]):
+            values.pop()
+        return [[*row, *[""] * (width - len(row))][:width] for row in values]
+
+    def read_columns(self, sheet: gspread.Worksheet, fields: list[str]) -> list[list[str]]:
+        if sheet.row_count < 2:
+            return []
+        title = _quote_title(sheet.title)
+        ranges = []
+        for field in fields:
+            column = SHEET_HEADERS.index(field) + 1
+            first = rowcol_to_a1(2, column)
+            last = rowcol_to_a1(sheet.row_count, column)
+            ranges.append(f"{title}!{first}:{last}")
+        reply = self.spreadsheet.values_batch_get(ranges, params={"majorDimension": "COLUMNS"})
+        columns = [
+            (value_range.get("values") or [[]])[0]
+            for value_range in reply.get("valueRanges", [])
+        ]
+        length = max((len(column) for column in columns), default=0)
+        return [
+            [column[index] if index < len(column) else "" for column in columns]
+            for index in range(length)
+        ]
+
+    def read_signatures(self, sheet: gspread.Worksheet) -> list[tuple[str, str]]:
+        return [(row[0], row[1]) for row in self.read_columns(sheet, ["id", FINGERPRINT_HEADER])]
+
+    def read_baseline(
+        self,
+        sheet: gspread.Worksheet,
+    ) -> tuple[list[list[str]], list[tuple[str, str]]]:
+        rows = self.read_rows(sheet, len(SHEET_HEADERS))
+        return [row[:-1] for row in rows], [(row[0], row[-1]) for row in rows]
+
+    def overwrite(
+        self,
+        sheet: gspread.Worksheet,
+        rows: Iterable[Iterable[str]],
+    ) -> list[tuple[str, str]]:
+        data = [SHEET_HEADERS, *map(with_fingerprint, rows)]
         sheet.clear()
         sheet.update(data)
+        self.cells_written += sum(len(row) for row in data)
+        _grid(sheet)["rowCount"] = max(sheet.row_count, len(data))
+        return [(row[0], row[-1]) for row in data[1:]]
+
+    def sync_rows(
+        self,
+        sheet: gspread.Worksheet,
+        rows: Iterable[Iterable[str]],
+        existing: list[tuple[str, str]] | None = None,
+    ) -> list[tuple[str, str]]:
+        if existing is None:
+            existing = self.read_signatures(sheet)
+        width = len(SHEET_HEADERS)
+        incoming = [with_fingerprint(row) for row in rows]
+        plan = plan_signature_sync(existing, incoming, width=width)
+        layout = [(incoming[index][0], incoming[index][-1]) for index in plan.order]
+        needed_rows = plan.row_count + 1
+        if needed_rows > sheet.row_count:
+            sheet.resize(rows=needed_rows, cols=max(sheet.col_count, width))
+        if not plan.updates:
+            logger.info("Sheet %s is already up to date", sheet.title)
+            return layout
+        data = [
+            {
+                "range": f"{_quote_title(sheet.title)}!{rowcol_to_a1(start + 2, 1)}",
+                "values": block,
+            }
+            for start, block in plan.ranges()
+        ]
+        self.spreadsheet.values_batch_update({"valueInputOption": "RAW", "data": data})
+        self.cells_written += plan.changed_rows * width
+        logger.info(
+            "Updated %s row(s) in %s range(s) of %s",
+            plan.changed_rows,
+            len(data),
+            sheet.title,
+        )
+        return layout
+
+    def append_rows(
+        self,
+        sheet: gspread.Worksheet,
+        rows: Iterable[Iterable[str]],
+        batch_rows: int = APPEND_BATCH_ROWS,
+    ) -> list[tuple[str, str]]:
+        sheet.resize(rows=1)
+        rows = iter(rows)
+        written = 0
+        layout: list[tuple[str, str]] = []
+        while batch := [with_fingerprint(row) for row in islice(rows, batch_rows)]:
+            sheet.append_rows(
+                batch,
+                value_input_option="RAW",
+                insert_data_option="INSERT_ROWS",
+                table_range="A1",
+            )
+            written += len(batch)
+            self.cells_written += sum(len(row) for row in batch)
+            layout.extend((row[0], row[-1]) for row in batch)
+        _grid(sheet)["rowCount"] = written + 1
+        logger.info("Appended %s row(s) to %s", written, sheet.title)
+        return layout
 
     def rotate_current_to_previous(
         self,
         current_sheet_name: str,
         previous_sheet_name: str,
-    ) -> list[list[str]]:
-        current_sheet = self.ensure_sheet(current_sheet_name, FIELDS)
-        previous_sheet = self.ensure_sheet(previous_sheet_name, FIELDS)
-        current_rows = self.read_rows(current_sheet)
-        self.overwrite(previous_sheet, current_rows)
-        return current_rows
-
-    def write_current(self, sheet_name: str, rows: Iterable[Iterable[str]]) -> None:
-        sheet = self.ensure_sheet(sheet_name, FIELDS)
-        self.overwrite(sheet, rows)
+    ) -> None:
+        current_sheet = self.ensure_sheet(current_sheet_name)
+        previous_sheet = self.ensure_sheet(previous_sheet_name)
+        self.spreadsheet.batch_update(
+            {
+                "requests": rotation_requests(
+                    current_sheet.id,
+                    previous_sheet.id,
+                    row_count=current_sheet.row_count,
+                    col_count=current_sheet.col_count,
+                )
+            }
+        )
+        _grid(previous_sheet).update(
+            rowCount=current_sheet.row_count,
+            columnCount=current_sheet.col_count,
+        )
+        self._save_metadata()
+
+    def write_current(
+        self,
+        sheet_name: str,
+        rows: Iterable[Iterable[str]],
+        existing: list[tuple[str, str]] | None = None,
+        mode: str = "diff",
+        batch_rows: int = APPEND_BATCH_ROWS,
+    ) -> list[tuple[str, str]]:
+        if mode == "append":
+            layout = self.append_rows(self.ensure_sheet(sheet_name), rows, batch_rows)
+        elif mode in WRITE_MODES:
+            rows = list(rows)
+            sheet = self.ensure_sheet(sheet_name, rows=len(rows) + 1)
+            if mode == "diff":
+                layout = self.sync_rows(sheet, rows, existing)
+            else:
+                layout = self.overwrite(sheet, rows)
+        else:
+            raise ValueError(f"Unknown write mode: {mode}")
+        self._save_metadata()
+        return layout
+
+
+def _grid(sheet: gspread.Worksheet) -> dict:
+    return sheet._properties.setdefault("gridProperties", {})
+
+
+def with_fingerprint(row: Iterable[str]) -> list[str]:
+    values = [str(value) for value in row][: len(SHEET_FIELDS)]
+    values.extend([""] * (len(SHEET_FIELDS) - len(values)))
+    return [*values, row_fingerprint(values)]
+
+
+def rotation_requests(
+    current_sheet_id: int,
+    previous_sheet_id: int,
+    row_count: int,
+    col_count: int,
+) -> list[dict]:
+    return [
+        {
+            "updateSheetProperties": {
+                "properties": {
+                    "sheetId": previous_sheet_id,
+                    "gridProperties": {"rowCount": row_count, "columnCount": col_count},
+                },
+                "fields": "gridProperties(rowCount,columnCount)",
+            }
+        },
+        {
+            "copyPaste": {
+                "source": {"sheetId": current_sheet_id},
+                "destination": {"sheetId": previous_sheet_id},
+                "pasteType": "PASTE_NORMAL",
+            }
+        },
+    ]
+
+
+def _quote_title(title: str) -> str:
+    return "'" + title.replace("'", "''") + "'"
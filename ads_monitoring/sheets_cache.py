@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+
+from google.oauth2.service_account import Credentials
+
+logger = logging.getLogger(__name__)
+
+TOKEN_EXPIRY_MARGIN = timedelta(minutes=5)
+
+
+def _read_json(path: Path) -> dict:
+    if not path.is_file():
+        return {}
+    try:
+        with path.open(encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except (OSError, ValueError) as exc:
+        logger.warning("Ignoring unreadable cache %s: %s", path, exc)
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def _write_json(path: Path, payload: dict, mode: int = 0o644) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    with os.fdopen(fd, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class TokenCache:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def apply(self, credentials: Credentials) -> bool:
+        with self._lock:
+            entry = _read_json(self.path).get(_token_key(credentials))
+        if not isinstance(entry, dict):
+            return False
+        try:
+            expiry = datetime.fromisoformat(entry["expiry"])
+            token = str(entry["token"])
+        except (KeyError, TypeError, ValueError):
+            return False
+        if expiry - TOKEN_EXPIRY_MARGIN <= datetime.now(timezone.utc).replace(tzinfo=None):
+            return False
+        credentials.token = token
+        credentials.expiry = expiry
+        return True
+
+    def store(self, credentials: Credentials) -> None:
+        if not credentials.token or credentials.expiry is None:
+            return
+        with self._lock:
+            payload = _read_json(self.path)
+            payload[_token_key(credentials)] = {
+                "token": credentials.token,
+                "expiry": credentials.expiry.isoformat(),
+            }
+            try:
+                _write_json(self.path, payload, mode=0o600)
+            except OSError as exc:
+                logger.warning("Unable to write token cache %s: %s", self.path, exc)
+
+
+def _token_key(credentials: Credentials) -> str:
+    scopes = " ".join(sorted(credentials.scopes or ()))
+    return f"{credentials.service_account_email}|{scopes}"
+
+
+class MetadataCache:
+    def __init__(self, path: str | Path, ttl_seconds: float = 300.0) -> None:
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+    def get(self, spreadsheet_id: str) -> dict | None:
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = _read_json(self.path).get(spreadsheet_id)
+        if not isinstance(entry, dict) or not self.is_fresh(entry.get("fetched_at")):
+            return None
+        return entry
+
+    def is_fresh(self, fetched_at: float | None) -> bool:
+        return (
+            isinstance(fetched_at, (int, float))
+            and time.time() - fetched_at < self.ttl_seconds
+        )
+
+    def put(self, spreadsheet_id: str, entry: dict) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        self._update(spreadsheet_id, entry)
+
+    def invalidate(self, spreadsheet_id: str) -> None:
+        self._update(spreadsheet_id, None)
+
+    def _update(self, spreadsheet_id: str, entry: dict | None) -> None:
+        with self._lock:
+            payload = _read_json(self.path)
+            if entry is None:
+                if payload.pop(spreadsheet_id, None) is None:
+                    return
+            else:
+                payload[spreadsheet_id] = entry
+            try:
+                _write_json(self.path, payload)
+            except OSError as exc:
+                logger.warning("Unable to write Sheets metadata cache %s: %s", self.path, exc)
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Mapping, TypeVar
+
+from gspread.exceptions import APIError
+import requests
+
+logger = logging.getLogger(__name__)
+
+READS_PER_MINUTE = 60
+WRITES_PER_MINUTE = 60
+QUOTA_RETRIES = 5
+_MAX_BACKOFF_SECONDS = 64.0
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    def __init__(self, per_minute: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.per_minute = per_minute
+        self._rate = per_minute / 60.0
+        self._tokens = float(per_minute)
+        self._clock = clock
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = self._clock()
+            wait = max(self._paused_until - now, 0.0)
+            if self.per_minute <= 0:
+                return wait
+            elapsed = now - self._updated
+            self._tokens = min(float(self.per_minute), self._tokens + elapsed * self._rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(wait, -self._tokens / self._rate)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            now = self._clock()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+
+class _Batch:
+    def __init__(self, body: Mapping[str, Any]) -> None:
+        self.bodies = [body]
+        self.done = threading.Event()
+        self.replies: list[Any] = []
+        self.error: BaseException | None = None
+
+
+class SheetsScheduler:
+    def __init__(
+        self,
+        reads_per_minute: int = READS_PER_MINUTE,
+        writes_per_minute: int = WRITES_PER_MINUTE,
+        retries: int = QUOTA_RETRIES,
+        backoff_seconds: float = 1.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.buckets = {
+            "read": TokenBucket(reads_per_minute),
+            "write": TokenBucket(writes_per_minute),
+        }
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._pending: dict[str, _Batch] = {}
+        self.quota_errors = 0
+        self.coalesced = 0
+        self.wait_seconds = 0.0
+
+    def call(self, kind: str, send: Callable[[], T]) -> T:
+        bucket = self.buckets[kind]
+        attempt = 0
+        while True:
+            wait = bucket.reserve()
+            if wait > 0:
+                with self._lock:
+                    self.wait_seconds += wait
+                self._sleep(wait)
+            try:
+                return send()
+            except APIError as exc:
+                if exc.response.status_code != 429 or attempt == self.retries:
+                    raise
+                delay = _retry_after(exc.response) or self._backoff(attempt)
+                with self._lock:
+                    self.quota_errors += 1
+                logger.warning(
+                    "Sheets %s quota exhausted; retrying in %.1fs (%s/%s)",
+                    kind,
+                    delay,
+                    attempt + 1,
+                    self.retries,
+                )
+                bucket.pause(delay)
+                attempt += 1
+
+    def coalesce(
+        self,
+        url: str,
+        body: Mapping[str, Any],
+        send: Callable[[Mapping[str, Any]], Any],
+    ) -> Any:
+        merger = _merger(url, body)
+        if merger is None:
+            return self.call("write", lambda: send(body))
+        with self._lock:
+            batch = self._pending.get(url)
+            if batch is not None and merger.compatible(batch.bodies[0], body):
+                index = len(batch.bodies)
+                batch.bodies.append(body)
+                self.coalesced += 1
+                leader = False
+            else:
+                batch = _Batch(body)
+                self._pending[url] = batch
+                index = 0
+                leader = True
+        if not leader:
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            return batch.replies[index]
+
+        def flush() -> Any:
+            with self._lock:
+                if self._pending.get(url) is batch:
+                    del self._pending[url]
+            return send(merger.merge(batch.bodies))
+
+        try:
+            reply = self.call("write", flush)
+        except BaseException as exc:
+            batch.error = exc
+            raise
+        else:
+            batch.replies = merger.split(reply, batch.bodies)
+            return batch.replies[0]
+        finally:
+            with self._lock:
+                if self._pending.get(url) is batch:
+                    del self._pending[url]
+            batch.done.set()
+
+    def _backoff(self, attempt: int) -> float:
+        delay = self.backoff_seconds * 2**attempt * random.uniform(0.5, 1.0)
+        return min(delay, _MAX_BACKOFF_SECONDS)
+
+
+class _Merger:
+    def __init__(self, items: str, replies: str) -> None:
+        self.items = items
+        self.replies = replies
+
+    def compatible(self, first: Mapping[str, Any], body: Mapping[str, Any]) -> bool:
+        return _without(first, self.items) == _without(body, self.items)
+
+    def merge(self, bodies: list[Mapping[str, Any]]) -> dict[str, Any]:
+        merged = dict(bodies[0])
+        merged[self.items] = [item for body in bodies for item in body[self.items]]
+        return merged
+
+    def split(self, reply: Mapping[str, Any], bodies: list[Mapping[str, Any]]) -> list[dict]:
+        replies = reply.get(self.replies)
+        parts = []
+        start = 0
+        for body in bodies:
+            part = _without(reply, self.replies)
+            end = start + len(body[self.items])
+            if replies is not None:
+                part[self.replies] = replies[start:end]
+            parts.append(part)
+            start = end
+        return parts
+
+
+_BATCH_UPDATE = _Merger("requests", "replies")
+_VALUES_BATCH_UPDATE = _Merger("data", "responses")
+
+
+def _merger(url: str, body: Mapping[str, Any] | None) -> _Merger | None:
+    if url.endswith("/values:batchUpdate"):
+        merger = _VALUES_BATCH_UPDATE
+    elif url.endswith(":batchUpdate"):
+        merger = _BATCH_UPDATE
+        if body is not None and set(body) != {"requests"}:
+            return None
+    else:
+        return None
+    if body is None or not isinstance(body.get(merger.items), list):
+        return None
+    return merger
+
+
+def _without(mapping: Mapping[str, Any], field: str) -> dict[str, Any]:
+    return {key: value for key, value in mapping.items() if key != field}
+
+
+def request_kind(method: str) -> str:
+    return "read" if method.upper() in ("GET", "HEAD") else "write"
+
+
+def _retry_after(response: requests.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    try:
+        return min(float(value), _MAX_BACKOFF_SECONDS) if value else None
+    except ValueError:
+        return None
@@ -0,0 +1,375 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+import sqlite3
+import threading
+from typing import Iterable, Iterator
+
+from ads_monitoring.compare import (
+    OfferDiff,
+    OfferKeyer,
+    build_offer_diff,
+    content_fingerprint,
+    offer_change,
+)
+from ads_monitoring.fetcher import SHEET_FIELDS, SOURCE_FIELD
+
+_COLUMNS = ", ".join(f'"{field}"' for field in SHEET_FIELDS)
+_PLACEHOLDERS = ", ".join("?" for _ in SHEET_FIELDS)
+_SQLITE_MAX_PARAMS = 900
+_SOURCE_INDEX = SHEET_FIELDS.index(SOURCE_FIELD)
+_ROW_HASH_VERSION = 1
+_MISSING_KEYS_SQL = """
+SELECT a.offer_key FROM snapshot_rows a
+WHERE a.snapshot_id = ? AND a.offer_key != ''
+  AND NOT EXISTS (
+      SELECT 1 FROM snapshot_rows b
+      WHERE b.snapshot_id = ? AND b.offer_key = a.offer_key
+  )
+"""
+_COUNT_PAIRS_SQL = """
+INSERT INTO pair_counts (snapshot_id, domain, sale, count)
+SELECT snapshot_id, "domain", "sale", COUNT(*)
+FROM snapshot_rows
+WHERE snapshot_id = ? AND ("domain" != '' OR "sale" != '')
+GROUP BY snapshot_id, "domain", "sale"
+"""
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    offer_count INTEGER NOT NULL DEFAULT 0,
+    notified INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS snapshot_rows (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    {", ".join(f'"{field}" TEXT NOT NULL' for field in SHEET_FIELDS)},
+    offer_key TEXT NOT NULL DEFAULT '',
+    row_hash TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (snapshot_id, position)
+);
+CREATE TABLE IF NOT EXISTS pair_counts (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+    domain TEXT NOT NULL,
+    sale TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (snapshot_id, domain, sale)
+);
+CREATE TABLE IF NOT EXISTS mirror_state (
+    target TEXT PRIMARY KEY,
+    snapshot_id INTEGER,
+    layout_rows INTEGER
+);
+CREATE TABLE IF NOT EXISTS mirror_layout (
+    target TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    offer_id TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    PRIMARY KEY (target, position)
+);
+"""
+
+
+def _prefixed(alias: str) -> str:
+    return ", ".join(f'{alias}."{field}"' for field in SHEET_FIELDS)
+
+
+def _pad(row: Iterable[str]) -> list[str]:
+    values = [str(value) for value in row][: len(SHEET_FIELDS)]
+    values.extend([""] * (len(SHEET_FIELDS) - len(values)))
+    return values
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    id: int
+    created_at: str
+    offer_count: int
+    notified: bool
+
+
+class SnapshotStore:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS snapshot_rows_key "
+            "ON snapshot_rows (snapshot_id, offer_key)"
+        )
+        self._conn.commit()
+
+    def _migrate(self) -> None:
+        self._migrate_row_hashes()
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(mirror_state)")}
+        if "layout_rows" not in columns:
+            self._conn.execute("ALTER TABLE mirror_state ADD COLUMN layout_rows INTEGER")
+        missing_counts = self._conn.execute(
+            "SELECT id FROM snapshots "
+            "WHERE id NOT IN (SELECT DISTINCT snapshot_id FROM pair_counts)"
+        ).fetchall()
+        for (snapshot_id,) in missing_counts:
+            self._conn.execute(_COUNT_PAIRS_SQL, (snapshot_id,))
+
+    def _migrate_row_hashes(self) -> None:
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] >= _ROW_HASH_VERSION:
+            return
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(snapshot_rows)")}
+        if "row_hash" not in columns:
+            self._conn.execute(
+                "ALTER TABLE snapshot_rows ADD COLUMN offer_key TEXT NOT NULL DEFAULT ''"
+            )
+            self._conn.execute(
+                "ALTER TABLE snapshot_rows ADD COLUMN row_hash TEXT NOT NULL DEFAULT ''"
+            )
+        snapshot_ids = [row[0] for row in self._conn.execute("SELECT id FROM snapshots")]
+        for snapshot_id in snapshot_ids:
+            keyer = OfferKeyer()
+            rows = self._conn.execute(
+                f"SELECT position, {_COLUMNS} FROM snapshot_rows "
+                "WHERE snapshot_id = ? ORDER BY position",
+                (snapshot_id,),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE snapshot_rows SET offer_key = ?, row_hash = ? "
+                "WHERE snapshot_id = ? AND position = ?",
+                (
+                    (keyer(row[1:]), content_fingerprint(row[1:]), snapshot_id, row[0])
+                    for row in rows
+                ),
+            )
+        self._conn.execute(f"PRAGMA user_version = {_ROW_HASH_VERSION}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> SnapshotStore:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def latest(self, notified_only: bool = False) -> Snapshot | None:
+        query = "SELECT id, created_at, offer_count, notified FROM snapshots"
+        if notified_only:
+            query += " WHERE notified = 1"
+        query += " ORDER BY id DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(query).fetchone()
+        return Snapshot(row[0], row[1], row[2], bool(row[3])) if row else None
+
+    def rows(self, snapshot_id: int) -> list[list[str]]:
+        return list(self.iter_rows(snapshot_id))
+
+    def iter_rows(self, snapshot_id: int) -> Iterator[list[str]]:
+        with self._lock:
+            fetched = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM snapshot_rows "
+                "WHERE snapshot_id = ? ORDER BY position",
+                (snapshot_id,),
+            ).fetchall()
+        for row in fetched:
+            yield list(row)
+
+    def row_hashes(self, snapshot_id: int) -> dict[str, str]:
+        with self._lock:
+            return dict(
+                self._conn.execute(
+                    "SELECT offer_key, row_hash FROM snapshot_rows "
+                    "WHERE snapshot_id = ? AND offer_key != ''",
+                    (snapshot_id,),
+                )
+            )
+
+    def rows_by_key(self, snapshot_id: int, keys: list[str]) -> dict[str, list[str]]:
+        found: dict[str, list[str]] = {}
+        for start in range(0, len(keys), _SQLITE_MAX_PARAMS):
+            batch = keys[start : start + _SQLITE_MAX_PARAMS]
+            placeholders = ", ".join("?" for _ in batch)
+            with self._lock:
+                fetched = self._conn.execute(
+                    f"SELECT offer_key, {_COLUMNS} FROM snapshot_rows "
+                    f"WHERE snapshot_id = ? AND offer_key IN ({placeholders})",
+                    (snapshot_id, *batch),
+                ).fetchall()
+            for row in fetched:
+                found[row[0]] = list(row[1:])
+        return found
+
+    def rows_by_source(self, snapshot_id: int, sources: list[str]) -> dict[str, list[list[str]]]:
+        placeholders = ", ".join("?" for _ in sources)
+        with self._lock:
+            fetched = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM snapshot_rows "
+                f'WHERE snapshot_id = ? AND "{SOURCE_FIELD}" IN ({placeholders}) '
+                "ORDER BY position",
+                (snapshot_id, *sources),
+            ).fetchall()
+        found: dict[str, list[list[str]]] = {}
+        for row in fetched:
+            found.setdefault(row[_SOURCE_INDEX], []).append(list(row))
+        return found
+
+    def pair_counts(self, snapshot_id: int) -> Counter[tuple[str, str]]:
+        with self._lock:
+            return Counter(
+                {
+                    (domain, sale): count
+                    for domain, sale, count in self._conn.execute(
+                        "SELECT domain, sale, count FROM pair_counts WHERE snapshot_id = ?",
+                        (snapshot_id,),
+                    )
+                }
+            )
+
+    def save(self, rows: Iterable[Iterable[str]], notified: bool = False) -> int:
+        created_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO snapshots (created_at, notified) VALUES (?, ?)",
+                (created_at, int(notified)),
+            )
+            snapshot_id = int(cursor.lastrowid)
+            keyer = OfferKeyer()
+            cursor = self._conn.executemany(
+                f"INSERT INTO snapshot_rows "
+                f"(snapshot_id, position, {_COLUMNS}, offer_key, row_hash) "
+                f"VALUES (?, ?, {_PLACEHOLDERS}, ?, ?)",
+                (
+                    (snapshot_id, position, *values, keyer(values), content_fingerprint(values))
+                    for position, values in enumerate(map(_pad, rows))
+                ),
+            )
+            self._conn.execute(
+                "UPDATE snapshots SET offer_count = ? WHERE id = ?",
+                (max(cursor.rowcount, 0), snapshot_id),
+            )
+            self._conn.execute(_COUNT_PAIRS_SQL, (snapshot_id,))
+        return snapshot_id
+
+    def stream_rows(self, snapshot_id: int, batch_size: int = 1000) -> Iterator[list[str]]:
+        conn = sqlite3.connect(str(self.path))
+        try:
+            cursor = conn.execute(
+                f"SELECT {_COLUMNS} FROM snapshot_rows "
+                "WHERE snapshot_id = ? ORDER BY position",
+                (snapshot_id,),
+            )
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    return
+                for row in batch:
+                    yield list(row)
+        finally:
+            conn.close()
+
+    def diff(self, previous_id: int | None, current_id: int) -> OfferDiff:
+        with self._lock:
+            added = [
+                key
+                for (key,) in self._conn.execute(
+                    _MISSING_KEYS_SQL, (current_id, -1 if previous_id is None else previous_id)
+                )
+            ]
+            if previous_id is None:
+                return build_offer_diff(added, (), ())
+            removed = [
+                key for (key,) in self._conn.execute(_MISSING_KEYS_SQL, (previous_id, current_id))
+            ]
+            changed = self._conn.execute(
+                f"SELECT c.offer_key, {_prefixed('p')}, {_prefixed('c')} "
+                "FROM snapshot_rows c JOIN snapshot_rows p "
+                "ON p.snapshot_id = ? AND p.offer_key = c.offer_key "
+                "WHERE c.snapshot_id = ? AND c.offer_key != '' AND p.row_hash != c.row_hash",
+                (previous_id, current_id),
+            ).fetchall()
+        width = len(SHEET_FIELDS)
+        modified = (
+            offer_change(row[0], row[1 : 1 + width], row[1 + width :]) for row in changed
+        )
+        return build_offer_diff(added, removed, modified)
+
+    def discard(self, snapshot_id: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+
+    def mark_notified(self, snapshot_id: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE snapshots SET notified = 1 WHERE id = ?", (snapshot_id,))
+
+    def mirrored_snapshot_id(self, target: str) -> int | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT snapshot_id FROM mirror_state WHERE target = ?",
+                (target,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def mirrored_layout(self, target: str) -> list[tuple[str, str]] | None:
+        with self._lock:
+            state = self._conn.execute(
+                "SELECT layout_rows FROM mirror_state "
+                "WHERE target = ? AND snapshot_id IS NOT NULL",
+                (target,),
+            ).fetchone()
+            if state is None or state[0] is None:
+                return None
+            layout = self._conn.execute(
+                "SELECT offer_id, fingerprint FROM mirror_layout "
+                "WHERE target = ? ORDER BY position",
+                (target,),
+            ).fetchall()
+        return layout if len(layout) == state[0] else None
+
+    def set_mirrored(
+        self,
+        target: str,
+        snapshot_id: int | None,
+        layout: Iterable[tuple[str, str]] | None = None,
+    ) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM mirror_layout WHERE target = ?", (target,))
+            layout_rows = None
+            if snapshot_id is not None and layout is not None:
+                cursor = self._conn.executemany(
+                    "INSERT INTO mirror_layout (target, position, offer_id, fingerprint) "
+                    "VALUES (?, ?, ?, ?)",
+                    (
+                        (target, position, offer_id, fingerprint)
+                        for position, (offer_id, fingerprint) in enumerate(layout)
+                    ),
+                )
+                layout_rows = max(cursor.rowcount, 0)
+            self._conn.execute(
+                "INSERT INTO mirror_state (target, snapshot_id, layout_rows) VALUES (?, ?, ?) "
+                "ON CONFLICT(target) DO UPDATE SET "
+                "snapshot_id = excluded.snapshot_id, layout_rows = excluded.layout_rows",
+                (target, snapshot_id, layout_rows),
+            )
+
+    def prune(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                DELETE FROM snapshots
+                WHERE id NOT IN (SELECT id FROM snapshots ORDER BY id DESC LIMIT 1)
+                  AND id NOT IN (
+                      SELECT id FROM snapshots WHERE notified = 1 ORDER BY id DESC LIMIT 1
+                  )
+                  AND id NOT IN (
+                      SELECT snapshot_id FROM mirror_state WHERE snapshot_id IS NOT NULL
+                  )
+                """
+            )
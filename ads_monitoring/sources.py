@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import hashlib
+import logging
+import threading
+from typing import Iterable, Iterator, Sequence
+from urllib.parse import urlsplit
+
+import requests
+
+from ads_monitoring.fetcher import (
+    CHUNK_SIZE,
+    DEFAULT_ENGINE,
+    SHEET_FIELDS,
+    SOURCE_FIELD,
+    FetchResult,
+    PageParser,
+    collect_offers,
+    declared_encoding,
+    iter_offers_stream,
+)
+from ads_monitoring.page_cache import CachedPage, PageCache
+from ads_monitoring.transport import Transport
+
+logger = logging.getLogger(__name__)
+
+
+class HostLimiter:
+    def __init__(self, per_host: int) -> None:
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._semaphores: dict[str, threading.BoundedSemaphore] = {}
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host)
+                self._semaphores[host] = semaphore
+        with semaphore:
+            yield
+
+
+def fetch_each(
+    urls: Sequence[str],
+    timeout_seconds: int,
+    session: requests.Session | Transport,
+    engine: str = DEFAULT_ENGINE,
+    cache: PageCache | None = None,
+    max_workers: int = 8,
+    per_host: int = 4,
+    parser: PageParser | None = None,
+) -> dict[str, FetchResult | Exception]:
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        raise ValueError("At least one source URL is required")
+    limiter = HostLimiter(per_host)
+
+    def fetch(url: str) -> FetchResult | Exception:
+        try:
+            with limiter.slot(url):
+                logger.info("Fetching offers from %s", url)
+                result = collect_offers(
+                    url,
+                    timeout_seconds,
+                    engine=engine,
+                    cache=cache,
+                    session=session,
+                    parser=parser,
+                )
+        except Exception as exc:
+            return exc
+        for offer in result.offers:
+            offer[SOURCE_FIELD] = url
+        logger.info("Fetched %s offers from %s", len(result.offers), url)
+        return result
+
+    workers = max(1, min(max_workers, len(unique_urls)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as pool:
+        return dict(zip(unique_urls, pool.map(fetch, unique_urls)))
+
+
+def merge_results(results: Iterable[FetchResult | Exception]) -> FetchResult:
+    results = list(results)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    offers = [offer for result in results for offer in result.offers]
+    return FetchResult(
+        offers,
+        unchanged=all(result.unchanged for result in results),
+        bytes_downloaded=sum(result.bytes_downloaded for result in results),
+        parse_seconds=sum(result.parse_seconds for result in results),
+        unchanged_sources=tuple(url for result in results for url in result.unchanged_sources),
+    )
+
+
+def collect_sources(
+    urls: Sequence[str],
+    timeout_seconds: int,
+    session: requests.Session | Transport,
+    engine: str = DEFAULT_ENGINE,
+    cache: PageCache | None = None,
+    max_workers: int = 8,
+    per_host: int = 4,
+    parser: PageParser | None = None,
+) -> FetchResult:
+    results = fetch_each(
+        urls,
+        timeout_seconds,
+        session,
+        engine=engine,
+        cache=cache,
+        max_workers=max_workers,
+        per_host=per_host,
+        parser=parser,
+    )
+    return merge_results(results.values())
+
+
+class SourceStream:
+    def __init__(
+        self,
+        urls: Sequence[str],
+        timeout_seconds: int,
+        session: requests.Session | Transport,
+        cache: PageCache | None = None,
+        fields: list[str] = SHEET_FIELDS,
+    ) -> None:
+        self.urls = list(dict.fromkeys(urls))
+        if not self.urls:
+            raise ValueError("At least one source URL is required")
+        self.timeout_seconds = timeout_seconds
+        self.session = session
+        self.cache = cache
+        self.fields = fields
+        self.rows = 0
+        self.bytes_downloaded = 0
+        self.unchanged = True
+
+    def __iter__(self) -> Iterator[list[str]]:
+        for url in self.urls:
+            yield from self._stream(url)
+
+    def _stream(self, url: str) -> Iterator[list[str]]:
+        logger.info("Streaming offers from %s", url)
+        digest = hashlib.sha256()
+        rows = 0
+        with self.session.get(url, timeout=self.timeout_seconds, stream=True) as response:
+            response.raise_for_status()
+            encoding = declared_encoding(response.headers.get("content-type"))
+            chunks = self._hashed(response.iter_content(CHUNK_SIZE), digest)
+            for offer in iter_offers_stream(chunks, encoding):
+                offer[SOURCE_FIELD] = url
+                rows += 1
+                yield offer.row(self.fields)
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+        self.rows += rows
+        content_hash = digest.hexdigest()
+        cached = self.cache.get(url) if self.cache is not None else None
+        if cached is None or cached.content_hash != content_hash:
+            self.unchanged = False
+        if self.cache is not None:
+            self.cache.put(url, CachedPage(content_hash, etag, last_modified))
+        logger.info("Streamed %s offers from %s", rows, url)
+
+    def _hashed(self, chunks: Iterable[bytes], digest) -> Iterator[bytes]:
+        for chunk in chunks:
+            digest.update(chunk)
+            self.bytes_downloaded += len(chunk)
+            yield chunk
@@ -1,9 +1,140 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+import time
+from typing import Iterable
+
 import requests
 
+API_BASE = "https://api.telegram.org"
+MESSAGE_LIMIT = 4096
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramError(RuntimeError):
+    pass
+
+
+def split_message(message: str, limit: int = MESSAGE_LIMIT) -> list[str]:
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0
+    for line in message.split("\n"):
+        while len(line) > limit:
+            if current:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            chunks.append(line[:limit])
+            line = line[limit:]
+        extra = len(line) + (1 if current else 0)
+        if current and size + extra > limit:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+            extra = len(line)
+        current.append(line)
+        size += extra
+    if current:
+        chunks.append("\n".join(current))
+    return [chunk for chunk in chunks if chunk.strip()] or [message[:limit]]
+
+
+class ChatRateLimiter:
+    def __init__(self, min_interval: float, clock=time.monotonic, sleep=time.sleep) -> None:
+        self.min_interval = min_interval
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next_slot: dict[str, float] = {}
+
+    def wait(self, chat_id: str) -> None:
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next_slot.get(chat_id, now))
+            self._next_slot[chat_id] = slot + self.min_interval
+        if slot > now:
+            self._sleep(slot - now)
+
+    def defer(self, chat_id: str, seconds: float) -> None:
+        with self._lock:
+            until = self._clock() + seconds
+            self._next_slot[chat_id] = max(self._next_slot.get(chat_id, until), until)
+
+
+class TelegramSender:
+    def __init__(
+        self,
+        token: str,
+        session: requests.Session | None = None,
+        timeout_seconds: float = 30,
+        min_interval: float = 1.0,
+        max_retries: int = 5,
+        api_base: str = API_BASE,
+    ) -> None:
+        self.url = f"{api_base}/bot{token}/sendMessage"
+        self.session = session if session is not None else requests.Session()
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.limiter = ChatRateLimiter(min_interval)
+
+    def send(self, chat_id: str, message: str) -> None:
+        for chunk in split_message(message):
+            self._send_chunk(chat_id, chunk)
+
+    def send_many(self, chat_ids: Iterable[str], message: str, max_workers: int = 4) -> None:
+        chats = list(dict.fromkeys(chat_ids))
+        if len(chats) <= 1:
+            for chat_id in chats:
+                self.send(chat_id, message)
+            return
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chats))) as pool:
+            for future in [pool.submit(self.send, chat_id, message) for chat_id in chats]:
+                future.result()
+
+    def _send_chunk(self, chat_id: str, text: str) -> None:
+        for attempt in range(self.max_retries + 1):
+            self.limiter.wait(chat_id)
+            response = self.session.post(
+                self.url,
+                json={"chat_id": chat_id, "text": text},
+                timeout=self.timeout_seconds,
+            )
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt == self.max_retries:
+                    break
+                delay = _retry_after(response) or float(2**attempt)
+                logger.warning(
+                    "Telegram returned %s for %s; retrying in %.0fs",
+                    response.status_code,
+                    chat_id,
+                    delay,
+                )
+                self.limiter.defer(chat_id, delay)
+                continue
+            response.raise_for_status()
+            return
+        raise TelegramError(f"Telegram delivery to {chat_id} failed after retries")
+
+
+def _retry_after(response: requests.Response) -> float | None:
+    try:
+        retry_after = response.json().get("parameters", {}).get("retry_after")
+    except ValueError:
+        retry_after = None
+    if retry_after is None:
+        retry_after = response.headers.get("Retry-After")
+    try:
+        return float(retry_after) if retry_after is not None else None
+    except ValueError:
+        return None
+
 
-def send_message(token: str, channel_id: str, message: str) -> None:
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    response = requests.post(url, json={"chat_id": channel_id, "text": message})
-    response.raise_for_status()
+def send_message(
+    token: str,
+    channel_id: str,
+    message: str,
+    session: requests.Session | None = None,
+) -> None:
+    TelegramSender(token, session=session).send(channel_id, message)
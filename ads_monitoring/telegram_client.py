@@ -1,8 +1,86 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import time
 
 from telethon import TelegramClient
+from telethon.errors import FloodWaitError
+
+from ads_monitoring.telegram import split_message
+
+logger = logging.getLogger(__name__)
+
+
+class _AsyncChatLimiter:
+    def __init__(self, min_interval: float) -> None:
+        self.min_interval = min_interval
+        self._next_slot: dict[str, float] = {}
+
+    async def wait(self, chat: str) -> None:
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(chat, now))
+        self._next_slot[chat] = slot + self.min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def defer(self, chat: str, seconds: float) -> None:
+        until = time.monotonic() + seconds
+        self._next_slot[chat] = max(self._next_slot.get(chat, until), until)
+
+
+class ContactNotifier:
+    def __init__(
+        self,
+        api_id: int,
+        api_hash: str,
+        session_file: str,
+        concurrency: int = 5,
+        min_interval: float = 1.0,
+        max_retries: int = 3,
+    ) -> None:
+        self.client = TelegramClient(session_file, api_id, api_hash)
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self._limiter = _AsyncChatLimiter(min_interval)
+
+    async def __aenter__(self) -> ContactNotifier:
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def connect(self) -> None:
+        if not self.client.is_connected():
+            await self.client.start()
+
+    async def close(self) -> None:
+        await self.client.disconnect()
+
+    async def send(self, contacts: list[str], message: str) -> None:
+        await self.connect()
+        chunks = split_message(message)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def deliver(contact: str) -> None:
+            async with semaphore:
+                for chunk in chunks:
+                    await self._send_chunk(contact, chunk)
+
+        await asyncio.gather(*(deliver(contact) for contact in dict.fromkeys(contacts)))
+
+    async def _send_chunk(self, contact: str, text: str) -> None:
+        for attempt in range(self.max_retries + 1):
+            await self._limiter.wait(contact)
+            try:
+                await self.client.send_message(contact, text)
+                return
+            except FloodWaitError as exc:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning("FloodWait for %s: sleeping %ss", contact, exc.seconds)
+                self._limiter.defer(contact, exc.seconds)
 
 
 async def send_messages(
@@ -12,9 +90,8 @@ async def send_messages(
     contacts: list[str],
     message: str,
 ) -> None:
-    async with TelegramClient(session_file, api_id, api_hash) as client:
-        for contact in contacts:
-            await client.send_message(contact, message)
+    async with ContactNotifier(api_id, api_hash, session_file) as notifier:
+        await notifier.send(contacts, message)
 
 
 def send_notifications(
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import json
+import logging
+import os
+from pathlib import Path
+import random
+import threading
+import time
+from typing import Callable
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout)
+_MAX_RETRY_AFTER = 60.0
+
+
+def create_session(pool_size: int) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = make_headers(accept_encoding=True)["accept-encoding"]
+    return session
+
+
+class RetryBudget:
+    def __init__(self, ratio: float = 0.2, capacity: float = 10.0) -> None:
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = capacity
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class LatencyTracker:
+    def __init__(self, path: str | Path | None = None, window: int = 100) -> None:
+        self.path = Path(path) if path is not None else None
+        self.window = window
+        self._samples: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def record(self, url: str, seconds: float) -> None:
+        host = _host(url)
+        with self._lock:
+            samples = self._samples.get(host)
+            if samples is None:
+                samples = deque(maxlen=self.window)
+                self._samples[host] = samples
+            samples.append(seconds)
+
+    def percentile(self, url: str, percentile: float, min_samples: int = 10) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples.get(_host(url), ()))
+        if len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * percentile / 100))
+        return samples[index]
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        with self._lock:
+            payload = {host: list(samples) for host, samples in self._samples.items()}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump(payload, handle)
+        os.replace(tmp_path, self.path)
+
+    def _load(self) -> None:
+        if self.path is None or not self.path.is_file():
+            return
+        try:
+            with self.path.open(encoding="utf-8") as handle:
+                payload = json.load(handle)
+            self._samples = {
+                host: deque(map(float, samples), maxlen=self.window)
+                for host, samples in payload.items()
+            }
+        except (OSError, ValueError, TypeError, AttributeError) as exc:
+            logger.warning("Ignoring unreadable latency history %s: %s", self.path, exc)
+            self._samples = {}
+
+
+class Transport:
+    def __init__(
+        self,
+        session: requests.Session,
+        max_retries: int = 3,
+        backoff_seconds: float = 0.5,
+        budget: RetryBudget | None = None,
+        latency: LatencyTracker | None = None,
+        hedge_percentile: float = 0.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.session = session
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.budget = budget if budget is not None else RetryBudget()
+        self.latency = latency if latency is not None else LatencyTracker()
+        self.hedge_percentile = hedge_percentile
+        self._sleep = sleep
+        self._hedge_pool: ThreadPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+
+    def close(self) -> None:
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False, cancel_futures=True)
+        self.latency.save()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        attempt = 0
+        while True:
+            self.budget.record_request()
+            try:
+                response = self._send(url, kwargs)
+            except TRANSIENT_ERRORS as exc:
+                if not self._may_retry(attempt):
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning("GET %s failed (%s); retrying in %.1fs", url, exc, delay)
+            else:
+                if response.status_code not in RETRY_STATUSES or not self._may_retry(attempt):
+                    return response
+                delay = _retry_after(response) or self._backoff(attempt)
+                logger.warning(
+                    "GET %s returned %s; retrying in %.1fs", url, response.status_code, delay
+                )
+                response.close()
+            self._sleep(delay)
+            attempt += 1
+
+    def _may_retry(self, attempt: int) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        if not self.budget.try_spend():
+            logger.warning("Retry budget exhausted; not retrying")
+            return False
+        return True
+
+    def _backoff(self, attempt: int) -> float:
+        return self.backoff_seconds * 2**attempt * random.uniform(0.5, 1.0)
+
+    def _send(self, url: str, kwargs: dict) -> requests.Response:
+        hedge_after = (
+            self.latency.percentile(url, self.hedge_percentile)
+            if self.hedge_percentile
+            else None
+        )
+        if hedge_after is None:
+            return self._timed_get(url, kwargs)
+
+        pool = self._pool()
+        primary = pool.submit(self._timed_get, url, kwargs)
+        done, _ = wait([primary], timeout=hedge_after)
+        if done or not self.budget.try_spend():
+            return primary.result()
+        logger.info("GET %s slower than %.2fs; sending hedged request", url, hedge_after)
+        hedge = pool.submit(self._timed_get, url, kwargs)
+        pending = {primary, hedge}
+        error: BaseException | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                for loser in pending:
+                    loser.add_done_callback(_close_response)
+                return future.result()
+        raise error
+
+    def _timed_get(self, url: str, kwargs: dict) -> requests.Response:
+        start = time.perf_counter()
+        response = self.session.get(url, **kwargs)
+        self.latency.record(url, time.perf_counter() - start)
+        return response
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(thread_name_prefix="hedge")
+            return self._hedge_pool
+
+
+def _close_response(future: Future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def _retry_after(response: requests.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    try:
+        return min(float(value), _MAX_RETRY_AFTER) if value else None
+    except ValueError:
+        return None
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from html import escape
+import random
+
+OFFER_HEADERS = [
+    "Offer ID",
+    "Сайт",
+    "Домен",
+    "Категория",
+    "Продажа",
+    "Условия",
+    "Вознаграждение",
+    "Срок действия, дней",
+    "Юр. лицо",
+    "Вероятность green",
+    "Комментарий",
+]
+CATEGORIES = ["Одежда", "Электроника", "Retail", "Путешествия", "Красота", "Дом и сад"]
+SALES = ["5%", "10%", "15%", "20%", "500 ₽", "1000 ₽", "Бесплатная доставка"]
+CONDITIONS = ["Online", "Offline", "Первый заказ", "От 3000 ₽", "Только в приложении"]
+LEGAL_FORMS = ["ООО", "АО", "ИП"]
+
+
+def _noise_table(rng: random.Random, rows: int) -> list[str]:
+    lines = ["<table class=\"nav\">", "<tr><th>Раздел</th><th>Ссылка</th></tr>"]
+    for idx in range(rows):
+        link = f"<a href=\"/p/{rng.randint(1, 999)}\">→</a>"
+        lines.append(f"<tr><td>Пункт {idx}</td><td>{link}</td></tr>")
+    lines.append("</table>")
+    return lines
+
+
+def generate_page(rows: int, seed: int = 0, noise_tables: int = 3) -> str:
+    rng = random.Random(seed)
+    domain_pool = [f"shop{idx}.ru" for idx in range(max(1, rows // 3))]
+    legal_names = [
+        f"{rng.choice(LEGAL_FORMS)} «Компания {idx}»" for idx in range(max(1, rows // 10))
+    ]
+
+    lines = ["<!DOCTYPE html>", "<html><head><meta charset=\"utf-8\"><title>Offers</title></head>"]
+    lines.append("<body><div class=\"layout\">")
+    for _ in range(noise_tables // 2 + noise_tables % 2):
+        lines.extend(_noise_table(rng, 5))
+
+    lines.append("<table class=\"offers\"><thead><tr>")
+    lines.extend(f"<th>{escape(header)}</th>" for header in OFFER_HEADERS)
+    lines.append("</tr></thead><tbody>")
+    for idx in range(rows):
+        domain = rng.choice(domain_pool)
+        cells = [
+            str(100000 + idx),
+            domain.split(".")[0].capitalize(),
+            domain,
+            rng.choice(CATEGORIES),
+            rng.choice(SALES),
+            rng.choice(CONDITIONS),
+            str(rng.randrange(100, 5000, 50)),
+            str(rng.choice([7, 14, 30, 60, 90])),
+            rng.choice(legal_names),
+            f"{rng.randint(0, 100)}%",
+            "" if rng.random() < 0.7 else "Акция &amp; спецпредложение",
+        ]
+        lines.append("<tr>" + "".join(f"<td>{cell}</td>" for cell in cells) + "</tr>")
+    lines.append("</tbody></table>")
+
+    for _ in range(noise_tables // 2):
+        lines.extend(_noise_table(rng, 20))
+    lines.append("</div></body></html>")
+    return "\n".join(lines)
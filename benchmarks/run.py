@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import argparse
+from dataclasses import asdict, dataclass
+import gc
+import json
+import os
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from ads_monitoring.compare import compare_pairs, format_comparison
+from ads_monitoring.fetcher import (
+    SHEET_FIELDS,
+    _match_headers,
+    count_pairs,
+    offers_to_rows,
+    parse_offers,
+)
+from benchmarks.generator import OFFER_HEADERS, generate_page
+
+DEFAULT_SIZES = (1_000, 10_000, 50_000, 200_000)
+DEFAULT_BASELINE = Path(__file__).with_name("baselines.json")
+DEFAULT_THRESHOLD = 1.5
+
+
+@dataclass(frozen=True)
+class Measurement:
+    stage: str
+    size: int
+    seconds: float
+    peak_bytes: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.stage}@{self.size}"
+
+
+def _measure(stage: str, size: int, func: Callable[[], Any], repeats: int) -> Measurement:
+    timings: list[float] = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Measurement(stage, size, min(timings), peak)
+
+
+def run_size(size: int, repeats: int, engines: tuple[str, ...]) -> list[Measurement]:
+    html = generate_page(size, seed=size)
+    page = html.encode("utf-8")
+    previous_offers = parse_offers(generate_page(size, seed=size + 1))
+    offers = parse_offers(page)
+    current_counts = count_pairs(offers)
+    previous_counts = count_pairs(previous_offers)
+    comparison = compare_pairs(current_counts, previous_counts)
+    header_rows = [
+        [f"{header} ({idx})" for header in OFFER_HEADERS] for idx in range(max(1, size // 100))
+    ]
+
+    stages: list[tuple[str, Callable[[], Any]]] = [
+        *(
+            (f"parse_offers[{engine}]", lambda engine=engine: parse_offers(page, engine=engine))
+            for engine in engines
+        ),
+        ("match_headers", lambda: [_match_headers(row) for row in header_rows]),
+        ("count_pairs", lambda: count_pairs(offers)),
+        ("compare_pairs", lambda: compare_pairs(current_counts, previous_counts)),
+        ("format_comparison", lambda: format_comparison(comparison)),
+        ("offers_to_rows", lambda: list(offers_to_rows(offers, SHEET_FIELDS))),
+    ]
+    return [_measure(stage, size, func, repeats) for stage, func in stages]
+
+
+def load_baselines(path: Path) -> dict[str, dict[str, float]]:
+    if not path.is_file():
+        return {}
+    with path.open(encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def save_baselines(path: Path, measurements: list[Measurement]) -> None:
+    baselines = load_baselines(path)
+    for measurement in measurements:
+        baselines[measurement.key] = {
+            "seconds": round(measurement.seconds, 6),
+            "peak_bytes": measurement.peak_bytes,
+        }
+    with path.open("w", encoding="utf-8") as handle:
+        json.dump(dict(sorted(baselines.items())), handle, indent=2)
+        handle.write("\n")
+
+
+def find_regressions(
+    measurements: list[Measurement],
+    baselines: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[str]:
+    regressions: list[str] = []
+    for measurement in measurements:
+        baseline = baselines.get(measurement.key)
+        if not baseline:
+            regressions.append(f"{measurement.key}: no baseline, run with --update-baseline")
+            continue
+        for metric, value in (
+            ("seconds", measurement.seconds),
+            ("peak_bytes", measurement.peak_bytes),
+        ):
+            reference = baseline.get(metric)
+            if reference and value > reference * threshold:
+                regressions.append(
+                    f"{measurement.key} {metric}: {value:.6g} > {reference:.6g} x {threshold}"
+                )
+    return regressions
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark ads monitoring stages.")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="Comma-separated offer row counts to generate.",
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--engines", default="stream,soup")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=float(os.getenv("BENCH_THRESHOLD", DEFAULT_THRESHOLD)),
+        help="Fail when a stage exceeds its baseline by this factor.",
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", type=Path, help="Write raw measurements to this file.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    engines = tuple(engine.strip() for engine in args.engines.split(",") if engine.strip())
+
+    measurements: list[Measurement] = []
+    for size in sizes:
+        for measurement in run_size(size, args.repeats, engines):
+            measurements.append(measurement)
+            print(
+                f"{measurement.stage:<24} {measurement.size:>8} rows "
+                f"{measurement.seconds * 1000:>10.2f} ms "
+                f"{measurement.peak_bytes / 1024 / 1024:>9.2f} MiB"
+            )
+
+    if args.json:
+        args.json.write_text(json.dumps([asdict(m) for m in measurements], indent=2))
+    if args.update_baseline:
+        save_baselines(args.baseline, measurements)
+        print(f"Baselines written to {args.baseline}")
+        return 0
+
+    if not args.baseline.is_file():
+        print(
+            f"Baseline file {args.baseline} not found; run with --update-baseline first",
+            file=sys.stderr,
+        )
+        return 1
+    regressions = find_regressions(measurements, load_baselines(args.baseline), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
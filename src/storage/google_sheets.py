@@ -49,10 +49,59 @@ class GoogleSheetsStorage:
         self._write_values(self._config.sheet_current, values)
 
     def _copy_current_to_previous(self) -> None:
-        current_values = self._read_values(self._config.sheet_current)
-        if not current_values:
+        """Copy the current grid onto the previous one inside Google Sheets."""
+        sheets = self._sheet_properties()
+        current = sheets.get(self._config.sheet_current)
+        previous = sheets.get(self._config.sheet_previous)
+        if current is None:
             return
-        self._write_values(self._config.sheet_previous, current_values)
+        if previous is None:
+            raise RuntimeError(f"Sheet not found: {self._config.sheet_previous}")
+
+        grid = current.get("gridProperties", {})
+        requests = [
+            {
+                "updateSheetProperties": {
+                    "properties": {
+                        "sheetId": previous["sheetId"],
+                        "gridProperties": {
+                            "rowCount": grid.get("rowCount", 1000),
+                            "columnCount": grid.get("columnCount", len(COLUMNS)),
+                        },
+                    },
+                    "fields": "gridProperties(rowCount,columnCount)",
+                }
+            },
+            {
+                "copyPaste": {
+                    "source": {"sheetId": current["sheetId"]},
+                    "destination": {"sheetId": previous["sheetId"]},
+                    "pasteType": "PASTE_NORMAL",
+                }
+            },
+        ]
+        (
+            self._service.spreadsheets()
+            .batchUpdate(
+                spreadsheetId=self._config.spreadsheet_id,
+                body={"requests": requests},
+            )
+            .execute()
+        )
+
+    def _sheet_properties(self) -> dict[str, dict]:
+        response = (
+            self._service.spreadsheets()
+            .get(
+                spreadsheetId=self._config.spreadsheet_id,
+                fields="sheets.properties(sheetId,title,gridProperties)",
+            )
+            .execute()
+        )
+        return {
+            sheet["properties"]["title"]: sheet["properties"]
+            for sheet in response.get("sheets", [])
+        }
 
     def _read_values(self, sheet_name: str) -> list[list[str]]:
         response = (
@@ -82,7 +131,13 @@ class GoogleSheetsStorage:
             self._config.credentials_path,
             scopes=["https://www.googleapis.com/auth/spreadsheets"],
         )
-        return build("sheets", "v4", credentials=credentials)
+        return build(
+            "sheets",
+            "v4",
+            credentials=credentials,
+            static_discovery=True,
+            cache_discovery=False,
+        )
 
     @staticmethod
     def _load_config_from_env() -> SheetConfig:
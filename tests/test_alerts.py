@@ -0,0 +1,102 @@
+import math
+import unittest
+
+from ads_monitoring.alerts import AlertRule, evaluate_rules, parse_rules
+from ads_monitoring.columns import NumericSnapshot, numeric_column, parse_number
+from ads_monitoring.compare import compare_pairs, format_comparison
+
+
+def _row(offer_id: str, domain: str, green: str, amount: str = "500") -> list[str]:
+    return [offer_id, "site", domain, "Retail", "5%", "", amount, "30 дней", "", green, "src"]
+
+
+class ColumnsTests(unittest.TestCase):
+    def test_parses_display_text_into_numbers(self) -> None:
+        self.assertEqual(parse_number("90%"), 90.0)
+        self.assertEqual(parse_number("1 500 ₽"), 1500.0)
+        self.assertEqual(parse_number("до 7,5%"), 7.5)
+        self.assertEqual(parse_number("-3"), -3.0)
+        self.assertTrue(math.isnan(parse_number("нет")))
+
+        column = numeric_column(["90%", "", "90%", "12"])
+        self.assertEqual(column[[0, 2, 3]].tolist(), [90.0, 90.0, 12.0])
+        self.assertTrue(math.isnan(column[1]))
+
+    def test_snapshot_keys_duplicate_ids_and_skips_rows_without_id(self) -> None:
+        snapshot = NumericSnapshot.from_rows(
+            [_row("1", "a.ru", "90%"), _row("", "x.ru", "1%"), _row("1", "b.ru", "80%")],
+            ["greenProbability"],
+        )
+
+        self.assertEqual(snapshot.keys.tolist(), ["1", "1#2"])
+        self.assertEqual(snapshot.columns["greenProbability"].tolist(), [90.0, 80.0])
+
+
+class AlertRuleTests(unittest.TestCase):
+    def test_parse_rules(self) -> None:
+        rules = parse_rules("greenProbability delta <= -20, motivationAmount>=1000")
+
+        self.assertEqual(
+            rules,
+            (
+                AlertRule("greenProbability", "<=", -20.0, delta=True),
+                AlertRule("motivationAmount", ">=", 1000.0),
+            ),
+        )
+        self.assertEqual(rules[0].label, "greenProbability delta <= -20")
+        self.assertEqual(parse_rules(""), ())
+        with self.assertRaises(ValueError):
+            parse_rules("legalName > 1")
+        with self.assertRaises(ValueError):
+            parse_rules("greenProbability drops 20")
+
+    def test_delta_rule_matches_offers_present_in_both_snapshots(self) -> None:
+        previous = NumericSnapshot.from_rows(
+            [_row("1", "a.ru", "90%"), _row("2", "b.ru", "90%"), _row("3", "c.ru", "")]
+        )
+        current = NumericSnapshot.from_rows(
+            [
+                _row("3", "c.ru", "10%"),
+                _row("2", "b.ru", "75%"),
+                _row("1", "a.ru", "60%"),
+                _row("4", "d.ru", "5%"),
+            ]
+        )
+
+        alerts = evaluate_rules(parse_rules("greenProbability delta < -20"), current, previous)
+
+        self.assertEqual([alert.offer_key for alert in alerts], ["1"])
+        self.assertEqual((alerts[0].previous, alerts[0].current), (90.0, 60.0))
+        self.assertEqual(alerts[0].domain, "a.ru")
+
+    def test_threshold_rule_reports_only_new_crossings(self) -> None:
+        previous = NumericSnapshot.from_rows(
+            [_row("1", "a.ru", "90%", "2000"), _row("2", "b.ru", "90%", "500")]
+        )
+        current = NumericSnapshot.from_rows(
+            [
+                _row("1", "a.ru", "90%", "2500"),
+                _row("2", "b.ru", "90%", "1500"),
+                _row("3", "c.ru", "90%", "1000"),
+            ]
+        )
+
+        alerts = evaluate_rules(parse_rules("motivationAmount >= 1000"), current, previous)
+
+        self.assertEqual([(a.offer_key, a.previous) for a in alerts], [("2", 500.0), ("3", None)])
+
+    def test_alerts_are_rendered_as_a_separate_section(self) -> None:
+        previous = NumericSnapshot.from_rows([_row("1", "a.ru", "90%")])
+        current = NumericSnapshot.from_rows([_row("1", "a.ru", "60%")])
+        alerts = evaluate_rules(parse_rules("greenProbability delta <= -20"), current, previous)
+
+        message = format_comparison(compare_pairs({("a.ru", "5%")}, {("a.ru", "5%")}, alerts=alerts))
+
+        self.assertEqual(
+            message,
+            "Сработали правила:\n! 1 | a.ru | 5%: greenProbability delta <= -20 (90 → 60)",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from ads_monitoring.archive import SnapshotArchive
+from ads_monitoring.fetcher import SHEET_FIELDS
+
+
+def _row(offer_id: str, domain: str, sale: str) -> list[str]:
+    row = [""] * len(SHEET_FIELDS)
+    row[SHEET_FIELDS.index("id")] = offer_id
+    row[SHEET_FIELDS.index("domain")] = domain
+    row[SHEET_FIELDS.index("sale")] = sale
+    return row
+
+
+class SnapshotArchiveTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "archive.sqlite3"
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_rebuilds_any_snapshot_from_keyframes_and_deltas(self) -> None:
+        history = [
+            [_row("1", "a.ru", "10%"), _row("2", "b.ru", "5%")],
+            [_row("1", "a.ru", "15%"), _row("2", "b.ru", "5%"), _row("3", "c.ru", "1%")],
+            [_row("1", "a.ru", "15%"), _row("3", "c.ru", "1%")],
+            [_row("1", "d.ru", "15%"), _row("3", "c.ru", "2%")],
+        ]
+        with SnapshotArchive(self.path, keyframe_interval=2) as archive:
+            ids = [
+                archive.append(rows, created_at=f"2026-10-0{day}T00:00:00+00:00")
+                for day, rows in enumerate(history, start=1)
+            ]
+        with SnapshotArchive(self.path, keyframe_interval=2) as archive:
+            for snapshot_id, rows in zip(ids, history):
+                self.assertEqual(list(archive.rebuild(snapshot_id).values()), rows)
+            found = archive.snapshot_at("2026-10-02T12:00:00+00:00")
+            self.assertEqual(found.id, ids[1])
+            self.assertEqual(found.offer_count, 3)
+
+    def test_keep_days_prunes_old_snapshots_and_keeps_history_rebuildable(self) -> None:
+        history = [
+            [_row("1", "a.ru", f"{day}%"), _row(str(day), "b.ru", "5%")]
+            for day in range(1, 6)
+        ]
+        with SnapshotArchive(self.path, keyframe_interval=10, keep_days=2) as archive:
+            ids = [
+                archive.append(rows, created_at=f"2026-10-0{day}T00:00:00+00:00")
+                for day, rows in enumerate(history, start=1)
+            ]
+            kept = archive.snapshots()
+            self.assertEqual([item.id for item in kept], ids[2:])
+            for snapshot_id, rows in zip(ids[2:], history[2:]):
+                self.assertEqual(list(archive.rebuild(snapshot_id).values()), rows)
+            self.assertEqual(
+                {event.snapshot_id for event in archive.domain_timeline("b.ru")}, set(ids[2:])
+            )
+
+    def test_domain_timeline_uses_index(self) -> None:
+        with SnapshotArchive(self.path) as archive:
+            archive.append([_row("1", "a.ru", "10%")], created_at="2026-10-01T00:00:00+00:00")
+            archive.append([_row("1", "a.ru", "10%")], created_at="2026-10-02T00:00:00+00:00")
+            archive.append([_row("1", "a.ru", "20%")], created_at="2026-10-03T00:00:00+00:00")
+            archive.append([_row("1", "b.ru", "20%")], created_at="2026-10-04T00:00:00+00:00")
+
+            timeline = archive.domain_timeline("a.ru")
+            self.assertEqual(
+                [(event.created_at[:10], event.kind) for event in timeline],
+                [("2026-10-01", "added"), ("2026-10-03", "changed"), ("2026-10-04", "removed")],
+            )
+            recent = archive.domain_timeline("a.ru", since="2026-10-02T00:00:00+00:00")
+            self.assertEqual(len(recent), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
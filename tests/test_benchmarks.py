@@ -0,0 +1,40 @@
+from contextlib import redirect_stderr, redirect_stdout
+import io
+from pathlib import Path
+import tempfile
+import unittest
+
+from ads_monitoring.fetcher import count_pairs, parse_offers
+from benchmarks.generator import generate_page
+from benchmarks.run import Measurement, find_regressions, main
+
+
+class BenchmarkSuiteTests(unittest.TestCase):
+    def test_generated_page_parses_identically_with_both_engines(self) -> None:
+        html = generate_page(300, seed=7)
+        offers = parse_offers(html.encode("utf-8"), engine="stream")
+        self.assertEqual(len(offers), 300)
+        self.assertEqual(offers, parse_offers(html, engine="soup"))
+        self.assertLess(len(count_pairs(offers)), 300)
+
+    def test_find_regressions_uses_threshold(self) -> None:
+        measurements = [Measurement("count_pairs", 1000, seconds=0.3, peak_bytes=100)]
+        baselines = {"count_pairs@1000": {"seconds": 0.1, "peak_bytes": 100}}
+        self.assertEqual(len(find_regressions(measurements, baselines, 2.0)), 1)
+        self.assertEqual(find_regressions(measurements, baselines, 4.0), [])
+
+    def test_missing_baselines_fail_the_check(self) -> None:
+        measurements = [Measurement("count_pairs", 1000, seconds=0.3, peak_bytes=100)]
+        self.assertEqual(len(find_regressions(measurements, {}, 2.0)), 1)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = Path(tmp) / "baselines.json"
+            args = ["--sizes", "20", "--repeats", "1", "--baseline", str(baseline)]
+            with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+                self.assertEqual(main(args), 1)
+                self.assertEqual(main([*args, "--update-baseline"]), 0)
+                self.assertEqual(main([*args, "--threshold", "1000"]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
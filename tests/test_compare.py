@@ -0,0 +1,67 @@
+import unittest
+
+from ads_monitoring.compare import (
+    OfferKeyer,
+    compare_pairs,
+    content_fingerprint,
+    diff_offers,
+    format_comparison,
+)
+
+
+def _row(offer_id: str, domain: str, sale: str, green: str = "90%") -> list[str]:
+    return [offer_id, "site", domain, "Retail", sale, "", "500", "30", "", green, "src"]
+
+
+class CompareTests(unittest.TestCase):
+    def test_diff_offers_reports_added_removed_and_changed_fields(self) -> None:
+        previous = [_row("1", "a.ru", "5%"), _row("2", "b.ru", "7%"), _row("3", "c.ru", "9%")]
+        current = [
+            _row("1", "a.ru", "5%"),
+            _row("2", "b.ru", "7%", green="60%"),
+            _row("4", "d.ru", "1%"),
+        ]
+        previous_by_key = dict(zip(map(OfferKeyer(), previous), previous))
+        hashes = {key: content_fingerprint(row) for key, row in previous_by_key.items()}
+        requested: list[list[str]] = []
+
+        def load_previous(keys: list[str]) -> dict[str, list[str]]:
+            requested.append(keys)
+            return {key: previous_by_key[key] for key in keys}
+
+        diff = diff_offers(current, hashes, load_previous)
+
+        self.assertEqual(diff.added, ("4",))
+        self.assertEqual(diff.removed, ("3",))
+        self.assertEqual(len(diff.modified), 1)
+        self.assertEqual(diff.modified[0].changes, (("greenProbability", "90%", "60%"),))
+        self.assertEqual(requested, [["2"]])
+
+    def test_duplicate_ids_get_occurrence_keys(self) -> None:
+        rows = [_row("1", "a.ru", "5%"), _row("1", "a.ru", "6%"), _row("", "x.ru", "1%")]
+        self.assertEqual(list(map(OfferKeyer(), rows)), ["1", "1#2", ""])
+
+    def test_compare_pairs_reports_count_deltas(self) -> None:
+        result = compare_pairs(
+            {("a.ru", "5%"): 1, ("b.ru", "7%"): 2},
+            {("a.ru", "5%"): 12, ("c.ru", "9%"): 1},
+        )
+        self.assertEqual(result.new_pairs, {("b.ru", "7%")})
+        self.assertEqual(result.removed_pairs, {("c.ru", "9%")})
+        self.assertEqual(result.count_changes, {("a.ru", "5%"): (12, 1)})
+        self.assertIn("# a.ru | 5%: 12 → 1", format_comparison(result))
+
+    def test_format_comparison_renders_modifications(self) -> None:
+        diff = diff_offers(
+            [_row("2", "b.ru", "7%", green="60%")],
+            {"2": content_fingerprint(_row("2", "b.ru", "7%"))},
+            lambda keys: {"2": _row("2", "b.ru", "7%")},
+        )
+        message = format_comparison(compare_pairs({("b.ru", "7%")}, {("b.ru", "7%")}, diff))
+        self.assertIn("Измененные офферы:", message)
+        self.assertIn("~ 2 | b.ru | 7%: greenProbability: 90% → 60%", message)
+        self.assertEqual(format_comparison(compare_pairs(set(), set())), "Изменений нет.")
+
+
+if __name__ == "__main__":
+    unittest.main()
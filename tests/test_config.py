@@ -30,6 +30,23 @@ class ConfigTests(unittest.TestCase):
             settings = load_settings()
             self.assertEqual(settings.request_timeout_seconds, 15)
             self.assertEqual(settings.google_service_account_file, tmp.name)
+            self.assertEqual(settings.source_urls, ("https://example.com",))
+
+    def test_load_settings_reads_source_list(self) -> None:
+        with tempfile.NamedTemporaryFile() as tmp:
+            os.environ.pop("FLOCKTORY_URL", None)
+            os.environ.update(
+                {
+                    "FLOCKTORY_URLS": "https://a.example, https://b.example\nhttps://a.example",
+                    "GOOGLE_SHEET_ID": "sheet_id",
+                    "GOOGLE_SERVICE_ACCOUNT_FILE": tmp.name,
+                    "TELEGRAM_BOT_TOKEN": "token",
+                    "TELEGRAM_CHANNEL_ID": "@channel",
+                }
+            )
+            settings = load_settings()
+            self.assertEqual(settings.source_urls, ("https://a.example", "https://b.example"))
+            self.assertEqual(settings.flocktory_url, "https://a.example")
 
 
 if __name__ == "__main__":
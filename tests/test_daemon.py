@@ -0,0 +1,25 @@
+import random
+import unittest
+
+from ads_monitoring.daemon import AdaptivePoller
+
+
+class AdaptivePollerTests(unittest.TestCase):
+    def test_backs_off_when_static_and_speeds_up_on_change(self) -> None:
+        poller = AdaptivePoller(60, 600, jitter=0.0)
+        delays = [poller.next_delay(changed=False) for _ in range(10)]
+        self.assertEqual(delays[0], 90)
+        self.assertEqual(delays[-1], 600)
+        self.assertEqual(poller.next_delay(changed=True), 300)
+        self.assertEqual(poller.next_delay(changed=True), 150)
+
+    def test_jitter_stays_within_bounds(self) -> None:
+        poller = AdaptivePoller(60, 120, jitter=0.5, rng=random.Random(1))
+        for _ in range(50):
+            delay = poller.next_delay(changed=False)
+            self.assertGreaterEqual(delay, 60)
+            self.assertLessEqual(delay, 120)
+
+
+if __name__ == "__main__":
+    unittest.main()
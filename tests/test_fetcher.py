@@ -1,6 +1,22 @@
+import tempfile
 import unittest
+from pathlib import Path
+from unittest import mock
 
-from ads_monitoring.fetcher import FIELDS, count_pairs, offers_to_rows, parse_offers
+from ads_monitoring import fetcher
+from ads_monitoring.fetcher import (
+    FIELDS,
+    HEADER_ALIASES,
+    collect_offers,
+    PARSER_ENGINES,
+    count_pairs,
+    offers_to_rows,
+    parse_offers,
+    iter_offers_stream,
+    parse_offers_stream,
+)
+from ads_monitoring.headers import HeaderMatcher, normalize_header
+from ads_monitoring.page_cache import PageCache
 
 
 SAMPLE_HTML = """
@@ -52,6 +68,39 @@ SAMPLE_HTML = """
 </html>
 """
 
+THEAD_HTML = """
+<table>
+  <thead>
+    <tr><td>ID</td><td>Domain</td><td>Sale</td><td>Green</td></tr>
+  </thead>
+  <tbody>
+    <tr><td>1</td><td>shop.ru</td><td>5%</td><td>70%</td></tr>
+    <tr><td>2</td><td>id-shop.ru</td><td>15%</td><td>40%</td></tr>
+  </tbody>
+</table>
+"""
+
+
+def _brute_force_field(header: str) -> str | None:
+    normalized = normalize_header(header)
+    for field, aliases in HEADER_ALIASES.items():
+        normalized_aliases = {normalize_header(alias) for alias in aliases}
+        if normalized in normalized_aliases or any(
+            alias and alias in normalized for alias in normalized_aliases
+        ):
+            return field
+    return None
+
+
+def _response(status: int, body: bytes = b"", headers: dict | None = None) -> mock.MagicMock:
+    response = mock.MagicMock(status_code=status)
+    response.__enter__.return_value = response
+    response.headers = headers or {}
+    response.iter_content.side_effect = lambda size: (
+        body[idx : idx + 64] for idx in range(0, len(body), 64)
+    )
+    return response
+
 
 class FetcherTests(unittest.TestCase):
     def test_parse_offers_with_flexible_headers(self) -> None:
@@ -69,6 +118,127 @@ class FetcherTests(unittest.TestCase):
         self.assertEqual(len(rows), 2)
         self.assertEqual(rows[0], [offers[0][field] for field in FIELDS])
 
+    def test_offers_share_interned_values_and_rows_are_views(self) -> None:
+        offers = parse_offers(SAMPLE_HTML)
+        self.assertIs(offers[0].domain, offers[1].domain)
+        self.assertEqual(offers[0].pair, ("example.com", "10%"))
+        rows = offers_to_rows(offers)
+        offers[1]["sale"] = "15%"
+        self.assertEqual(rows[1][FIELDS.index("sale")], "15%")
+        self.assertEqual(list(rows), [offer.row() for offer in offers])
+
+    def test_engines_produce_same_offers(self) -> None:
+        expected = parse_offers(SAMPLE_HTML, engine="soup")
+        for engine in PARSER_ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(parse_offers(SAMPLE_HTML, engine=engine), expected)
+                self.assertEqual(
+                    parse_offers(SAMPLE_HTML.encode("utf-8"), engine=engine),
+                    expected,
+                )
+                self.assertEqual(
+                    parse_offers(
+                        SAMPLE_HTML.encode("cp1251"),
+                        engine=engine,
+                        encoding="cp1251",
+                    ),
+                    expected,
+                )
+
+    def test_header_matcher_agrees_with_alias_scan(self) -> None:
+        matcher = HeaderMatcher(HEADER_ALIASES)
+        headers = [
+            "Offer ID",
+            "Offer Duration, days",
+            "Срок действия оффера",
+            "Вероятность green",
+            "Green Probability",
+            "legal",
+            "Юр. лицо",
+            "Valid",
+            "Motivation Amount, ₽",
+            "Not relevant",
+            "",
+        ]
+        for header in headers:
+            with self.subTest(header=header):
+                self.assertEqual(matcher.match(header), _brute_force_field(header))
+
+    def test_header_memo_keeps_only_accepted_header_rows(self) -> None:
+        rows = "".join(
+            f"<tr><td>{idx}</td><td>shop{idx}.ru</td><td>скидка {idx % 50}%</td></tr>"
+            for idx in range(300)
+        )
+        page = f"<table><tr><td>ID</td><td>Домен</td><td>Скидка</td></tr>{rows}</table>"
+        for engine in PARSER_ENGINES:
+            with self.subTest(engine=engine), mock.patch.dict(
+                fetcher._header_mappings, clear=True
+            ):
+                self.assertEqual(len(parse_offers(page, engine=engine)), 300)
+                self.assertEqual(list(fetcher._header_mappings), [("ID", "Домен", "Скидка")])
+
+    def test_thead_rows_are_not_rematched_as_headers(self) -> None:
+        expected = parse_offers(THEAD_HTML, engine="soup")
+        self.assertEqual([offer["domain"] for offer in expected], ["shop.ru", "id-shop.ru"])
+        self.assertEqual(parse_offers(THEAD_HTML, engine="stream"), expected)
+
+    def test_stream_parser_accepts_split_chunks(self) -> None:
+        data = SAMPLE_HTML.encode("utf-8")
+        chunks = [data[idx : idx + 7] for idx in range(0, len(data), 7)]
+        self.assertEqual(
+            parse_offers_stream(chunks, encoding="utf-8"),
+            parse_offers(SAMPLE_HTML, engine="soup"),
+        )
+
+    def test_stream_iterator_yields_rows_before_input_ends(self) -> None:
+        data = SAMPLE_HTML.encode("utf-8")
+        fed = []
+
+        def chunks():
+            for idx in range(0, len(data), 16):
+                fed.append(idx)
+                yield data[idx : idx + 16]
+
+        offers = iter_offers_stream(chunks(), encoding="utf-8")
+        first = next(offers)
+        self.assertLess(fed[-1] + 16, len(data))
+        self.assertEqual([first, *offers], parse_offers(SAMPLE_HTML, engine="soup"))
+
+    def test_conditional_fetch_skips_parsing_unchanged_pages(self) -> None:
+        body = SAMPLE_HTML.encode("utf-8")
+        first = _response(200, body, {"ETag": '"v1"', "content-type": "text/html; charset=utf-8"})
+        not_modified = _response(304)
+        same_body = _response(200, body, {"content-type": "text/html"})
+        url = "https://example.com"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = Path(tmp) / "page_cache.json"
+            with mock.patch(
+                "ads_monitoring.fetcher.requests.get",
+                side_effect=[first, not_modified, same_body],
+            ) as get, mock.patch(
+                "ads_monitoring.fetcher.parse_offers_stream", wraps=parse_offers_stream
+            ) as parse:
+                cache = PageCache(cache_path)
+                fresh = collect_offers(url, 5, cache=cache)
+                cache.save()
+                cache = PageCache(cache_path)
+                cached = collect_offers(url, 5, cache=cache)
+                identical = collect_offers(url, 5, cache=cache)
+            saved = cache_path.read_text(encoding="utf-8")
+
+        self.assertFalse(fresh.unchanged)
+        self.assertEqual(fresh.offers, parse_offers(SAMPLE_HTML, engine="soup"))
+        self.assertEqual(fresh.bytes_downloaded, len(body))
+        self.assertEqual(parse.call_count, 1)
+        self.assertNotIn("offers", saved)
+        self.assertEqual(get.call_args_list[1].kwargs["headers"], {"If-None-Match": '"v1"'})
+        for result in (cached, identical):
+            self.assertTrue(result.unchanged)
+            self.assertEqual(result.offers, [])
+            self.assertEqual(result.unchanged_sources, (url,))
+        self.assertEqual(identical.bytes_downloaded, len(body))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,128 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from ads_monitoring.config import load_jobs
+from ads_monitoring.jobs import JobRunner
+from ads_monitoring.page_cache import PageCache
+from ads_monitoring.replay import FakePages, FakeSheets, FakeTelegram
+from ads_monitoring.telegram import API_BASE
+
+PAGE = """
+<table>
+  <tr><th>ID</th><th>Domain</th><th>Sale</th></tr>
+  <tr><td>{offer_id}</td><td>{domain}</td><td>10%</td></tr>
+</table>
+"""
+SHARED_URL = "https://offers.invalid/shared"
+OWN_URL = "https://offers.invalid/own"
+
+
+class JobsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.key_file = self.tmp / "key.json"
+        self.key_file.write_text("{}", encoding="utf-8")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _write(self, payload: dict) -> Path:
+        path = self.tmp / "jobs.json"
+        path.write_text(json.dumps(payload), encoding="utf-8")
+        return path
+
+    def _config(self, **job_b) -> dict:
+        return {
+            "defaults": {
+                "GOOGLE_SERVICE_ACCOUNT_FILE": str(self.key_file),
+                "GOOGLE_SHEET_ID": "replay",
+                "TELEGRAM_BOT_TOKEN": "token",
+                "STATE_DIR": str(self.tmp / "state"),
+                "ARCHIVE_PATH": "",
+                "JOB_WORKERS": 2,
+            },
+            "jobs": {
+                "team-a": {
+                    "FLOCKTORY_URLS": [SHARED_URL],
+                    "SHEET_CURRENT_NAME": "a_current",
+                    "SHEET_PREVIOUS_NAME": "a_previous",
+                    "TELEGRAM_CHANNEL_ID": "@a",
+                },
+                "team-b": {
+                    "FLOCKTORY_URLS": [SHARED_URL, OWN_URL],
+                    "SHEET_CURRENT_NAME": "b_current",
+                    "SHEET_PREVIOUS_NAME": "b_previous",
+                    "TELEGRAM_CHANNEL_ID": "@b",
+                    **job_b,
+                },
+            },
+        }
+
+    def test_load_jobs_merges_defaults_and_isolates_state(self) -> None:
+        config = load_jobs(self._write(self._config()), env={})
+
+        self.assertEqual(config.workers, 2)
+        self.assertEqual(config.state_dir, str(self.tmp / "state"))
+        job_b = config.jobs["team-b"]
+        self.assertEqual(job_b.source_urls, (SHARED_URL, OWN_URL))
+        self.assertEqual(job_b.telegram_chat_ids, ("@b",))
+        self.assertEqual(job_b.state_dir, str(self.tmp / "state" / "jobs" / "team-b"))
+        self.assertIsNone(job_b.archive_path)
+
+    def test_load_jobs_rejects_per_job_fetch_settings(self) -> None:
+        path = self._write(self._config(REQUEST_TIMEOUT_SECONDS=5))
+        with self.assertRaisesRegex(RuntimeError, "team-b cannot override REQUEST_TIMEOUT"):
+            load_jobs(path, env={})
+
+    def test_runner_fetches_each_url_once_and_fans_out(self) -> None:
+        config = load_jobs(self._write(self._config()), env={})
+        pages = FakePages(
+            {
+                SHARED_URL: PAGE.format(offer_id="1", domain="a.ru"),
+                OWN_URL: PAGE.format(offer_id="2", domain="b.ru"),
+            }
+        )
+        sheets = FakeSheets()
+        telegram = FakeTelegram()
+
+        with JobRunner(config.jobs, config.state_dir, 2, sheets.session()) as runner:
+            runner.session.mount("https://offers.invalid/", pages)
+            for monitor in runner.monitors.values():
+                monitor.session.mount(API_BASE + "/", telegram)
+                monitor.telegram.limiter.min_interval = 0
+            outcomes = runner.run_cycle()
+
+        self.assertEqual(outcomes, {"team-a": True, "team-b": True})
+        self.assertEqual(runner.failed, [])
+        self.assertEqual(pages.request_count, 2)
+        self.assertEqual([row[0] for row in sheets.values("a_current")[1:]], ["1"])
+        self.assertEqual([row[0] for row in sheets.values("b_current")[1:]], ["1", "2"])
+        self.assertCountEqual(
+            [message["chat_id"] for message in telegram.messages], ["@a", "@b"]
+        )
+
+    def test_failed_job_keeps_other_jobs_page_cache_entries(self) -> None:
+        config = load_jobs(self._write(self._config(FLOCKTORY_URLS=[OWN_URL])), env={})
+        pages = FakePages({SHARED_URL: PAGE.format(offer_id="1", domain="a.ru")})
+        telegram = FakeTelegram()
+
+        with JobRunner(config.jobs, config.state_dir, 2, FakeSheets().session()) as runner:
+            runner.session.mount("https://offers.invalid/", pages)
+            runner.session.mount(API_BASE + "/", telegram)
+            for monitor in runner.monitors.values():
+                self.assertIs(monitor.transport, runner.transport)
+                monitor.telegram.limiter.min_interval = 0
+            outcomes = runner.run_cycle()
+
+        self.assertEqual(outcomes, {"team-a": True})
+        self.assertEqual(runner.failed, ["team-b"])
+        cache = PageCache(Path(config.state_dir) / "page_cache.json")
+        self.assertIsNotNone(cache.get(SHARED_URL))
+        self.assertIsNone(cache.get(OWN_URL))
+
+
+if __name__ == "__main__":
+    unittest.main()
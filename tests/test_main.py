@@ -0,0 +1,29 @@
+from concurrent.futures import ThreadPoolExecutor
+import pstats
+import tempfile
+import unittest
+from pathlib import Path
+
+from ads_monitoring.main import _profile_all_threads
+
+
+def _worker_task(value: int) -> int:
+    return value * 2
+
+
+class ProfilingTests(unittest.TestCase):
+    def test_profile_includes_worker_threads(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            output = str(Path(tmp) / "profile.out")
+            with _profile_all_threads(output):
+                with ThreadPoolExecutor(max_workers=2) as pool:
+                    self.assertEqual(list(pool.map(_worker_task, [1, 2, 3])), [2, 4, 6])
+
+            stats = pstats.Stats(output).stats
+
+        calls = [value[1] for key, value in stats.items() if key[2] == "_worker_task"]
+        self.assertEqual(calls, [3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from ads_monitoring.metrics import RunMetrics
+
+
+class RunMetricsTests(unittest.TestCase):
+    def test_spans_accumulate_and_counters_add_up(self) -> None:
+        metrics = RunMetrics()
+        with metrics.span("fetch"):
+            pass
+        with metrics.span("fetch"):
+            pass
+        metrics.add_timing("parse", 0.25)
+        metrics.incr("rows_parsed", 10)
+        metrics.incr("rows_parsed", 5)
+
+        data = metrics.to_dict()
+        self.assertIn("fetch", data["timings"])
+        self.assertEqual(data["timings"]["parse"], 0.25)
+        self.assertEqual(data["counters"], {"rows_parsed": 15})
+        self.assertEqual(data["status"], "ok")
+
+    def test_exports_jsonl_and_prometheus_textfile(self) -> None:
+        metrics = RunMetrics()
+        metrics.add_timing("telegram", 1.5)
+        metrics.incr("sheets_api_calls", 3)
+        metrics.status = "error"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            jsonl = Path(tmp) / "metrics.jsonl"
+            textfile = Path(tmp) / "ads_monitoring.prom"
+            metrics.export(str(jsonl), str(textfile))
+            metrics.export(str(jsonl), str(textfile))
+
+            records = [json.loads(line) for line in jsonl.read_text().splitlines()]
+            self.assertEqual(len(records), 2)
+            self.assertEqual(records[0]["counters"]["sheets_api_calls"], 3)
+
+            prom = textfile.read_text()
+            self.assertIn('ads_monitoring_stage_seconds{stage="telegram"} 1.5', prom)
+            self.assertIn("ads_monitoring_sheets_api_calls 3", prom)
+            self.assertIn("ads_monitoring_run_success 0", prom)
+            self.assertFalse(textfile.with_suffix(".prom.tmp").exists())
+
+    def test_jsonl_keeps_only_the_latest_records(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            jsonl = Path(tmp) / "metrics.jsonl"
+            for runs in range(5):
+                metrics = RunMetrics()
+                metrics.incr("runs", runs)
+                metrics.export(str(jsonl), None, jsonl_max_lines=3)
+
+            records = [json.loads(line) for line in jsonl.read_text().splitlines()]
+            self.assertEqual([record["counters"]["runs"] for record in records], [2, 3, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
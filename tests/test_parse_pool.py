@@ -0,0 +1,56 @@
+import unittest
+from unittest import mock
+
+from ads_monitoring.fetcher import count_pairs, parse_offers
+from ads_monitoring.parse_pool import ParsePool, row_ranges, table_spans
+from benchmarks.generator import OFFER_HEADERS, generate_page
+
+
+class ParsePoolTests(unittest.TestCase):
+    def test_row_ranges_cover_page_on_row_boundaries(self) -> None:
+        page = generate_page(500, seed=3, noise_tables=0).encode("utf-8")
+        ranges = row_ranges(page, parts=4)
+        self.assertEqual(len(ranges), 5)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], len(page))
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertTrue(page[start:].lower().startswith(b"<tr"))
+
+    def test_split_and_whole_page_parsing_match_serial(self) -> None:
+        single_table = generate_page(2_000, seed=5, noise_tables=0).encode("utf-8")
+        noisy = generate_page(300, seed=6).encode("utf-8")
+        with ParsePool(workers=3, split_bytes=1024) as pool:
+            for page in (single_table, noisy):
+                with self.subTest(size=len(page)):
+                    expected = parse_offers(page)
+                    offers = pool(page, "utf-8")
+                    self.assertEqual(offers, expected)
+                    self.assertEqual(count_pairs(offers), count_pairs(expected))
+
+    def test_noisy_page_splits_inside_the_offer_table(self) -> None:
+        page = generate_page(2_000, seed=7).encode("utf-8")
+        spans = table_spans(page)
+        self.assertEqual(len(spans), 4)
+        partial = page.replace(f"<th>{OFFER_HEADERS[-2]}</th>".encode("utf-8"), b"<th>?</th>")
+        with ParsePool(workers=3, split_bytes=1024) as pool:
+            for html in (page, partial):
+                with self.subTest(size=len(html)):
+                    executor = pool._executor
+                    with mock.patch.object(executor, "submit", wraps=executor.submit) as submit:
+                        offers = pool(html, "utf-8")
+                    self.assertEqual(offers, parse_offers(html))
+                    self.assertEqual(
+                        [call.args[0].__name__ for call in submit.call_args_list],
+                        ["_parse_rows"] * 3,
+                    )
+
+    def test_single_worker_parses_serially(self) -> None:
+        page = generate_page(50, seed=1).encode("utf-8")
+        pool = ParsePool(workers=1)
+        self.assertIsNone(pool._executor)
+        self.assertEqual(pool(page), parse_offers(page))
+
+
+if __name__ == "__main__":
+    unittest.main()
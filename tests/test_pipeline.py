@@ -0,0 +1,62 @@
+import threading
+import unittest
+
+from ads_monitoring.pipeline import SKIP, Stage, run_stages, stage_order
+
+
+class PipelineTests(unittest.TestCase):
+    def test_independent_stages_run_concurrently(self) -> None:
+        barrier = threading.Barrier(2, timeout=5)
+
+        def meet(value: int) -> int:
+            barrier.wait()
+            return value
+
+        results = run_stages(
+            [
+                Stage("fetch", lambda: meet(2)),
+                Stage("auth", lambda: meet(3)),
+                Stage("write", lambda rows, client: rows * client, after=("fetch", "auth")),
+            ]
+        )
+
+        self.assertEqual(results, {"fetch": 2, "auth": 3, "write": 6})
+
+    def test_skip_and_failure_only_stop_dependent_stages(self) -> None:
+        ran: list[str] = []
+
+        def fail(snapshot: str) -> None:
+            raise RuntimeError("telegram down")
+
+        stages = [
+            Stage("store", lambda: "snapshot"),
+            Stage("sheets", lambda snapshot: ran.append("sheets"), after=("store",)),
+            Stage("telegram", fail, after=("store",)),
+            Stage("notified", lambda _: ran.append("notified"), after=("telegram",)),
+        ]
+        with self.assertRaisesRegex(RuntimeError, "telegram down"):
+            run_stages(stages)
+        self.assertEqual(ran, ["sheets"])
+
+        results = run_stages(
+            [
+                Stage("store", lambda: SKIP),
+                Stage("compare", lambda snapshot: ran.append("compare"), after=("store",)),
+                Stage("baseline", lambda: 1),
+            ]
+        )
+        self.assertEqual(results, {"baseline": 1})
+        self.assertEqual(ran, ["sheets"])
+
+    def test_rejects_unknown_dependencies_and_cycles(self) -> None:
+        self.assertEqual(
+            stage_order([Stage("b", print, after=("a",)), Stage("a", print)]), ["a", "b"]
+        )
+        with self.assertRaises(ValueError):
+            stage_order([Stage("a", print, after=("missing",))])
+        with self.assertRaises(ValueError):
+            stage_order([Stage("a", print, after=("b",)), Stage("b", print, after=("a",))])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,256 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from requests.adapters import HTTPAdapter
+
+from ads_monitoring.config import Settings
+from ads_monitoring.fetcher import SHEET_FIELDS
+from ads_monitoring.replay import FakePages, FakeSheets, FakeTelegram, record, replay
+from ads_monitoring.sheets import SHEET_HEADERS, SheetsClient, with_fingerprint
+
+PAGE = """
+<table>
+  <tr><th>ID</th><th>Domain</th><th>Sale</th></tr>
+  {rows}
+</table>
+"""
+
+
+def _padded(row: list[str]) -> list[str]:
+    return [*row, *[""] * (len(SHEET_FIELDS) - len(row))]
+
+
+def _page(*offers: tuple[str, str, str]) -> str:
+    rows = "".join(f"<tr><td>{i}</td><td>{d}</td><td>{s}</td></tr>" for i, d, s in offers)
+    return PAGE.format(rows=rows)
+
+
+class ReplayTests(unittest.TestCase):
+    def test_sheets_client_round_trips_through_fake_api(self) -> None:
+        fake = FakeSheets(sheets={"current": [SHEET_FIELDS, ["1", "", "a.ru"]]})
+        client = SheetsClient("replay", session=fake.session())
+        rows = [["2", "", "b.ru"], ["1", "", "a.ru", "", "5%"]]
+
+        client.rotate_current_to_previous("current", "previous")
+        client.write_current("current", rows, mode="diff")
+
+        self.assertEqual(fake.values("previous")[1], ["1", "", "a.ru"])
+        current = fake.values("current")
+        self.assertEqual(current[0], SHEET_HEADERS)
+        self.assertCountEqual(current[1:], [with_fingerprint(row) for row in rows])
+        self.assertEqual(fake.worksheets[0].hidden_columns, {len(SHEET_FIELDS)})
+
+        fake.cells_read = 0
+        client.write_current("current", rows, mode="diff")
+        self.assertEqual(fake.cells_read, 2 * len(rows))
+
+    def test_baseline_reads_full_rows_and_sheet_layout(self) -> None:
+        rows = [["1", "site", "a.ru", "", "5%"], ["2", "site", "b.ru", "", "7%"]]
+        fake = FakeSheets(
+            sheets={"current": [SHEET_HEADERS, *(with_fingerprint(row) for row in rows)]}
+        )
+        client = SheetsClient("replay", session=fake.session())
+
+        baseline, layout = client.read_baseline(client.ensure_sheet("current"))
+
+        self.assertEqual([row[:5] for row in baseline], rows)
+        self.assertEqual(len(baseline[0]), len(SHEET_FIELDS))
+        self.assertEqual(layout, [(row[0], with_fingerprint(row)[-1]) for row in rows])
+
+    def test_bootstrap_from_sheet_reports_only_real_changes(self) -> None:
+        url = "https://offers.invalid/page"
+        a, b = ("1", "a.ru", "5%"), ("2", "b.ru", "5%")
+        fake = FakeSheets()
+        replay([{url: _page(a, b)}], retry_after=0, telegram_interval=0, fake_sheets=fake)
+
+        telegram = FakeTelegram()
+        fake.cells_written = 0
+        with tempfile.TemporaryDirectory() as state_dir:
+            replay(
+                [{url: _page(a, ("2", "b.ru", "7%"))}],
+                retry_after=0,
+                telegram_interval=0,
+                state_dir=state_dir,
+                fake_sheets=fake,
+                fake_telegram=telegram,
+            )
+
+        text = "\n".join(message["text"] for message in telegram.messages)
+        self.assertIn("b.ru", text)
+        self.assertNotIn("a.ru", text)
+        self.assertNotIn("—", text)
+        self.assertEqual(fake.cells_written, len(SHEET_HEADERS))
+
+    def test_upgrade_from_sheet_without_source_column_reports_no_changes(self) -> None:
+        url = "https://offers.invalid/page"
+        width = SHEET_FIELDS.index("source")
+        legacy = [["1", "", "a.ru", "", "5%"], ["2", "", "b.ru", "", "7%"]]
+        fake = FakeSheets(
+            sheets={"current": [SHEET_FIELDS[:width], *(_padded(row)[:width] for row in legacy)]}
+        )
+
+        telegram = FakeTelegram()
+        with tempfile.TemporaryDirectory() as state_dir:
+            replay(
+                [{url: _page(("1", "a.ru", "5%"), ("2", "b.ru", "7%"))}],
+                retry_after=0,
+                telegram_interval=0,
+                state_dir=state_dir,
+                fake_sheets=fake,
+                fake_telegram=telegram,
+            )
+
+        self.assertEqual([message["text"] for message in telegram.messages], ["Изменений нет."])
+        self.assertEqual(fake.values("current")[1][width], url)
+
+    def test_record_creates_missing_sheets_and_strips_fingerprints(self) -> None:
+        url = "https://offers.invalid/page"
+        rows = [["1", "site", "a.ru", "", "5%"]]
+        fake = FakeSheets(sheets={"current": [SHEET_HEADERS, *map(with_fingerprint, rows)]})
+        pages = FakePages({url: _page(("1", "a.ru", "5%"))})
+        telegram = FakeTelegram()
+
+        def route(adapter, request, *args, **kwargs):
+            service = pages if request.url == url else telegram
+            return service.send(request, *args, **kwargs)
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(
+            HTTPAdapter, "send", autospec=True, side_effect=route
+        ):
+            settings = Settings(
+                flocktory_url=url,
+                flocktory_urls=(url,),
+                google_sheet_id=fake.spreadsheet_id,
+                google_service_account_file="",
+                sheet_current_name="current",
+                sheet_previous_name="previous",
+                telegram_bot_token="replay",
+                telegram_channel_id="replay",
+                request_timeout_seconds=30,
+                state_dir=tmp,
+            )
+            recording = record(settings, sheets_session=fake.session())
+
+        self.assertEqual(recording.sheets["current"], [SHEET_FIELDS, *map(_padded, rows)])
+        self.assertEqual(recording.sheets["previous"], [SHEET_FIELDS])
+        self.assertEqual(fake.values("previous")[0], SHEET_HEADERS)
+        self.assertEqual(recording.pages, {url: _page(("1", "a.ru", "5%"))})
+
+    def test_replay_runs_cycles_against_fakes_with_quota_errors(self) -> None:
+        pages = [
+            {"https://offers.invalid/page": _page(("1", "a.ru", "10%"), ("2", "b.ru", "5%"))},
+            {"https://offers.invalid/page": _page(("1", "a.ru", "15%"), ("3", "c.ru", "5%"))},
+        ]
+        report = replay(
+            pages,
+            cycles=3,
+            quota_every=7,
+            retry_after=0,
+            telegram_interval=0,
+        )
+
+        self.assertEqual(report.cycles, 3)
+        self.assertEqual(report.rows, 6)
+        self.assertGreaterEqual(report.messages, 3)
+        self.assertGreater(report.quota_errors, 0)
+        self.assertGreater(report.sheets_requests, 0)
+
+    def test_diff_mirror_follows_the_physical_sheet_layout(self) -> None:
+        url = "https://offers.invalid/page"
+        a, b = ("1", "a.ru", "5%"), ("2", "b.ru", "5%")
+        c, d = ("3", "c.ru", "5%"), ("4", "d.ru", "5%")
+        changed_b = ("2", "b.ru", "7%")
+        fake = FakeSheets()
+
+        replay(
+            [{url: _page(a, b, c)}, {url: _page(d, a, b)}, {url: _page(d, a, changed_b)}],
+            cycles=3,
+            retry_after=0,
+            telegram_interval=0,
+            fake_sheets=fake,
+        )
+
+        current = fake.values("current")
+        self.assertEqual(current[0], SHEET_HEADERS)
+        self.assertCountEqual(
+            [row[:3] for row in current[1:] if any(row)],
+            [["4", "", "d.ru"], ["1", "", "a.ru"], ["2", "", "b.ru"]],
+        )
+        self.assertEqual(
+            sorted((row[0], row[4]) for row in current[1:] if any(row)),
+            [("1", "5%"), ("2", "7%"), ("4", "5%")],
+        )
+
+    def test_unchanged_run_makes_no_sheets_requests(self) -> None:
+        pages = [{"https://offers.invalid/page": _page(("1", "a.ru", "5%"))}]
+        for pipeline_mode in ("batch", "stream"):
+            with self.subTest(pipeline_mode=pipeline_mode), tempfile.TemporaryDirectory() as tmp:
+                fake = FakeSheets()
+                options = {
+                    "retry_after": 0,
+                    "telegram_interval": 0,
+                    "state_dir": tmp,
+                    "pipeline_mode": pipeline_mode,
+                    "fake_sheets": fake,
+                }
+                replay(pages, **options)
+                (Path(tmp) / "sheets_metadata.json").unlink()
+                fake.request_count = 0
+
+                replay(pages, cycles=2, **options)
+
+                self.assertEqual(fake.request_count, 0)
+
+    def test_unchanged_source_offers_come_from_the_snapshot_store(self) -> None:
+        first, second = "https://offers.invalid/a", "https://offers.invalid/b"
+        before = {first: _page(("1", "a.ru", "5%")), second: _page(("2", "b.ru", "5%"))}
+        after = {first: before[first], second: _page(("2", "b.ru", "7%"))}
+        for legacy_rows in (False, True):
+            with self.subTest(legacy_rows=legacy_rows), tempfile.TemporaryDirectory() as tmp:
+                fake = FakeSheets()
+                options = {"retry_after": 0, "telegram_interval": 0, "state_dir": tmp}
+                replay([before], fake_sheets=fake, **options)
+                if legacy_rows:
+                    with sqlite3.connect(Path(tmp) / "snapshots.sqlite3") as conn:
+                        conn.execute("UPDATE snapshot_rows SET source = ''")
+
+                report = replay([after], fake_sheets=fake, **options)
+
+                self.assertEqual(report.page_requests, 3 if legacy_rows else 2)
+                self.assertEqual(
+                    sorted((row[0], row[4], row[10]) for row in fake.values("current")[1:]),
+                    [("1", "5%", first), ("2", "7%", second)],
+                )
+
+    def test_stream_pipeline_appends_rows_and_skips_unchanged_pages(self) -> None:
+        first = {"https://offers.invalid/page": _page(("1", "a.ru", "10%"), ("2", "b.ru", "5%"))}
+        second = {"https://offers.invalid/page": _page(("1", "a.ru", "15%"))}
+        report = replay(
+            [first, second, second],
+            cycles=3,
+            retry_after=0,
+            telegram_interval=0,
+            pipeline_mode="stream",
+        )
+
+        self.assertEqual(report.rows, 4)
+        self.assertEqual(report.messages, 2)
+
+    def test_append_mode_writes_rows_in_batches(self) -> None:
+        fake = FakeSheets(sheets={"current": [SHEET_FIELDS, ["9", "", "old.ru"]]})
+        client = SheetsClient("replay", session=fake.session())
+        rows = [[str(idx), "", f"{idx}.ru"] for idx in range(5)]
+
+        client.write_current("current", iter(rows), mode="append", batch_rows=2)
+
+        self.assertEqual(
+            fake.values("current"), [SHEET_HEADERS, *(with_fingerprint(row) for row in rows)]
+        )
+        self.assertEqual(client.cells_written, 5 * len(SHEET_HEADERS))
+
+
+if __name__ == "__main__":
+    unittest.main()
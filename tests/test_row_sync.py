@@ -0,0 +1,59 @@
+import unittest
+
+from ads_monitoring.row_sync import plan_signature_sync
+
+
+def _signed(row: list[str]) -> list[str]:
+    return [*row, "|".join(row)]
+
+
+def _signatures(rows: list[list[str]]) -> list[tuple[str, str]]:
+    return [(row[0], _signed(row)[-1]) for row in rows]
+
+
+def _apply(existing: list[list[str]], plan) -> list[list[str]]:
+    grid = [_signed(row) for row in existing]
+    for position, row in plan.updates.items():
+        while len(grid) <= position:
+            grid.append([""] * plan.width)
+        grid[position] = row
+    return [row[:-1] for row in grid[: plan.row_count]]
+
+
+def _plan(existing: list[list[str]], new: list[list[str]]):
+    return plan_signature_sync(_signatures(existing), map(_signed, new), width=3)
+
+
+class RowSyncTests(unittest.TestCase):
+    def test_unchanged_rows_produce_no_updates(self) -> None:
+        rows = [["1", "a"], ["2", "b"]]
+        plan = _plan(rows, rows)
+        self.assertEqual(plan.updates, {})
+        self.assertEqual(plan.order, (0, 1))
+
+    def test_only_changed_inserted_and_deleted_rows_are_written(self) -> None:
+        existing = [["1", "a"], ["2", "b"], ["3", "c"], ["4", "d"]]
+        new = [["0", "z"], ["1", "a"], ["3", "C"], ["4", "d"]]
+        plan = _plan(existing, new)
+        self.assertEqual(plan.updates, {1: _signed(["0", "z"]), 2: _signed(["3", "C"])})
+        self.assertEqual(sorted(map(tuple, _apply(existing, plan))), sorted(map(tuple, new)))
+        self.assertEqual(plan.order, (1, 0, 2, 3))
+
+    def test_deletions_compact_rows_and_blank_the_tail(self) -> None:
+        existing = [["1", "a"], ["2", "b"], ["3", "c"], ["4", "d"]]
+        new = [["4", "d"], ["2", "b"]]
+        plan = _plan(existing, new)
+        self.assertEqual(plan.updates[2], ["", "", ""])
+        self.assertEqual(plan.updates[3], ["", "", ""])
+        self.assertEqual(sorted(map(tuple, _apply(existing, plan))), sorted(map(tuple, new)))
+        self.assertEqual(plan.ranges()[0][0], 0)
+
+    def test_duplicate_ids_are_matched_by_occurrence(self) -> None:
+        existing = [["", "a"], ["", "b"]]
+        new = [["", "a"], ["", "b"], ["", "c"]]
+        plan = _plan(existing, new)
+        self.assertEqual(plan.updates, {2: _signed(["", "c"])})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from unittest import mock
+
+from ads_monitoring.sheets import SHEET_HEADERS, SheetsClient, with_fingerprint
+
+
+def _worksheet(sheet_id: int, title: str, rows: list[list[str]]) -> mock.Mock:
+    sheet = mock.Mock(id=sheet_id, title=title, row_count=len(rows) + 1, col_count=12)
+    sheet.row_values.return_value = list(SHEET_HEADERS)
+    sheet.get.return_value = rows
+    sheet._properties = {"gridProperties": {}}
+    return sheet
+
+
+class SheetsClientTests(unittest.TestCase):
+    def _client(self, sheets: dict[str, mock.Mock]) -> SheetsClient:
+        client = SheetsClient.__new__(SheetsClient)
+        client.spreadsheet = mock.Mock()
+        client.metadata_cache = None
+        client._verified = set()
+        client.worksheet = mock.Mock(side_effect=sheets.__getitem__)
+        return client
+
+    def test_rotation_is_one_server_side_batch_update(self) -> None:
+        current = _worksheet(1, "current", [["1", "site", "a.ru", "", "5%"]])
+        previous = _worksheet(2, "previous", [])
+        client = self._client({"current": current, "previous": previous})
+
+        client.rotate_current_to_previous("current", "previous")
+
+        current.get.assert_not_called()
+        client.spreadsheet.batch_update.assert_called_once()
+        requests = client.spreadsheet.batch_update.call_args.args[0]["requests"]
+        self.assertEqual(requests[1]["copyPaste"]["source"], {"sheetId": 1})
+        self.assertEqual(requests[1]["copyPaste"]["destination"], {"sheetId": 2})
+        previous.clear.assert_not_called()
+        previous.update.assert_not_called()
+
+    def test_write_current_sends_only_changed_ranges(self) -> None:
+        existing = [["1", "a"], ["2", "b"]]
+        current = _worksheet(1, "current", existing)
+        client = self._client({"current": current})
+
+        layout = [(row[0], with_fingerprint(row)[-1]) for row in existing]
+        client.write_current("current", [["1", "a"], ["2", "B"]], existing=layout)
+
+        body = client.spreadsheet.values_batch_update.call_args.args[0]
+        self.assertEqual([item["range"] for item in body["data"]], ["'current'!A3"])
+        self.assertEqual(body["data"][0]["values"], [with_fingerprint(["2", "B"])])
+        current.clear.assert_not_called()
+
+    def test_diff_without_cached_rows_reads_only_key_and_fingerprint_columns(self) -> None:
+        current = _worksheet(1, "current", [])
+        current.row_count = 3
+        client = self._client({"current": current})
+        client.spreadsheet.values_batch_get.return_value = {
+            "valueRanges": [
+                {"values": [["1", "2"]]},
+                {"values": [[with_fingerprint(["1", "a"])[-1], "stale"]]},
+            ]
+        }
+
+        client.write_current("current", [["1", "a"], ["2", "b"]])
+
+        ranges = client.spreadsheet.values_batch_get.call_args.args[0]
+        self.assertEqual(ranges, ["'current'!A2:A3", "'current'!L2:L3"])
+        current.get.assert_not_called()
+        body = client.spreadsheet.values_batch_update.call_args.args[0]
+        self.assertEqual([item["range"] for item in body["data"]], ["'current'!A3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from google.oauth2.service_account import Credentials
+
+from ads_monitoring.replay import FakeSheets
+from ads_monitoring.sheets import SCOPES, SheetsClient, with_fingerprint
+from ads_monitoring.sheets_cache import MetadataCache, TokenCache
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _credentials() -> Credentials:
+    return Credentials(
+        mock.Mock(),
+        "bot@example.iam.gserviceaccount.com",
+        "https://oauth2.googleapis.com/token",
+        scopes=SCOPES,
+    )
+
+
+class SheetsCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_token_cache_reuses_unexpired_tokens_across_instances(self) -> None:
+        path = self.tmp / "token.json"
+        credentials = _credentials()
+        credentials.token = "cached-token"
+        credentials.expiry = _utcnow() + timedelta(hours=1)
+        TokenCache(path).store(credentials)
+
+        restored = _credentials()
+        self.assertTrue(TokenCache(path).apply(restored))
+        self.assertEqual(restored.token, "cached-token")
+        self.assertTrue(restored.valid)
+        self.assertEqual(path.stat().st_mode & 0o777, 0o600)
+
+        credentials.expiry = _utcnow() + timedelta(minutes=1)
+        TokenCache(path).store(credentials)
+        self.assertFalse(TokenCache(path).apply(_credentials()))
+
+    def test_warm_client_skips_metadata_and_header_calls(self) -> None:
+        fake = FakeSheets()
+        cache = MetadataCache(self.tmp / "metadata.json", ttl_seconds=300)
+        rows = [["1", "", "a.ru"], ["2", "", "b.ru"]]
+
+        cold = SheetsClient("replay", session=fake.session(), metadata_cache=cache)
+        cold.rotate_current_to_previous("current", "previous")
+        cold.write_current("current", rows, existing=[])
+
+        warm = SheetsClient("replay", session=fake.session(), metadata_cache=cache)
+        warm.rotate_current_to_previous("current", "previous")
+        layout = [(row[0], with_fingerprint(row)[-1]) for row in rows]
+        warm.write_current("current", rows, existing=layout)
+
+        self.assertEqual(warm.api_calls, 1)
+        self.assertEqual(fake.values("previous")[1][:3], rows[0])
+
+    def test_expired_metadata_is_fetched_again(self) -> None:
+        fake = FakeSheets(sheets={"current": [["id"]]})
+        cache = MetadataCache(self.tmp / "metadata.json", ttl_seconds=300)
+        SheetsClient("replay", session=fake.session(), metadata_cache=cache).ensure_sheet("current")
+
+        with mock.patch("ads_monitoring.sheets_cache.time.time", return_value=10**12):
+            self.assertIsNone(cache.get("replay"))
+            client = SheetsClient("replay", session=fake.session(), metadata_cache=cache)
+            client.worksheet("current")
+        self.assertEqual(client.api_calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
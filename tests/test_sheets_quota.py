@@ -0,0 +1,103 @@
+import threading
+import time
+import unittest
+
+from gspread.exceptions import APIError
+
+from ads_monitoring.fetcher import SHEET_FIELDS
+from ads_monitoring.replay import FakeSheets
+from ads_monitoring.sheets import SHEET_HEADERS, SheetsClient, with_fingerprint
+from ads_monitoring.sheets_quota import SheetsScheduler, TokenBucket
+
+URL = "https://sheets.googleapis.com/v4/spreadsheets/replay:batchUpdate"
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_waits_for_refill_once_the_minute_quota_is_spent(self) -> None:
+        now = [0.0]
+        bucket = TokenBucket(2, clock=lambda: now[0])
+
+        self.assertEqual([bucket.reserve(), bucket.reserve()], [0.0, 0.0])
+        self.assertAlmostEqual(bucket.reserve(), 30.0)
+        now[0] = 60.0
+        self.assertEqual(bucket.reserve(), 0.0)
+
+    def test_pause_delays_every_caller(self) -> None:
+        now = [0.0]
+        bucket = TokenBucket(60, clock=lambda: now[0])
+
+        bucket.pause(5.0)
+
+        self.assertAlmostEqual(bucket.reserve(), 5.0)
+
+
+class SheetsSchedulerTests(unittest.TestCase):
+    def test_backs_off_on_quota_errors_instead_of_failing(self) -> None:
+        fake = FakeSheets(
+            sheets={"current": [SHEET_FIELDS, ["1", "", "a.ru"]]},
+            quota_every=2,
+        )
+        delays: list[float] = []
+        scheduler = SheetsScheduler(0, 0, sleep=delays.append)
+        client = SheetsClient("replay", session=fake.session(), scheduler=scheduler)
+        rows = [["2", "", "b.ru"]]
+
+        client.rotate_current_to_previous("current", "previous")
+        client.write_current("current", rows, mode="diff")
+
+        self.assertGreater(fake.quota_errors, 0)
+        self.assertEqual(scheduler.quota_errors, fake.quota_errors)
+        self.assertEqual(fake.values("previous")[1], ["1", "", "a.ru"])
+        self.assertEqual(fake.values("current"), [SHEET_HEADERS, with_fingerprint(rows[0])])
+        self.assertGreaterEqual(len(delays), fake.quota_errors)
+        self.assertEqual(client.api_calls, fake.request_count)
+
+    def test_gives_up_after_the_retry_budget(self) -> None:
+        fake = FakeSheets(quota_every=1, retry_after=0)
+        scheduler = SheetsScheduler(0, 0, retries=2, sleep=lambda seconds: None)
+
+        with self.assertRaises(APIError):
+            SheetsClient("replay", session=fake.session(), scheduler=scheduler)
+        self.assertEqual(fake.request_count, 3)
+
+    def test_coalesces_batch_updates_queued_behind_the_quota(self) -> None:
+        queued = threading.Event()
+        release = threading.Event()
+
+        def sleep(seconds: float) -> None:
+            queued.set()
+            release.wait(5)
+
+        scheduler = SheetsScheduler(0, 1, sleep=sleep)
+        scheduler.buckets["write"].reserve()
+        sent: list[dict] = []
+
+        def send(body: dict) -> dict:
+            sent.append(body)
+            return {"spreadsheetId": "replay", "replies": [{"n": i} for i in range(3)]}
+
+        results: dict[str, dict] = {}
+        leader = threading.Thread(
+            target=lambda: results.update(
+                a=scheduler.coalesce(URL, {"requests": [{"a": 1}, {"a": 2}]}, send)
+            )
+        )
+        leader.start()
+        self.assertTrue(queued.wait(5))
+        follower = threading.Thread(
+            target=lambda: results.update(b=scheduler.coalesce(URL, {"requests": [{"b": 1}]}, send))
+        )
+        follower.start()
+        while scheduler.coalesced == 0:
+            time.sleep(0.001)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(sent, [{"requests": [{"a": 1}, {"a": 2}, {"b": 1}]}])
+        self.assertEqual(results["a"]["replies"], [{"n": 0}, {"n": 1}])
+        self.assertEqual(results["b"]["replies"], [{"n": 2}])
+
+
+if __name__ == "__main__":
+    unittest.main()
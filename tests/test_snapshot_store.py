@@ -0,0 +1,110 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from ads_monitoring.compare import content_fingerprint, diff_offers, row_fingerprint
+from ads_monitoring.fetcher import SHEET_FIELDS
+from ads_monitoring.snapshot_store import SnapshotStore
+
+
+class SnapshotStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore(Path(self._tmp.name) / "snapshots.sqlite3")
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self._tmp.cleanup()
+
+    def test_save_and_read_back_padded_rows(self) -> None:
+        snapshot_id = self.store.save([["1", "site", "a.ru", "", "5%"]])
+        rows = self.store.rows(snapshot_id)
+        self.assertEqual(len(rows[0]), len(SHEET_FIELDS))
+        self.assertEqual(rows[0][:5], ["1", "site", "a.ru", "", "5%"])
+        self.assertEqual(self.store.latest().offer_count, 1)
+        self.assertIsNone(self.store.latest(notified_only=True))
+
+    def test_pair_counts_are_cached_per_snapshot(self) -> None:
+        snapshot_id = self.store.save(
+            [
+                ["1", "", "a.ru", "", "5%"],
+                ["2", "", "a.ru", "", "5%"],
+                ["3", "", "b.ru", "", "7%"],
+                ["4", "", "", "", ""],
+            ]
+        )
+        self.assertEqual(
+            self.store.pair_counts(snapshot_id),
+            {("a.ru", "5%"): 2, ("b.ru", "7%"): 1},
+        )
+
+    def test_prune_keeps_latest_notified_and_mirrored(self) -> None:
+        mirrored = self.store.save([["1"]], notified=True)
+        notified = self.store.save([["2"]], notified=True)
+        self.store.save([["3"]])
+        latest = self.store.save([["4"]])
+        self.store.set_mirrored("sheet:current", mirrored)
+
+        self.store.prune()
+
+        self.assertEqual(self.store.latest().id, latest)
+        self.assertEqual(self.store.latest(notified_only=True).id, notified)
+        self.assertEqual(self.store.rows(mirrored)[0][0], "1")
+        self.assertEqual(self.store.mirrored_snapshot_id("sheet:current"), mirrored)
+
+    def test_mirrored_layout_is_kept_until_the_next_mirror(self) -> None:
+        snapshot_id = self.store.save([["1"], ["2"]])
+        self.assertIsNone(self.store.mirrored_layout("sheet:current"))
+
+        self.store.set_mirrored("sheet:current", snapshot_id, [("2", "fp2"), ("1", "fp1")])
+        self.assertEqual(
+            self.store.mirrored_layout("sheet:current"), [("2", "fp2"), ("1", "fp1")]
+        )
+
+        self.store.set_mirrored("sheet:current", snapshot_id)
+        self.assertIsNone(self.store.mirrored_layout("sheet:current"))
+
+    def test_sql_diff_matches_in_memory_diff(self) -> None:
+        previous = [["1", "", "a.ru", "", "5%"], ["2", "", "b.ru", "", "7%"], ["2", "", "b.ru"]]
+        current = [["1", "", "a.ru", "", "10%"], ["3", "", "c.ru", "", "7%"], ["2", "", "b.ru"]]
+        previous_id = self.store.save(previous)
+        current_id = self.store.save(current)
+
+        expected = diff_offers(
+            self.store.rows(current_id),
+            self.store.row_hashes(previous_id),
+            lambda keys: self.store.rows_by_key(previous_id, keys),
+        )
+        self.assertEqual(self.store.diff(previous_id, current_id), expected)
+        self.assertEqual(list(self.store.stream_rows(current_id, 2)), self.store.rows(current_id))
+
+    def test_source_only_changes_are_not_modifications(self) -> None:
+        previous_id = self.store.save([["1", "", "a.ru", "", "5%"]])
+        current = [["1", "", "a.ru", "", "5%", "", "", "", "", "", "https://offers.invalid/"]]
+        current_id = self.store.save(current)
+
+        self.assertFalse(self.store.diff(previous_id, current_id).has_changes)
+
+    def test_reopening_rehashes_rows_saved_with_full_row_fingerprints(self) -> None:
+        row = ["1", "", "a.ru", "", "5%", "", "", "", "", "", "https://offers.invalid/"]
+        snapshot_id = self.store.save([row])
+        self.store.close()
+        path = Path(self._tmp.name) / "snapshots.sqlite3"
+        with sqlite3.connect(str(path)) as conn:
+            conn.execute("UPDATE snapshot_rows SET row_hash = ?", (row_fingerprint(row),))
+            conn.execute("PRAGMA user_version = 0")
+        conn.close()
+
+        self.store = SnapshotStore(path)
+        self.assertEqual(self.store.row_hashes(snapshot_id), {"1": content_fingerprint(row)})
+
+    def test_discard_removes_snapshot(self) -> None:
+        kept = self.store.save([["1"]])
+        self.store.discard(self.store.save([["2"]]))
+        self.assertEqual(self.store.latest().id, kept)
+        self.assertEqual(self.store.pair_counts(kept + 1), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from ads_monitoring.fetcher import SOURCE_FIELD
+from ads_monitoring.sources import HostLimiter, collect_sources
+
+PAGE_TEMPLATE = """
+<table>
+  <tr><th>ID</th><th>Domain</th><th>Sale</th></tr>
+  <tr><td>{offer_id}</td><td>{domain}</td><td>10%</td></tr>
+</table>
+"""
+
+
+def _response(html: str) -> mock.MagicMock:
+    response = mock.MagicMock()
+    response.__enter__.return_value = response
+    response.headers = {"content-type": "text/html; charset=utf-8"}
+    response.iter_content.return_value = [html.encode("utf-8")]
+    return response
+
+
+class SourcesTests(unittest.TestCase):
+    def test_collect_sources_merges_in_url_order_and_tags_source(self) -> None:
+        pages = {
+            "https://a.example/1": PAGE_TEMPLATE.format(offer_id="1", domain="a.ru"),
+            "https://b.example/2": PAGE_TEMPLATE.format(offer_id="2", domain="b.ru"),
+        }
+        session = mock.Mock()
+        session.get.side_effect = lambda url, **kwargs: _response(pages[url])
+
+        result = collect_sources(
+            ["https://b.example/2", "https://a.example/1", "https://b.example/2"],
+            timeout_seconds=5,
+            session=session,
+        )
+
+        self.assertEqual([offer["id"] for offer in result.offers], ["2", "1"])
+        self.assertEqual(
+            [offer[SOURCE_FIELD] for offer in result.offers],
+            ["https://b.example/2", "https://a.example/1"],
+        )
+        self.assertEqual(session.get.call_count, 2)
+
+    def test_host_limiter_bounds_concurrency_per_host(self) -> None:
+        limiter = HostLimiter(per_host=2)
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def worker() -> None:
+            nonlocal active, peak
+            with limiter.slot("https://example.com/page"):
+                with lock:
+                    active += 1
+                    peak = max(peak, active)
+                time.sleep(0.01)
+                with lock:
+                    active -= 1
+
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(peak, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from unittest import mock
+
+from ads_monitoring.telegram import TelegramSender, split_message
+
+
+def _response(status_code: int, payload: dict | None = None) -> mock.Mock:
+    response = mock.Mock(status_code=status_code, headers={})
+    response.json.return_value = payload or {"ok": status_code == 200}
+    return response
+
+
+class TelegramTests(unittest.TestCase):
+    def test_split_message_respects_limit_and_line_boundaries(self) -> None:
+        lines = [f"+ domain{idx}.ru | {idx}%" for idx in range(2000)]
+        message = "\n".join(lines)
+        chunks = split_message(message)
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) <= 4096 for chunk in chunks))
+        self.assertEqual("\n".join(chunks).split("\n"), lines)
+
+    def test_split_message_hard_splits_long_lines(self) -> None:
+        chunks = split_message("x" * 10, limit=4)
+        self.assertEqual(chunks, ["xxxx", "xxxx", "xx"])
+
+    def test_send_honors_retry_after(self) -> None:
+        session = mock.Mock()
+        session.post.side_effect = [
+            _response(429, {"ok": False, "parameters": {"retry_after": 3}}),
+            _response(200),
+        ]
+        sender = TelegramSender("token", session=session, min_interval=0)
+        sleeps: list[float] = []
+        sender.limiter._sleep = sleeps.append
+
+        sender.send("@channel", "hello")
+
+        self.assertEqual(session.post.call_count, 2)
+        self.assertEqual(len(sleeps), 1)
+        self.assertAlmostEqual(sleeps[0], 3, places=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import threading
+import unittest
+from unittest import mock
+
+import requests
+
+from ads_monitoring.transport import LatencyTracker, RetryBudget, Transport
+
+
+def _response(status_code: int, body: str = "") -> mock.Mock:
+    response = mock.Mock(status_code=status_code, text=body)
+    response.headers = {}
+    return response
+
+
+class TransportTests(unittest.TestCase):
+    def test_retries_transient_failures_with_backoff(self) -> None:
+        session = mock.Mock()
+        session.get.side_effect = [
+            requests.ConnectionError("reset"),
+            _response(503),
+            _response(200, "ok"),
+        ]
+        sleeps: list[float] = []
+        transport = Transport(session, max_retries=3, backoff_seconds=1, sleep=sleeps.append)
+
+        response = transport.get("https://example.com", timeout=5)
+
+        self.assertEqual(response.text, "ok")
+        self.assertEqual(session.get.call_count, 3)
+        self.assertEqual(len(sleeps), 2)
+        self.assertLessEqual(sleeps[0], 1)
+        self.assertLessEqual(sleeps[1], 2)
+
+    def test_retry_budget_caps_retries(self) -> None:
+        session = mock.Mock()
+        session.get.return_value = _response(502)
+        transport = Transport(
+            session,
+            max_retries=10,
+            budget=RetryBudget(ratio=0.0, capacity=2),
+            sleep=lambda _: None,
+        )
+
+        response = transport.get("https://example.com")
+
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(session.get.call_count, 3)
+
+    def test_slow_request_is_hedged(self) -> None:
+        latency = LatencyTracker()
+        for _ in range(20):
+            latency.record("https://example.com/page", 0.01)
+        release = threading.Event()
+        fast = _response(200, "hedged")
+        slow = _response(200, "slow")
+
+        def get(url, **kwargs):
+            if session.get.call_count == 1:
+                release.wait(5)
+                return slow
+            return fast
+
+        session = mock.Mock()
+        session.get.side_effect = get
+        transport = Transport(session, latency=latency, hedge_percentile=95)
+        try:
+            response = transport.get("https://example.com/page")
+        finally:
+            release.set()
+            transport.close()
+
+        self.assertEqual(response.text, "hedged")
+        self.assertEqual(session.get.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()